@@ -0,0 +1,89 @@
+"""
+Benchmark: decoding PairCreated logs with web3's contract event ABI path (what the
+listeners used before) against RawLogDecoder.
+
+Run from the repository root:
+    python -m benchmarks.log_decoder_benchmark [num_logs]
+"""
+import os
+import sys
+import time
+from eth_abi import encode
+from web3 import Web3
+from web3._utils.method_formatters import log_entry_formatter
+from web3.datastructures import AttributeDict
+from src.modules.utils.ABI import UNISWAP_V2_FACTORY_ABI
+from src.modules.w3.event.event_listener.log_decoder import PairCreatedDecoder, checksum
+
+FACTORY = "0x8909Dc15e40173Ff4699343b6eB8132c65e18eC6"
+WETH = "0x4200000000000000000000000000000000000006"
+
+def make_raw_logs(n, topic):
+    """n PairCreated logs as eth_getLogs returns them over JSON-RPC."""
+    logs = []
+    for i in range(n):
+        token = "0x" + os.urandom(20).hex()
+        pair = "0x" + os.urandom(20).hex()
+        logs.append({
+            "address": FACTORY.lower(),
+            "topics": [
+                topic,
+                "0x" + encode(["address"], [WETH]).hex(),
+                "0x" + encode(["address"], [token]).hex(),
+            ],
+            "data": "0x" + encode(["address", "uint256"], [pair, i]).hex(),
+            "blockNumber": hex(20_000_000 + i // 10),
+            "blockHash": "0x" + os.urandom(32).hex(),
+            "transactionHash": "0x" + os.urandom(32).hex(),
+            "transactionIndex": hex(i % 10),
+            "logIndex": hex(i % 10),
+            "removed": False,
+        })
+    return logs
+
+def web3_path(raw_logs, event_abi):
+    """get_logs result formatting + ABI decoding + the old handle_event field extraction."""
+    out = []
+    for raw_log in raw_logs:
+        event = event_abi.process_log(AttributeDict(log_entry_formatter(raw_log)))
+        out.append({
+            "blockNumber": event.blockNumber,
+            "blockHash": event.blockHash.hex(),
+            "transactionHash": event.transactionHash.hex(),
+            "token0": event.args["token0"],
+            "token1": event.args["token1"],
+            "pair": event.args["pair"],
+        })
+    return out
+
+def bench(label, fn, n, repeat=5):
+    best = min(_timed(fn) for _ in range(repeat))
+    print(f"{label:<28} {best * 1000:8.1f} ms   {best / n * 1e6:7.2f} us/log")
+    return best
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    decoder = PairCreatedDecoder()
+    contract = Web3().eth.contract(address=FACTORY, abi=UNISWAP_V2_FACTORY_ABI)
+    event_abi = contract.events.PairCreated()
+    raw_logs = make_raw_logs(n, decoder.topic)
+    formatted_logs = [AttributeDict(log_entry_formatter(log)) for log in raw_logs]
+
+    assert web3_path(raw_logs[:10], event_abi) == [
+        {k: v for k, v in e.items() if k != "logIndex"} for e in decoder.decode(raw_logs[:10])
+    ]
+
+    print(f"Decoding {n} PairCreated logs (best of 5)")
+    baseline = bench("web3 contract events", lambda: web3_path(raw_logs, event_abi), n)
+    # Clear the checksum cache each run so repeats don't flatter the decoder
+    raw = bench("RawLogDecoder (raw JSON)", lambda: (checksum.cache_clear(), decoder.decode(raw_logs)), n)
+    bench("RawLogDecoder (formatted)", lambda: (checksum.cache_clear(), decoder.decode(formatted_logs)), n)
+    print(f"Speedup on the get_logs path: {baseline / raw:.1f}x")
+
+if __name__ == "__main__":
+    main()
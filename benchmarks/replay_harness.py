@@ -0,0 +1,245 @@
+"""
+End-to-end throughput harness: replays recorded (or synthetic) PairCreated events into a
+queue at a fixed rate, while N worker processes run the real HoneypotTimerFlowBaseUniswapV2
+against local stand-ins for the JSON-RPC node, BaseScan and Ollama (see standins.py).
+Trading is disabled: `transact` returns "Buy failed" without touching the gas API.
+
+Each worker behaves like single_worker.py (BRPOP -> handle_event), or with --pipeline like
+cpu_worker.py (BRPOP -> Pipeline of the flow's stages, threads per stage as given). At the
+end the harness reports queue lag, per-stage latency, outcomes, drops and events/minute.
+
+Record a live stream with the fetcher first:
+    RECORD_EVENTS=events.jsonl python event_fetcher.py
+Then, from the repository root (needs a Redis server; db 3 is used by default):
+    python -m benchmarks.replay_harness --recording events.jsonl --rate 120 --workers 4
+    python -m benchmarks.replay_harness --synthetic 200 --rate 600 --workers 8 --scan-rate-limit 0
+    python -m benchmarks.replay_harness --synthetic 200 --rate 600 --workers 2 --pipeline token=8,pair=8,llm=4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import redis
+from eth_utils import to_checksum_address
+from src.modules.utils.metrics import summarize
+from src.modules.w3.event.event_queue import decode_event
+from src.modules.w3.event.event_recorder import EventRecorder
+from .standins import StandInServer, JSONRPCStandIn, BaseScanStandIn, OllamaStandIn, WETH
+
+QUEUE = "Harness:NewToken"
+RESULTS = "Harness:Results"
+STOP = "Harness:Stop"
+STAGES = ["token", "pair", "liquidity", "security", "llm", "transact"]
+
+def synthetic_events(count):
+    """`count` PairCreated payloads for fresh tokens paired with WETH."""
+    events = []
+    for i in range(count):
+        token = to_checksum_address("0x" + os.urandom(20).hex())
+        token0, token1 = sorted([token, WETH], key=str.lower)
+        events.append({
+            "blockNumber": 20_000_000 + i,
+            "blockHash": os.urandom(32).hex(),
+            "transactionHash": os.urandom(32).hex(),
+            "token0": token0,
+            "token1": token1,
+            "pair": to_checksum_address("0x" + os.urandom(20).hex()),
+        })
+    return events
+
+def result(worker_id, event_data, dequeued_at, stages, error=None):
+    return json.dumps({
+        "worker": worker_id,
+        "lag": dequeued_at - event_data["replayedAt"],
+        "total": time.time() - dequeued_at,
+        "finishedAt": time.time(),
+        "stages": stages,
+        "error": error,
+    })
+
+def timed_stages(flow, r, worker_id):
+    """
+    The flow's stages wrapped to carry the queue metadata along with each item and to
+    push the event's result when it leaves the pipeline (rejected or after the last stage).
+    """
+    stages = flow.stages()
+    wrapped = []
+    for index, (name, fn) in enumerate(stages):
+        def stage(item, name=name, fn=fn, last=index == len(stages) - 1):
+            meta, value = item
+            start = time.perf_counter()
+            output = fn(value)
+            meta["stages"][name] = time.perf_counter() - start
+            if output is None or last:
+                r.lpush(RESULTS, result(worker_id, meta["event"], meta["dequeuedAt"], meta["stages"]))
+                return None
+            return meta, output
+        wrapped.append((name, stage))
+    return wrapped
+
+def worker_main(worker_id, rpc_url, redis_url, workdir, pipeline_spec=None):
+    """
+    A single_worker.py loop against the stand-ins. Runs in a spawned process, so the
+    BASE_SCAN_API_URL / OLLAMA_HOST environment set by the harness is picked up on import.
+    """
+    from src.modules.w3.chains.base import BaseChain
+    from src.modules.w3.w3_connector import W3Connector
+    from src.modules.w3.chains.scanner.base_scanner import BaseScanner
+    from src.modules.w3.chains.scanner.creation_batcher import CreationBatcher
+    from src.modules.w3.chains.scanner.async_scanner import AsyncChainScanner
+    from src.modules.w3.exchange.uniswap_v2_base import UniswapV2Base
+    from src.modules.w3.wallet.wallet import Wallet
+    from src.modules.w3.event.event_flow.honeypot_timer_flow_base_uniswap_v2 import HoneypotTimerFlowBaseUniswapV2
+    from src.modules.w3.event.event_flow.pipeline import Pipeline, Stage
+
+    class DryRunFlow(HoneypotTimerFlowBaseUniswapV2):
+        def transact(self, event):
+            return "Buy failed"
+
+    # The flow writes logs/ and data/ relative to the working directory
+    os.chdir(workdir)
+    r = redis.Redis.from_url(redis_url)
+    w3 = W3Connector(BaseChain(url=rpc_url))
+    scanner = BaseScanner()
+    exchange = UniswapV2Base(w3, scanner)
+    wallet = Wallet(private_key="0x" + os.urandom(32).hex())
+    # Like cpu_worker: concurrent token-stage threads share creation lookups and join
+    # identical lookups in flight
+    async_scanner = AsyncChainScanner(scanner, creations=CreationBatcher(scanner), r=r).start() if pipeline_spec else None
+    flow = DryRunFlow(w3, scanner, exchange, wallet, async_scanner=async_scanner)
+    pipeline = None
+    if pipeline_spec:
+        concurrency = {name: int(count) for name, count in (part.split("=") for part in pipeline_spec.split(","))}
+        pipeline = Pipeline([
+            Stage(name, fn, concurrency.get(name, 1)) for name, fn in timed_stages(flow, r, worker_id)
+        ]).start()
+
+    while not r.exists(STOP):
+        item = r.brpop(QUEUE, timeout=1)
+        if item is None:
+            continue
+        event_data = decode_event(item[1])
+        dequeued_at = time.time()
+        if pipeline is not None:
+            pipeline.submit(({"event": event_data, "dequeuedAt": dequeued_at, "stages": {}}, event_data))
+            continue
+        error = None
+        try:
+            flow.handle_event(event_data)
+        except Exception as e:
+            error = str(e)
+        r.lpush(RESULTS, result(worker_id, event_data, dequeued_at, flow.timer.last, error))
+
+def replay(r, events, rate):
+    """
+    Push events at `rate` per minute (0 = as fast as possible), stamping each with
+    `replayedAt` so workers can measure queue lag. Returns the sampled queue depths.
+    """
+    interval = 60.0 / rate if rate else 0
+    depths = []
+    start = time.time()
+    for i, event in enumerate(events):
+        if interval:
+            time.sleep(max(0, start + i * interval - time.time()))
+        payload = dict(event, replayedAt=time.time())
+        depths.append(r.lpush(QUEUE, json.dumps(payload)))
+    return depths
+
+def report(results, pushed, left_in_queue, depths, replay_started, scan):
+    processed = len(results)
+    errors = sum(1 for result in results if result["error"])
+    outcomes = {}
+    for result in results:
+        reached = [stage for stage in STAGES if stage in result["stages"]]
+        last = reached[-1] if reached else "none"
+        outcomes[last] = outcomes.get(last, 0) + 1
+
+    def line(label, stats):
+        return (f"  {label:<12} n={stats['count']:<5} mean={stats['mean'] * 1000:8.1f}ms "
+                f"p50={stats['p50'] * 1000:8.1f}ms p95={stats['p95'] * 1000:8.1f}ms max={stats['max'] * 1000:8.1f}ms")
+
+    print(f"\nPushed {pushed}, processed {processed}, dropped {pushed - processed} "
+          f"({left_in_queue} still queued), worker errors {errors}")
+    if results:
+        elapsed = max(result["finishedAt"] for result in results) - replay_started
+        print(f"Throughput: {processed / elapsed * 60:.1f} events/minute over {elapsed:.1f}s")
+    print(f"Max queue depth: {max(depths) if depths else 0}")
+    print(f"BaseScan stand-in: {scan.requests_served} answered, {scan.rate_limited} rate limited")
+    print("Latency:")
+    print(line("queue lag", summarize([result["lag"] for result in results])))
+    print(line("end-to-end", summarize([result["total"] for result in results])))
+    for stage in STAGES:
+        print(line(stage, summarize([result["stages"][stage] for result in results if stage in result["stages"]])))
+    print("Last stage reached:")
+    for stage, count in sorted(outcomes.items(), key=lambda item: -item[1]):
+        print(f"  {stage:<12} {count}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--recording", help="JSON-lines file written by EventRecorder")
+    source.add_argument("--synthetic", type=int, help="replay N synthetic WETH pairs instead")
+    parser.add_argument("--rate", type=float, default=60, help="events per minute (0 = burst)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--pipeline", help="run the flow as a staged pipeline, threads per stage e.g. token=8,llm=2")
+    parser.add_argument("--drain-timeout", type=float, default=120, help="seconds to wait for the queue to drain")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/3")
+    parser.add_argument("--rpc-latency", type=float, default=0.05)
+    parser.add_argument("--scan-latency", type=float, default=0.15)
+    parser.add_argument("--scan-rate-limit", type=int, default=5, help="BaseScan calls/sec (0 = unlimited)")
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--connect-latency", type=float, default=0.0,
+                        help="seconds per new RPC/BaseScan connection (TCP + TLS handshake)")
+    args = parser.parse_args()
+
+    if args.recording:
+        events = [line["event"] for line in EventRecorder.load(args.recording)]
+    else:
+        events = synthetic_events(args.synthetic)
+
+    rpc = StandInServer(JSONRPCStandIn, latency=args.rpc_latency, connect_latency=args.connect_latency).start()
+    scan = StandInServer(
+        BaseScanStandIn, latency=args.scan_latency, rate_limit=args.scan_rate_limit,
+        connect_latency=args.connect_latency
+    ).start()
+    llm = StandInServer(OllamaStandIn, latency=args.llm_latency).start()
+    os.environ["BASE_SCAN_API_URL"] = scan.url + "/api"
+    os.environ["OLLAMA_HOST"] = llm.url
+
+    r = redis.Redis.from_url(args.redis_url)
+    r.delete(QUEUE, RESULTS, STOP)
+
+    workdir = tempfile.mkdtemp(prefix="replay_harness_")
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=worker_main, args=(i, rpc.url, args.redis_url, workdir, args.pipeline))
+        for i in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    # Give the workers time to import and build their dependencies
+    time.sleep(5)
+
+    print(f"Replaying {len(events)} events at {args.rate or 'max'}/min into {args.workers} worker(s)...")
+    replay_started = time.time()
+    depths = replay(r, events, args.rate)
+
+    deadline = time.time() + args.drain_timeout
+    while r.llen(RESULTS) < len(events) and time.time() < deadline:
+        time.sleep(0.5)
+    r.set(STOP, 1)
+    for worker in workers:
+        worker.join(timeout=10)
+        if worker.is_alive():
+            worker.terminate()
+
+    results = [json.loads(item) for item in r.lrange(RESULTS, 0, -1)]
+    report(results, len(events), r.llen(QUEUE), depths, replay_started, scan.server.RequestHandlerClass)
+    r.delete(QUEUE, RESULTS, STOP)
+    for server in (rpc, scan, llm):
+        server.stop()
+
+if __name__ == "__main__":
+    main()
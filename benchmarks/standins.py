@@ -0,0 +1,242 @@
+"""
+Local stand-ins for the external services a worker talks to, so the pipeline can be
+benchmarked without mainnet, BaseScan quota or a GPU:
+
+    JSONRPCStandIn  - answers the eth_calls (direct or through Multicall3 aggregate3)
+                      that Token, Pair, UniswapV2Base and the flow make
+    BaseScanStandIn - getsourcecode / getabi / getcontractcreation, optionally rate limited
+    OllamaStandIn   - /api/chat always answering "YES"
+
+Each one adds a configurable latency per request to model the real service.
+"""
+import json
+import socket
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from eth_abi import encode, decode
+from eth_utils import keccak, to_checksum_address
+from src.modules.utils.ABI import (
+    MIN_ERC20_ABI,
+    PERMIT2_ABI,
+    UNISWAP_V2_FACTORY_ABI,
+    UNISWAP_V2_ROUTER2_ABI,
+)
+
+WETH = "0x4200000000000000000000000000000000000006"
+USDC = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
+FACTORY = "0x8909Dc15e40173Ff4699343b6eB8132c65e18eC6"
+PERMIT2 = "0x000000000022D473030F116dDEE9F6B43aC78BA3"
+ROUTER = "0x4752ba5dbc23f44d87826276bf6fd6b1c372ad24"
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+TOKEN_SOURCE = """
+pragma solidity ^0.8.0;
+contract StandInToken {
+    function transfer(address to, uint256 amount) public returns (bool) {}
+    function approve(address spender, uint256 amount) public returns (bool) {}
+    function balanceOf(address account) public view returns (uint256) {}
+}
+"""
+
+def selector(signature):
+    return keccak(text=signature)[:4]
+
+SELECTORS = {
+    selector("decimals()"): "decimals",
+    selector("getPair(address,address)"): "getPair",
+    selector("token0()"): "token0",
+    selector("token1()"): "token1",
+    selector("getReserves()"): "getReserves",
+    selector("balanceOf(address)"): "balanceOf",
+    selector("getEthBalance(address)"): "getEthBalance",
+    selector("getBlockNumber()"): "getBlockNumber",
+    selector("aggregate3((address,bool,bytes)[])"): "aggregate3",
+}
+
+class StandInServer:
+    """Runs a handler class on an ephemeral localhost port in a daemon thread."""
+    def __init__(self, handler_class, latency=0.0, **attributes):
+        handler = type(handler_class.__name__, (handler_class,), {"latency": latency, **attributes})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Keep-alive like the real endpoints; `connect_latency` is paid once per new
+    # connection, standing in for the TCP + TLS handshake
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    connect_latency = 0.0
+    requests_served = 0
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this, Nagle plus delayed
+        # ACKs add ~40 ms to every keep-alive response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        type(self).connections += 1
+        time.sleep(self.connect_latency)
+
+    def reply(self, payload):
+        time.sleep(self.latency)
+        type(self).requests_served += 1
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        return json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+    def log_message(self, *args):
+        pass
+
+class JSONRPCStandIn(StandInHandler):
+    """
+    Every token has 18 decimals (USDC 6), getPair derives a deterministic pair address,
+    and every pair holds enough liquidity to pass the flow's $1 check.
+    """
+    pairs = {}
+    pairs_lock = threading.Lock()
+
+    def do_POST(self):
+        request = self.read_json()
+        method, params = request["method"], request.get("params", [])
+        if method == "eth_chainId":
+            result = hex(8453)
+        elif method == "eth_blockNumber":
+            result = hex(self.block_number())
+        elif method == "eth_getBalance":
+            result = hex(10**18)
+        elif method == "eth_call":
+            success, data = self.call(params[0]["to"], bytes.fromhex(params[0]["data"][2:]))
+            if not success:
+                self.reply({"jsonrpc": "2.0", "id": request["id"], "error": {"code": 3, "message": "execution reverted"}})
+                return
+            result = "0x" + data.hex()
+        else:
+            result = None
+        self.reply({"jsonrpc": "2.0", "id": request["id"], "result": result})
+
+    def call(self, target, data):
+        """Returns (success, return data) for a call to `target`."""
+        name = SELECTORS.get(data[:4])
+        target = target.lower()
+        if name == "aggregate3":
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = [self.call(call_target, call_data) for call_target, _, call_data in calls]
+            return True, encode(["(bool,bytes)[]"], [results])
+        if name == "decimals":
+            return True, encode(["uint8"], [6 if target == USDC.lower() else 18])
+        if name == "getPair":
+            token_a, token_b = decode(["address", "address"], data[4:])
+            token0, token1 = sorted([token_a.lower(), token_b.lower()])
+            pair = "0x" + keccak(bytes.fromhex(token0[2:] + token1[2:]))[12:].hex()
+            with self.pairs_lock:
+                self.pairs[pair] = (token0, token1)
+            return True, encode(["address"], [pair])
+        if name in ("token0", "token1") and target in self.pairs:
+            token = self.pairs[target][0 if name == "token0" else 1]
+            return True, encode(["address"], [to_checksum_address(token)])
+        if name == "getReserves" and target in self.pairs:
+            reserves = [self.reserve(token) for token in self.pairs[target]]
+            return True, encode(["uint112", "uint112", "uint32"], reserves + [int(time.time())])
+        if name in ("balanceOf",):
+            return True, encode(["uint256"], [0])
+        if name == "getEthBalance":
+            return True, encode(["uint256"], [10**18])
+        if name == "getBlockNumber":
+            return True, encode(["uint256"], [self.block_number()])
+        return False, b""
+
+    @staticmethod
+    def block_number():
+        # A new block every 2 seconds, like Base
+        return int(time.time()) // 2
+
+    @staticmethod
+    def reserve(token):
+        if token == WETH.lower():
+            return 10 * 10**18
+        if token == USDC.lower():
+            return 30_000 * 10**6
+        return 1_000_000 * 10**18
+
+class BaseScanStandIn(StandInHandler):
+    """
+    Serves verified source, ABIs and creation records for any address. With `rate_limit`
+    set, answers beyond that many calls per second get BaseScan's rate limit error.
+    """
+    rate_limit = 5
+    calls = deque()
+    calls_lock = threading.Lock()
+    rate_limited = 0
+
+    ABIS = {
+        FACTORY.lower(): UNISWAP_V2_FACTORY_ABI,
+        PERMIT2.lower(): PERMIT2_ABI,
+        ROUTER.lower(): UNISWAP_V2_ROUTER2_ABI,
+    }
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        if self.over_rate_limit():
+            type(self).rate_limited += 1
+            self.reply({"status": "0", "message": "NOTOK", "result": "Max calls per sec rate limit reached (5/sec)"})
+            return
+        action = params.get("action")
+        if action == "getsourcecode":
+            result = [{"SourceCode": TOKEN_SOURCE, "ContractName": "StandInToken"}]
+        elif action == "getabi":
+            result = json.dumps(self.ABIS.get(params["address"].lower(), MIN_ERC20_ABI))
+        elif action == "getcontractcreation":
+            result = [
+                {
+                    "contractAddress": address,
+                    "contractCreator": "0x" + keccak(text=address)[12:].hex(),
+                    "txHash": "0x" + keccak(text="tx" + address).hex(),
+                    "blockNumber": "1",
+                    "timestamp": str(int(time.time())),
+                }
+                for address in params["contractaddresses"].split(",")
+            ]
+        else:
+            self.reply({"status": "0", "message": "NOTOK", "result": "Unknown action"})
+            return
+        self.reply({"status": "1", "message": "OK", "result": result})
+
+    def over_rate_limit(self):
+        if not self.rate_limit:
+            return False
+        now = time.time()
+        with self.calls_lock:
+            while self.calls and self.calls[0] < now - 1:
+                self.calls.popleft()
+            if len(self.calls) >= self.rate_limit:
+                return True
+            self.calls.append(now)
+            return False
+
+class OllamaStandIn(StandInHandler):
+    """Answers every /api/chat request with "YES" after `latency` seconds."""
+    def do_POST(self):
+        request = self.read_json()
+        self.reply({
+            "model": request.get("model", "stand-in"),
+            "created_at": "2025-01-01T00:00:00Z",
+            "message": {"role": "assistant", "content": "YES"},
+            "done": True,
+        })
@@ -0,0 +1,59 @@
+"""
+Benchmark: NewToken queue payloads as JSON (what the listeners published before) against
+the compact wire format in event_queue.encode_event / decode_event.
+
+Run from the repository root:
+    python -m benchmarks.wire_format_benchmark [num_events]
+"""
+import json
+import os
+import sys
+import time
+from eth_utils import to_checksum_address
+from src.modules.w3.event.event_queue import encode_event, decode_event
+
+WETH = "0x4200000000000000000000000000000000000006"
+
+def make_payloads(n):
+    """n payloads shaped like EventListener.format_event output."""
+    return [
+        {
+            "blockNumber": 20_000_000 + i // 10,
+            "blockHash": os.urandom(32).hex(),
+            "transactionHash": os.urandom(32).hex(),
+            "token0": WETH,
+            "token1": to_checksum_address("0x" + os.urandom(20).hex()),
+            "pair": to_checksum_address("0x" + os.urandom(20).hex()),
+            "source": "UniswapV2",
+        }
+        for i in range(n)
+    ]
+
+def bench(label, fn, n, repeat=5):
+    best = min(_timed(fn) for _ in range(repeat))
+    print(f"{label:<22} {best * 1000:8.1f} ms   {best / n * 1e6:7.2f} us/event")
+    return best
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    payloads = make_payloads(n)
+    json_messages = [json.dumps(payload).encode() for payload in payloads]
+    wire_messages = [encode_event(payload) for payload in payloads]
+    assert [decode_event(message) for message in wire_messages[:10]] == payloads[:10]
+
+    print(f"{n} NewToken events (best of 5)")
+    bench("json encode", lambda: [json.dumps(payload).encode() for payload in payloads], n)
+    bench("wire encode", lambda: [encode_event(payload) for payload in payloads], n)
+    bench("json decode", lambda: [json.loads(message) for message in json_messages], n)
+    bench("wire decode", lambda: [decode_event(message) for message in wire_messages], n)
+    json_bytes = sum(map(len, json_messages)) / n
+    wire_bytes = sum(map(len, wire_messages)) / n
+    print(f"Bytes per event: json {json_bytes:.0f}, wire {wire_bytes:.0f} ({json_bytes / wire_bytes:.1f}x smaller)")
+
+if __name__ == "__main__":
+    main()
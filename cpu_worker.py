@@ -1,70 +1,271 @@
 import time
 import json
+import threading
+from functools import partial
 import redis
-import psutil
 import multiprocessing
 from src.modules.w3.event.event_flow.honeypot_timer_flow_base_uniswap_v2 import HoneypotTimerFlowBaseUniswapV2
+from src.modules.w3.event.event_flow.pipeline import Pipeline
 from src.modules.w3.chains.scanner.base_scanner import BaseScanner
+from src.modules.w3.chains.scanner.creation_batcher import CreationBatcher
+from src.modules.w3.chains.scanner.async_scanner import AsyncChainScanner
+from src.modules.utils.rate_limiter import RateLimiter
 from src.modules.w3.chains.official_base import OfficialBaseChain
 from src.modules.w3.w3_connector import W3Connector
 from src.modules.w3.exchange.uniswap_v2_base import UniswapV2Base
 from src.modules.w3.wallet.wallet import Wallet
+from src.modules.w3.wallet.balance_monitor import BalanceMonitor
+from src.modules.w3.wallet.nonce_manager import NonceManager
+from src.modules.w3.wallet.allowance_cache import AllowanceCache
+from src.modules.w3.event.event_queue import is_retracted, new_token_queue
+from src.modules.w3.event.sell_scheduler import SellScheduler
+from src.modules.w3.event.position_store import PositionStore, recover_positions
+from src.modules.w3.event.security.bytecode_filter import BytecodeFilter
+from src.modules.w3.event.event_transport import make_transport
+from src.modules.w3.event.admission import ThresholdAdmissionController, WorkerSignals, counters_key, DEFER, SHED
 from dotenv import load_dotenv
 import os
 load_dotenv()
 
 MNEMONIC = os.getenv("MNEMONIC")
+# The fetcher publishes one queue per chain; these workers trade on Base
+QUEUE = os.getenv("NEW_TOKEN_QUEUE", new_token_queue("base"))
+# "list" or "stream"; must match the fetcher's transport for the chain. With "stream" the
+# workers form one consumer group (also across hosts) and events are acked when handled
+TRANSPORT = os.getenv("NEW_TOKEN_TRANSPORT", "list")
+# Number of long-lived worker processes pulling from the queue
+POOL_SIZE = int(os.getenv("CPU_WORKERS", os.cpu_count()))
+# Seconds between kill-switch / worker health checks in the parent
+SUPERVISE_INTERVAL = 10
+# WETH on Base, watched next to ETH by the balance monitor
+WETH_ADDRESS = "0x4200000000000000000000000000000000000006"
+# Seconds a worker backs off after deferring an event
+DEFER_BACKOFF = 1
+# Threads per flow stage in each worker, e.g. "token=8,llm=2,transact=1"; cheap
+# rejection stages get more so they keep draining bursts while the LLM is busy
+PIPELINE_CONCURRENCY = os.getenv(
+    "PIPELINE_CONCURRENCY", "token=8,pair=8,liquidity=8,security=4,llm=2,transact=1"
+)
+
+# Seconds after its block an event may still be bought; checked at admission and again
+# when the event reaches the transact stage
+MAX_EVENT_AGE = float(os.getenv("MAX_EVENT_AGE", 120))
+
+def parse_concurrency(spec):
+    return {name.strip(): int(count) for name, count in (part.split("=") for part in spec.split(",") if part)}
+
+def pipeline_key(worker_id):
+    """Redis key a worker publishes its per-stage pipeline metrics to."""
+    return f"Pipeline:{QUEUE}:{worker_id}"
+
+# BaseScan requests per second shared by all processes (the free plan allows 5)
+BASESCAN_RATE = float(os.getenv("BASESCAN_RATE", 5))
 
 r = redis.Redis(host='localhost', port=6379, db=2)
 
-def process_event(event_data, mnemonic):
-    # Reinitialize dependencies in the child process
+def worker_loop(worker_id, mnemonic, stop, processed, discarded, balance):
+    """
+    Long-lived worker: builds its dependencies once (UniswapV2Base alone costs three
+    BaseScan ABI requests) and then handles events from the queue until `stop` is set.
+    Wallet balances are read from the parent's balance monitor through `balance`.
+    """
     chain = OfficialBaseChain()
     w3 = W3Connector(chain)
-    scanner = BaseScanner()
+    # Every process takes its BaseScan requests from one shared 5/s budget
+    scanner = BaseScanner(rate_limiter=RateLimiter(r, rate=BASESCAN_RATE))
     exchange = UniswapV2Base(w3, scanner)
     wallet = Wallet(mnemonic=mnemonic)
-    strategy = HoneypotTimerFlowBaseUniswapV2(w3, scanner, exchange, wallet)
-    strategy.handle_event(event_data)
+    # Nonces come from the counter shared by the pool instead of the node
+    wallet.nonces = NonceManager(r, w3, wallet.address)
+    # Allowances are shared too: a token approved early by one worker can be sold by another
+    wallet.allowances = AllowanceCache(r, wallet.address)
+    # Sells go to a schedule shared by the pool, so a worker is never parked on a wait
+    strategy = HoneypotTimerFlowBaseUniswapV2(
+        w3, scanner, exchange, wallet, sell_scheduler=SellScheduler(r), balance=balance,
+        positions=PositionStore(r), bytecode_filter=BytecodeFilter(r),
+        # The token stage runs on several threads; their creation lookups share requests,
+        # and lookups already in flight in this or another worker are joined
+        async_scanner=AsyncChainScanner(scanner, creations=CreationBatcher(scanner), r=r).start(),
+        max_event_age=MAX_EVENT_AGE
+    )
+    # The flow's stages run on their own threads, connected by queues of one event per thread
+    concurrency = parse_concurrency(PIPELINE_CONCURRENCY)
+    pipeline = Pipeline.from_flow(strategy, concurrency).start()
+    transport = make_transport(TRANSPORT, r, QUEUE)
+    # Admit, defer or shed each event from queue depth, event age, open positions,
+    # events in the pipeline, recent latency and ETH budget; decisions are counted in
+    # Admission:<queue>. Past one event per stage thread, new events are left in Redis
+    controller = ThresholdAdmissionController(
+        r, QUEUE, max_event_age=MAX_EVENT_AGE, max_pipeline_in_flight=sum(concurrency.values())
+    )
+    signals = WorkerSignals(r, QUEUE, w3, wallet, strategy, balance=balance, timer=pipeline, transport=transport)
+    # Due sells run on their own thread, so they never wait for intake or the pipeline
+    sells = threading.Thread(target=sell_loop, args=(worker_id, strategy, stop), name="sells", daemon=True)
+    sells.start()
+    if TRANSPORT == "stream":
+        # However long an event waits in the pipeline, its entry isn't claimed by another worker
+        threading.Thread(target=refresh_loop, args=(worker_id, transport, stop), name="refresh", daemon=True).start()
+    print(f"[worker {worker_id}] Ready (PID {os.getpid()})")
+
+    published_at = 0
+    while not stop.is_set():
+        if time.time() - published_at > SUPERVISE_INTERVAL:
+            r.set(pipeline_key(worker_id), json.dumps(pipeline.metrics()), ex=SUPERVISE_INTERVAL * 6)
+            published_at = time.time()
+            if scanner.cache is not None:
+                print(f"[worker {worker_id}] Scanner cache: {scanner.cache.stats()}")
+            print(f"[worker {worker_id}] BaseScan rate limiter wait: {scanner.rate_limiter.stats()}")
+        # Time out now and then so the stop flag is noticed
+        try:
+            received = transport.receive(timeout=1)
+        except Exception as e:
+            print(f"[worker {worker_id}] Error receiving an event: {e}")
+            stop.wait(1)
+            continue
+        if received is None:
+            continue
+        handle, event_data = received
+        token1 = event_data["token1"]
+        token0 = event_data["token0"]
+
+        # Skip events whose block was orphaned by a reorg after it was queued
+        if is_retracted(r, event_data, QUEUE):
+            print(f"[worker {worker_id}] New event: {token1} - {token0}.\nBlock was reorged out, discarding...")
+            with discarded.get_lock():
+                discarded.value += 1
+            transport.ack(handle)
+            continue
+
+        event_signals = signals.collect(event_data)
+        decision, reason = controller.check(event_signals)
+        if decision == SHED:
+            print(f"[worker {worker_id}] New event: {token1} - {token0}.\nShed ({reason}), discarding...")
+            with discarded.get_lock():
+                discarded.value += 1
+            transport.ack(handle)
+            continue
+        if decision == DEFER:
+            # Back behind the newer events; stale ones get shed on event age eventually
+            print(f"[worker {worker_id}] New event: {token1} - {token0}.\nDeferred ({reason})")
+            transport.requeue(handle)
+            time.sleep(DEFER_BACKOFF)
+            continue
+
+        with processed.get_lock():
+            processed.value += 1
+        print(f"[worker {worker_id}] New event: {token1} - {token0}.")
+        # For the age check at the transact stage
+        if event_signals["event_age"] is not None:
+            event_data["event_time"] = time.time() - event_signals["event_age"]
+        # Blocks while the first stage is full, leaving the rest in Redis. The event is
+        # acked once it leaves the pipeline
+        pipeline.submit(event_data, done=partial(transport.ack, handle))
+
+    pipeline.stop()
+    sells.join()
+
+def sell_loop(worker_id, strategy, stop):
+    """Handle scheduled sells as they come due until `stop` is set."""
+    while not stop.is_set():
+        try:
+            sold = strategy.handle_due_sells()
+        except Exception as e:
+            print(f"[worker {worker_id}] Error handling scheduled sells: {e}")
+            sold = 0
+        if sold:
+            print(f"[worker {worker_id}] Handled {sold} scheduled sells")
+        else:
+            stop.wait(1)
+
+def refresh_loop(worker_id, transport, stop):
+    """Refresh the stream entries the worker holds three times per claim interval."""
+    while not stop.wait(transport.claim_idle / 3):
+        try:
+            transport.refresh()
+        except Exception as e:
+            print(f"[worker {worker_id}] Error refreshing held events: {e}")
+
+def start_worker(worker_id, stop, processed, discarded, balance):
+    p = multiprocessing.Process(
+        target=worker_loop, args=(worker_id, MNEMONIC, stop, processed, discarded, balance), daemon=True
+    )
+    p.start()
+    return p
+
+def print_pipeline_metrics(workers):
+    """Per-stage totals over the pool: throughput, queued items and median latency."""
+    totals = {}
+    for worker_id in workers:
+        metrics = r.get(pipeline_key(worker_id))
+        if metrics is None:
+            continue
+        for stage, stage_metrics in json.loads(metrics).items():
+            total = totals.setdefault(stage, {"per_minute": 0, "queued": 0, "passed": 0, "rejected": 0, "p50": []})
+            for field in ("per_minute", "queued", "passed", "rejected"):
+                total[field] += stage_metrics[field]
+            total["p50"].append(stage_metrics["latency"]["p50"])
+    for stage, total in totals.items():
+        print(
+            f"  {stage:<10} {total['per_minute']:7.1f}/min  queued {total['queued']:<4} "
+            f"passed {total['passed']:<6} rejected {total['rejected']:<6} p50 {max(total['p50']) * 1000:.0f}ms"
+        )
+
+def main(w3, wallet):
+    stop = multiprocessing.Event()
+    processed = multiprocessing.Value("i", 0)
+    discarded = multiprocessing.Value("i", 0)
+    # One balance monitor for the whole pool; the workers and the kill switch below
+    # read it from shared memory
+    monitor = BalanceMonitor(w3, wallet.address, WETH_ADDRESS).start()
+    # Before any worker starts: resume the positions a previous run left open
+    recovered = recover_positions(PositionStore(r), SellScheduler(r), w3, wallet.address)
+    print(f"Recovered positions: {recovered}")
+    # Nothing is in flight yet, so start the shared nonce counter from the chain
+    nonces = NonceManager(r, w3, wallet.address)
+    print(f"Next nonce: {nonces.resync()}")
+    limiter = RateLimiter(r, rate=BASESCAN_RATE)
+    transport = make_transport(TRANSPORT, r, QUEUE, consumer="supervisor")
+    workers = {i: start_worker(i, stop, processed, discarded, monitor.view) for i in range(POOL_SIZE)}
+    print(f"Started {POOL_SIZE} workers on {QUEUE}")
 
-def main(w3, scanner, exchange, wallet):
-    processed = 0
-    discarded = 0
     while True:
-        print(f"Processed: {processed}, Discarded: {discarded}")
+        print(f"Processed: {processed.value}, Discarded: {discarded.value}")
+        admission = {name.decode(): int(count) for name, count in r.hgetall(counters_key(QUEUE)).items()}
+        print(f"Admission decisions: {admission}")
+        print_pipeline_metrics(workers)
+        print(f"BaseScan rate limiter: {limiter.totals()}")
+        # Age-based trim of the stream (its length is capped by the listeners)
+        transport.trim()
+        pending, counter, resynced = nonces.check()
+        if resynced:
+            print(f"Nonce gap (pending {pending}, counter {counter}), resynced")
 
-        eth_balance = w3.get_eth_balance(wallet.address)
+        eth_balance = monitor.view.eth
         if eth_balance < 0.0001:
             print("Low ETH balance, exiting...")
             break
+        print(f"Eth balance: {eth_balance} (WETH {monitor.view.weth}, block {monitor.view.block})")
 
-        if (processed + discarded) % 10 == 0:
-            print("Eth balance: ", eth_balance)
+        # Replace workers that died so the pool stays at full size
+        for worker_id, p in workers.items():
+            if not p.is_alive():
+                print(f"Worker {worker_id} (PID {p.pid}) exited with code {p.exitcode}, restarting...")
+                workers[worker_id] = start_worker(worker_id, stop, processed, discarded, monitor.view)
 
-        _, event_json = r.brpop("NewToken")
-        event_data = json.loads(event_json)
-        token1 = event_data["token1"]
-        token0 = event_data["token0"]
+        time.sleep(SUPERVISE_INTERVAL)
 
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        if cpu_percent < 80:
-            processed += 1
-            # Pass the MNEMONIC and event_data to the child process
-            p = multiprocessing.Process(target=process_event, args=(event_data, MNEMONIC))
-            p.start()
-            new_cpu_percent = psutil.cpu_percent(interval=0.1)
-            percent_diff = new_cpu_percent - cpu_percent
-            print(f"New event: {token1} - {token0}.\nSpawned new process with PID {p.pid}. CPU usage increased by {percent_diff}%")
-        else:
-            print(f"New event: {token1} - {token0}.\nCPU usage too high, discarding...")
-            discarded += 1
+    stop.set()
+    for p in workers.values():
+        p.join(timeout=30)
+    monitor.stop()
 
 if __name__ == "__main__":
     chain = OfficialBaseChain()
     w3 = W3Connector(chain)
-    scanner = BaseScanner()
-    exchange = UniswapV2Base(w3, scanner)
     wallet = Wallet(mnemonic=MNEMONIC)
 
-    r.delete("NewToken")
-    main(w3, scanner, exchange, wallet)
\ No newline at end of file
+    r.delete(counters_key(QUEUE))
+    # Clear the queue (optional); a stream keeps its backlog for the consumer group
+    if TRANSPORT == "list":
+        r.delete(QUEUE)
+    main(w3, wallet)
@@ -1,6 +1,7 @@
 import time
 import json
 import psutil
+import redis
 import pandas as pd
 import os
 from dotenv import load_dotenv
@@ -25,6 +26,7 @@ from src.modules.w3.wallet.wallet import Wallet
 from src.modules.w3.exchange.token.token import Token
 from src.modules.w3.exchange.pair.pair import Pair
 from src.modules.w3.chains.scanner.base_scanner import BaseScanner
+from src.modules.utils.rate_limiter import RateLimiter, BACKGROUND
 from src.modules.w3.exchange.uniswap_v2_base import UniswapV2Base
 
 load_dotenv()
@@ -60,7 +62,10 @@ class HoneypotDashboard:
         self.chain = OfficialBaseChain()     # Adapt based on your actual chain class
         self.w3 = W3Connector(self.chain)
         self.wallet = Wallet(mnemonic=os.getenv("MNEMONIC"))
-        self.scanner = BaseScanner()
+        # Shares the workers' BaseScan budget, behind their trade-path requests
+        self.scanner = BaseScanner(
+            rate_limiter=RateLimiter(redis.Redis(host='localhost', port=6379, db=2)), lane=BACKGROUND
+        )
         self.exchange = UniswapV2Base(self.w3, self.scanner)
 
         # Initialize tokens/pairs for the reference price
@@ -1,40 +1,104 @@
+import os
+import sys
+import json
 import asyncio
 import nest_asyncio
-import redis
-from web3 import Web3
+import redis.asyncio as redis
+from concurrent.futures import ThreadPoolExecutor
 from src.modules.w3.event.event_listener.uniswap_v2_listener import UniswapV2Listener
+from src.modules.w3.event.event_listener.uniswap_v3_listener import UniswapV3Listener
+from src.modules.w3.event.event_queue import new_token_queue
+from src.modules.w3.event.event_recorder import EventRecorder
 from src.modules.w3.w3_connector import W3Connector
+from src.modules.w3.chains.base import BaseChain
+from src.modules.w3.chains.bnb import BNBChain
 from src.modules.w3.chains.official_base import OfficialBaseChain
-from src.modules.w3.exchange.uniswap_v2_base import UniswapV2Base
-from src.modules.w3.chains.scanner.base_scanner import BaseScanner
+from src.modules.w3.chains.official_bnb import OfficialBNBChain
+from src.modules.utils.ABI import UNISWAP_V2_FACTORY_ABI, UNISWAP_V3_FACTORY_ABI
+from dotenv import load_dotenv
 
-async def main():
-    # Create a Redis client (synchronous or asynchronous version as you prefer)
+load_dotenv()
+
+# Chains and factories to watch, see fetcher_config.json
+CONFIG_PATH = os.getenv("FETCHER_CONFIG", "fetcher_config.json")
+# Optional JSON-lines file that gets a copy of every published event, for replays
+RECORD_EVENTS = os.getenv("RECORD_EVENTS")
+
+CHAINS = {
+    "OfficialBaseChain": OfficialBaseChain,
+    "OfficialBNBChain": OfficialBNBChain,
+    "BaseChain": BaseChain,
+    "BNBChain": BNBChain,
+}
+
+# Listener type -> (listener class, factory ABI)
+LISTENERS = {
+    "UniswapV2": (UniswapV2Listener, UNISWAP_V2_FACTORY_ABI),
+    "UniswapV3": (UniswapV3Listener, UNISWAP_V3_FACTORY_ABI),
+}
+
+def load_config(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def build_chain(chain_config):
+    """
+    Instantiate the chain class named in the config. `url` is only needed for the
+    non-official chains; the websocket URL comes from `ws_url` or the `ws_url_env` variable.
+    """
+    chain_class = CHAINS[chain_config["class"]]
+    ws_url = chain_config.get("ws_url")
+    if ws_url is None and "ws_url_env" in chain_config:
+        ws_url = os.getenv(chain_config["ws_url_env"])
+    if "url" in chain_config:
+        return chain_class(chain_config["url"], ws_url=ws_url)
+    return chain_class(ws_url=ws_url)
+
+def build_listeners(config, r, recorder=None):
+    """
+    One listener per enabled chain/factory pair. Each chain gets its own W3Connector and
+    RPC executor, and its listeners publish to the chain's own queue (e.g. NewToken:base).
+    """
+    listeners = []
+    for chain_config in config["chains"]:
+        if not chain_config.get("enabled", True):
+            continue
+        name = chain_config["name"]
+        w3 = W3Connector(build_chain(chain_config))
+        rpc_executor = ThreadPoolExecutor(
+            max_workers=chain_config.get("rpc_workers", 8),
+            thread_name_prefix=f"{name}-rpc"
+        )
+        queue = chain_config.get("queue", new_token_queue(name))
+        # "list" (default) or "stream" for consumer-group workers, see event_transport.py
+        transport = chain_config.get("transport", "list")
+
+        for listener_config in chain_config["listeners"]:
+            options = dict(listener_config)
+            if not options.pop("enabled", True):
+                continue
+            listener_class, factory_abi = LISTENERS[options.pop("type")]
+            factory = w3.get_contract_instance(w3.to_checksum_address(options.pop("factory")), factory_abi)
+            listeners.append(listener_class(
+                w3, r, factory, queue=queue, transport=transport, rpc_executor=rpc_executor,
+                recorder=recorder, chain_name=name, **options
+            ))
+            print(f"[{name}] {listener_class.__name__} on {factory.address} -> {queue} ({transport})")
+    return listeners
+
+async def main(config_path):
+    # Async Redis client so publishing never blocks the other listeners
     r = redis.Redis(host='localhost', port=6379, db=2)
 
-    # Instantiate the Web3 connector
-    chain = OfficialBaseChain()
-    w3 = W3Connector(chain)
-    scanner = BaseScanner()
-    exchange = UniswapV2Base(w3, scanner)
-    uniswap_v2_contract = exchange.factory_contract
-
-    # Instantiate the listeners
-    v2_listener = UniswapV2Listener(
-        w3=w3,
-        redis_client=r,
-        v2_contract=uniswap_v2_contract,
-        poll_interval=2
-    )
-
-    # Run both log loops concurrently
-    await asyncio.gather(
-        v2_listener.log_loop()
-    )
+    recorder = EventRecorder(RECORD_EVENTS) if RECORD_EVENTS else None
+    listeners = build_listeners(load_config(config_path), r, recorder)
+
+    # Run all listeners concurrently (websocket subscription with polling fallback)
+    await asyncio.gather(*(listener.run() for listener in listeners))
 
 if __name__ == "__main__":
     nest_asyncio.apply()
     try:
-        asyncio.run(main())
+        asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else CONFIG_PATH))
     except KeyboardInterrupt:
         print("Stopped listening for events.")
@@ -1,40 +1,77 @@
 import time
-import json
 import redis
 import psutil
 from src.modules.w3.event.event_flow.honeypot_timer_flow_base_uniswap_v2 import HoneypotTimerFlowBaseUniswapV2
 from src.modules.w3.chains.scanner.base_scanner import BaseScanner
+from src.modules.utils.rate_limiter import RateLimiter
 from src.modules.w3.chains.official_base import OfficialBaseChain
 from src.modules.w3.w3_connector import W3Connector
 from src.modules.w3.exchange.uniswap_v2_base import UniswapV2Base
 from src.modules.w3.wallet.wallet import Wallet
+from src.modules.w3.event.event_queue import is_retracted, new_token_queue
+from src.modules.w3.event.sell_scheduler import SellScheduler
+from src.modules.w3.event.position_store import PositionStore, recover_positions
+from src.modules.w3.event.security.bytecode_filter import BytecodeFilter
+from src.modules.w3.wallet.nonce_manager import NonceManager
+from src.modules.w3.wallet.allowance_cache import AllowanceCache
+from src.modules.w3.event.event_transport import make_transport
 from dotenv import load_dotenv
 import os
 load_dotenv()
 
 MNEMONIC = os.getenv("MNEMONIC")
+# The fetcher publishes one queue per chain; these workers trade on Base
+QUEUE = os.getenv("NEW_TOKEN_QUEUE", new_token_queue("base"))
+# "list" or "stream"; must match the fetcher's transport for the chain
+TRANSPORT = os.getenv("NEW_TOKEN_TRANSPORT", "list")
+
+# BaseScan requests per second shared by all processes (the free plan allows 5)
+BASESCAN_RATE = float(os.getenv("BASESCAN_RATE", 5))
 
 r = redis.Redis(host='localhost', port=6379, db=2)
 
 def main(w3, scanner, exchange, wallet):
-    strategy = HoneypotTimerFlowBaseUniswapV2(w3, scanner, exchange, wallet)
+    wallet.nonces = NonceManager(r, w3, wallet.address)
+    wallet.nonces.resync()
+    wallet.allowances = AllowanceCache(r, wallet.address)
+    # Sells are scheduled in Redis instead of blocking this process through the wait
+    scheduler = SellScheduler(r)
+    positions = PositionStore(r)
+    strategy = HoneypotTimerFlowBaseUniswapV2(
+        w3, scanner, exchange, wallet, sell_scheduler=scheduler, positions=positions,
+        bytecode_filter=BytecodeFilter(r)
+    )
+    # Resume the positions a previous run left open (bought but never sold)
+    print(f"Recovered positions: {recover_positions(positions, scheduler, w3, wallet.address)}")
+    transport = make_transport(TRANSPORT, r, QUEUE)
     while True:
-        # Block until there is a new event in the queue
-        _, event_json = r.brpop("NewToken")
-        event_data = json.loads(event_json)
+        strategy.handle_due_sells()
+        # Wait for a new event, waking up every second to run due sells
+        received = transport.receive(timeout=1)
+        if received is None:
+            continue
+        handle, event_data = received
+        # Skip events whose block was orphaned by a reorg after it was queued
+        if is_retracted(r, event_data, QUEUE):
+            transport.ack(handle)
+            continue
         token1 = event_data["token1"]
         token0 = event_data["token0"]
 
         strategy.handle_event(event_data)
+        # Only now, so a crash mid-event leaves it pending for another consumer
+        transport.ack(handle)
 
 if __name__ == "__main__":
-    # Clear the queue (optional)
-    r.delete("NewToken")
+    # Clear the queue (optional); a stream keeps its backlog for the consumer group
+    if TRANSPORT == "list":
+        r.delete(QUEUE)
     
     # Initialize chain and scanner
     chain = OfficialBaseChain()
     w3 = W3Connector(chain)
-    scanner = BaseScanner()
+    # Every process takes its BaseScan requests from one shared 5/s budget
+    scanner = BaseScanner(rate_limiter=RateLimiter(r, rate=BASESCAN_RATE))
     exchange = UniswapV2Base(w3, scanner)
     wallet = Wallet(mnemonic=MNEMONIC)
     
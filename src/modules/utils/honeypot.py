@@ -1,7 +1,7 @@
-import requests
+from .http_session import request
 
 def check_honeypot(address):
     url = f"https://api.honeypot.is/v2/IsHoneypot?address={address}"
-    response = requests.get(url, timeout=10)
+    response = request("GET", url, timeout=10)
     response.raise_for_status()
     return response.json()
\ No newline at end of file
@@ -0,0 +1,47 @@
+import os
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connection pools kept per host, and connections kept alive per pool. Threads of a
+# pipeline stage share one pool, so HTTP_POOL_MAXSIZE should cover the widest stage
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 4))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 16))
+# Default (connect, read) timeout in seconds for requests that don't pass one
+HTTP_TIMEOUT = (float(os.getenv("HTTP_CONNECT_TIMEOUT", 5)), float(os.getenv("HTTP_READ_TIMEOUT", 10)))
+
+_sessions = {}
+_lock = threading.Lock()
+_pid = None
+
+def host_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def get_session(url) -> requests.Session:
+    """
+    Keep-alive session for the host of `url`, shared by every caller in this process,
+    so repeated calls to BaseScan, the gas API etc. reuse open TCP/TLS connections.
+    Sessions are not carried over a fork: a child process starts its own.
+    """
+    global _pid
+    host = host_of(url)
+    with _lock:
+        if _pid != os.getpid():
+            _sessions.clear()
+            _pid = os.getpid()
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            # Retries are left to the callers (see retry_request)
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+        return session
+
+def request(method, url, **kwargs) -> requests.Response:
+    """Drop-in for `requests.request` over the pooled session of the host."""
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    return get_session(url).request(method, url, **kwargs)
@@ -0,0 +1,57 @@
+import time
+from collections import defaultdict, deque
+
+def summarize(values):
+    """
+    count/mean/p50/p95/max of a list of numbers (e.g. latencies in seconds).
+    """
+    if not values:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[int(0.50 * (len(ordered) - 1))],
+        "p95": ordered[int(0.95 * (len(ordered) - 1))],
+        "max": ordered[-1],
+    }
+
+class StageTimer:
+    """
+    Records how long each stage of a flow takes, lap by lap:
+
+        timer.start()
+        ...token identification...
+        timer.lap("token")
+        ...pair creation...
+        timer.lap("pair")
+
+    `last` holds the stages reached by the most recent run (an early return simply
+    leaves the later stages out); `samples` keeps a bounded history per stage.
+    """
+    def __init__(self, max_samples=1000):
+        self.samples = defaultdict(lambda: deque(maxlen=max_samples))
+        self.last = {}
+        self.started_at = None
+        self._lap_start = None
+
+    def start(self):
+        self.last = {}
+        self.started_at = time.time()
+        self._lap_start = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        elapsed = now - self._lap_start
+        self._lap_start = now
+        self.last[stage] = elapsed
+        self.samples[stage].append(elapsed)
+        return elapsed
+
+    def recent(self, stage, n=20):
+        """Median of the last `n` samples of a stage, None before the first one."""
+        samples = list(self.samples[stage])[-n:] if stage in self.samples else []
+        return summarize(samples)["p50"] if samples else None
+
+    def summary(self):
+        return {stage: summarize(list(samples)) for stage, samples in self.samples.items()}
@@ -0,0 +1,136 @@
+import time
+import uuid
+from collections import defaultdict
+from .metrics import summarize
+
+TRADE = "trade"             # requests on the path to a trade decision
+BACKGROUND = "background"   # enrichment, dashboards, anything that can wait
+
+# Token bucket on a hash {tokens, at}, refilled at ARGV[1] tokens/s up to ARGV[2], on
+# Redis' clock so every process (and host) agrees. The background lane leaves ARGV[3]
+# tokens to the trade lane and yields while a trade-lane caller is waiting (KEYS[2]).
+# Returns -1 when a token was taken, otherwise the milliseconds to wait before retrying
+# (at least 1: Redis truncates a Lua number to an integer, so a sub-millisecond wait
+# would otherwise come back as 0).
+# KEYS[1]: bucket, KEYS[2]: trade-lane waiters (sorted set scored by expiry)
+# ARGV[1]: rate, ARGV[2]: burst, ARGV[3]: reserve, ARGV[4]: 1 for the trade lane
+ACQUIRE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1e6
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(state[1]) or burst
+local at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - at) * rate)
+local needed = 1
+if ARGV[4] ~= '1' then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+    if redis.call('ZCARD', KEYS[2]) > 0 then
+        needed = math.huge
+    else
+        needed = 1 + tonumber(ARGV[3])
+    end
+end
+local wait = -1
+if tokens >= needed then
+    tokens = tokens - 1
+elseif needed == math.huge then
+    wait = math.max(1, math.ceil(1000 / rate))
+else
+    wait = math.max(1, math.ceil((needed - tokens) / rate * 1000))
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'at', now)
+redis.call('EXPIRE', KEYS[1], 60)
+return wait
+"""
+
+# Empties the bucket, e.g. when the API says we are over its limit anyway
+DRAIN_SCRIPT = """
+local t = redis.call('TIME')
+redis.call('HSET', KEYS[1], 'tokens', 0, 'at', tonumber(t[1]) + tonumber(t[2]) / 1e6)
+redis.call('EXPIRE', KEYS[1], 60)
+"""
+
+class RateLimiter:
+    """
+    Token bucket shared through Redis by every process calling one API, so together
+    they stay under its limit instead of finding out from rate-limit errors.
+    Callers take a token per request with `acquire(lane)`; the trade lane may use the
+    `reserve` tokens and has precedence over the background lane while it waits.
+    Time spent waiting is kept per lane (`stats()`) and added up in `RateLimit:<name>:stats`.
+    """
+    def __init__(self, r, name="basescan", rate=5, burst=1, reserve=0):
+        """
+        :param r: synchronous Redis client
+        :param name: limiter name, one per API key (RateLimit:<name>)
+        :param rate: requests per second
+        :param burst: bucket size; 1 spaces requests evenly, more lets idle time be
+            spent in a burst (which a per-second limit like BaseScan's may reject)
+        :param reserve: tokens the background lane leaves to the trade lane (< burst)
+        """
+        self.r = r
+        self.key = f"RateLimit:{name}"
+        self.waiting_key = f"{self.key}:waiting"
+        self.stats_key = f"{self.key}:stats"
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.acquire_script = r.register_script(ACQUIRE_SCRIPT)
+        self.drain_script = r.register_script(DRAIN_SCRIPT)
+        self.waits = defaultdict(list)
+
+    def acquire(self, lane=TRADE, timeout=60):
+        """
+        Block until a token is taken. Returns the seconds waited; raises TimeoutError
+        after `timeout` seconds.
+        """
+        start = time.perf_counter()
+        waiter = None
+        try:
+            while True:
+                wait_ms = self.acquire_script(
+                    keys=[self.key, self.waiting_key],
+                    args=[self.rate, self.burst, self.reserve, 1 if lane == TRADE else 0]
+                )
+                if wait_ms < 0:
+                    break
+                waited = time.perf_counter() - start
+                if waited + wait_ms / 1000 > timeout:
+                    raise TimeoutError(f"No {self.key} token after {waited:.1f}s")
+                if lane == TRADE:
+                    # Registered with an expiry, so a caller that died doesn't block the background lane
+                    waiter = waiter or uuid.uuid4().hex
+                    self.r.zadd(self.waiting_key, {waiter: time.time() + wait_ms / 1000 + 1})
+                time.sleep(wait_ms / 1000)
+        finally:
+            if waiter is not None:
+                self.r.zrem(self.waiting_key, waiter)
+        waited = time.perf_counter() - start
+        self.record(lane, waited)
+        return waited
+
+    def drain(self):
+        """Take every token, so all callers back off for a refill."""
+        self.drain_script(keys=[self.key])
+
+    def record(self, lane, waited):
+        samples = self.waits[lane]
+        samples.append(waited)
+        del samples[:-1000]
+        pipe = self.r.pipeline(transaction=False)
+        pipe.hincrby(self.stats_key, f"{lane}:acquired", 1)
+        pipe.hincrbyfloat(self.stats_key, f"{lane}:wait_seconds", waited)
+        pipe.execute()
+
+    def stats(self):
+        """Wait time summary per lane in this process (last 1000 acquisitions)."""
+        return {lane: summarize(samples) for lane, samples in self.waits.items()}
+
+    def totals(self):
+        """{lane: {"acquired", "wait_seconds"}} over every process using the limiter."""
+        totals = {}
+        for field, value in self.r.hgetall(self.stats_key).items():
+            lane, name = field.decode().split(":")
+            totals.setdefault(lane, {})[name] = float(value)
+        return totals
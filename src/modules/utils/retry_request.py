@@ -1,4 +1,5 @@
 import requests
+from . import http_session
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -18,7 +19,7 @@ def retryable_request_fixed(
     Make a request with a FIXED wait time between attempts.
       - attempts: total number of attempts before giving up
       - wait_seconds: the wait duration in seconds between tries
-      - **kwargs: additional arguments passed to requests.request()
+      - **kwargs: additional arguments passed to the pooled session's request()
     """
     @retry(
         stop=stop_after_attempt(attempts),
@@ -27,7 +28,7 @@ def retryable_request_fixed(
         retry=retry_if_exception_type(requests.exceptions.RequestException),
     )
     def _do_request():
-        response = requests.request(method, url, **kwargs)
+        response = http_session.request(method, url, **kwargs)
         response.raise_for_status()        
         return response
 
@@ -38,13 +39,19 @@ def retryable_request_fixed_basescan(
     url,
     attempts=3,
     wait_seconds=2,
+    rate_limiter=None,
+    lane="trade",
     **kwargs
 ):
     """
     Make a request with a FIXED wait time between attempts.
       - attempts: total number of attempts before giving up
       - wait_seconds: the wait duration in seconds between tries
-      - **kwargs: additional arguments passed to requests.request()
+      - rate_limiter: optional RateLimiter to take a token from before each request;
+        a rate-limit answer then drains it and the request queues for a token again
+        (up to `attempts` times) instead of sleeping `wait_seconds`
+      - lane: RateLimiter lane ("trade" or "background")
+      - **kwargs: additional arguments passed to the pooled session's request()
     """
     @retry(
         stop=stop_after_attempt(attempts),
@@ -53,13 +60,22 @@ def retryable_request_fixed_basescan(
         retry=retry_if_exception_type((requests.exceptions.RequestException, ValueError)),
     )
     def _do_request():
-        response = requests.request(method, url, **kwargs)
-        response.raise_for_status()
-        data = response.json()
-        if data["result"] == "Max calls per sec rate limit reached (5/sec)":
-            # rate limit error
-            raise ValueError("Rate limit error")
-        elif data["status"] == '0':
+        limited = 0
+        while True:
+            if rate_limiter is not None:
+                rate_limiter.acquire(lane)
+            response = http_session.request(method, url, **kwargs)
+            response.raise_for_status()
+            data = response.json()
+            if data["result"] != "Max calls per sec rate limit reached (5/sec)":
+                break
+            if rate_limiter is None or limited >= attempts:
+                # rate limit error
+                raise ValueError("Rate limit error")
+            # Another client is using the key as well: back every process off for a refill
+            rate_limiter.drain()
+            limited += 1
+        if data["status"] == '0':
             # request failed
             raise ValueError("Request failed")
         return response
@@ -81,7 +97,7 @@ def retryable_request_exponential(
       - multiplier: base multiplier for exponential backoff
       - min_wait: minimum wait time in seconds
       - max_wait: maximum wait time in seconds
-      - **kwargs: additional arguments passed to requests.request()
+      - **kwargs: additional arguments passed to the pooled session's request()
     """
     @retry(
         stop=stop_after_attempt(attempts),
@@ -91,7 +107,7 @@ def retryable_request_exponential(
         retry=retry_if_exception_type(requests.exceptions.RequestException),
     )
     def _do_request():
-        response = requests.request(method, url, **kwargs)
+        response = http_session.request(method, url, **kwargs)
         response.raise_for_status()
         return response
 
@@ -1,5 +1,5 @@
 from .chain import Chain
 
 class BaseChain(Chain):
-    def __init__(self, url):
-        super().__init__('Base', 8453, url)
\ No newline at end of file
+    def __init__(self, url, ws_url=None):
+        super().__init__('Base', 8453, url, ws_url)
\ No newline at end of file
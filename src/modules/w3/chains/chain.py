@@ -1,6 +1,8 @@
 class Chain:
-    def __init__(self, name, chain_id, url):
+    def __init__(self, name, chain_id, url, ws_url=None):
         self.name = name
         self.chain_id = chain_id
         self.url = url
+        # Optional websocket endpoint used for push-based log subscriptions
+        self.ws_url = ws_url
         
\ No newline at end of file
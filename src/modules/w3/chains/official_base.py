@@ -1,5 +1,5 @@
 from .base import BaseChain
 
 class OfficialBaseChain(BaseChain):
-    def __init__(self):
-        super().__init__('https://mainnet.base.org')
\ No newline at end of file
+    def __init__(self, ws_url=None):
+        super().__init__('https://mainnet.base.org', ws_url)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from .bnb import BNBChain
 
 class OfficialBNBChain(BNBChain):
-    def __init__(self):
-        super().__init__('https://bsc-dataseed.bnbchain.org/')
\ No newline at end of file
+    def __init__(self, ws_url=None):
+        super().__init__('https://bsc-dataseed.bnbchain.org/', ws_url)
\ No newline at end of file
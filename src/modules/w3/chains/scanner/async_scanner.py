@@ -0,0 +1,133 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from .chain_scanner import ChainScanner
+
+class AsyncChainScanner:
+    """
+    asyncio client over a ChainScanner. Identical lookups made at the same time are
+    collapsed into one request every caller awaits (single flight), and independent
+    lookups, e.g. a token's source and its creation record, run concurrently.
+    Requests still go through the scanner, so its cache, RateLimiter and pooled HTTP
+    session apply; they run on `max_workers` threads, which bounds the concurrency.
+    With a Redis client and a scanner cache, the flight is shared across processes:
+    a process finding a lookup in flight elsewhere waits for it to land in the cache.
+    Sync code (pipeline threads) calls in through `call()` once `start()` has run.
+    """
+    def __init__(self, scanner: ChainScanner, creations=None, r=None, max_workers=8, flight_ttl=30,
+                 poll_interval=0.05):
+        """
+        :param scanner: ChainScanner the requests go through
+        :param creations: source of contract-creation records (the scanner, or a CreationBatcher)
+        :param r: synchronous Redis client for the cross-process flight (optional)
+        :param max_workers: threads running requests, i.e. lookups in flight at once
+        :param flight_ttl: seconds another process waits on a lookup in flight before making it itself
+        :param poll_interval: seconds between checks on a lookup in flight in another process
+        """
+        self.scanner = scanner
+        self.creations = creations if creations is not None else scanner
+        self.r = r if scanner.cache is not None else None
+        self.flight_ttl = flight_ttl
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scanner")
+        # (kind, lowercased address) -> task fetching it
+        self.inflight = {}
+        self.coalesced = 0
+        self.loop = None
+
+    def start(self):
+        """Run an event loop on a background thread for `call()`."""
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="async-scanner", daemon=True).start()
+        return self
+
+    def call(self, coroutine, timeout=None):
+        """Run `coroutine` on the background loop and wait for its result (from any thread)."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    async def blocking(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args))
+
+    async def get_contract_source_code_and_name(self, contract_address: str):
+        fetch = lambda addresses: {address: self.scanner.get_contract_source_code_and_name(address) for address in addresses}
+        return (await self.single_flight("source", [contract_address], fetch))[contract_address]
+
+    async def get_contract_abi(self, contract_address: str):
+        fetch = lambda addresses: {address: self.scanner.get_contract_abi(address) for address in addresses}
+        return (await self.single_flight("abi", [contract_address], fetch))[contract_address]
+
+    async def get_contract_creations(self, addresses) -> dict:
+        return await self.single_flight("creation", addresses, self.creations.get_contract_creations)
+
+    async def get_contract_creation(self, contract_address: str):
+        return (await self.get_contract_creations([contract_address]))[contract_address]
+
+    async def token_lookups(self, token_address, pair_address=None, source=None):
+        """
+        (source, {address: creation record}) of a token and its pair, the source
+        unless already known, fetched concurrently.
+        """
+        addresses = [token_address] + ([pair_address] if pair_address else [])
+        if source is not None:
+            return source, await self.get_contract_creations(addresses)
+        source, creations = await asyncio.gather(
+            self.get_contract_source_code_and_name(token_address),
+            self.get_contract_creations(addresses)
+        )
+        return source, creations
+
+    async def single_flight(self, kind, addresses, fetch) -> dict:
+        """
+        {address: result} for `addresses`, keyed as passed. Addresses already in
+        flight are joined; the rest are fetched together by `fetch(addresses)`, a
+        blocking call returning {address: result}.
+        """
+        addresses = list(dict.fromkeys(addresses))
+        own = [address for address in addresses if (kind, address.lower()) not in self.inflight]
+        self.coalesced += len(addresses) - len(own)
+        if own:
+            task = asyncio.ensure_future(self.fetch_shared(kind, own, fetch))
+            for address in own:
+                self.inflight[(kind, address.lower())] = task
+            task.add_done_callback(lambda _: [self.inflight.pop((kind, address.lower()), None) for address in own])
+        tasks = {address: self.inflight[(kind, address.lower())] for address in addresses}
+        # Shielded, so a caller giving up does not cancel the request for the others
+        return {address: (await asyncio.shield(task))[address.lower()] for address, task in tasks.items()}
+
+    def flight_key(self, kind, address):
+        return f"Scanner:{self.scanner.cache.chain}:inflight:{kind}:{address.lower()}"
+
+    def claim(self, kind, addresses):
+        """Addresses this process now has in flight; the others are in flight elsewhere."""
+        pipe = self.r.pipeline(transaction=False)
+        for address in addresses:
+            pipe.set(self.flight_key(kind, address), os.getpid(), nx=True, ex=self.flight_ttl)
+        return [address for address, claimed in zip(addresses, pipe.execute()) if claimed]
+
+    def in_flight(self, kind, addresses):
+        return [address for address in addresses if self.r.exists(self.flight_key(kind, address))]
+
+    async def fetch_shared(self, kind, addresses, fetch) -> dict:
+        """`fetch(addresses)` keyed by lowercased address, coordinated with other processes."""
+        if self.r is None:
+            return {address.lower(): result for address, result in (await self.blocking(fetch, addresses)).items()}
+        claimed = await self.blocking(self.claim, kind, addresses)
+        waiting = [address for address in addresses if address not in claimed]
+        results = {}
+        try:
+            if claimed:
+                results.update(await self.blocking(fetch, claimed))
+        finally:
+            if claimed:
+                await self.blocking(self.r.delete, *[self.flight_key(kind, address) for address in claimed])
+        if waiting:
+            # Once the other process is done, its result is in the shared cache and
+            # `fetch` is answered from it (after a failure, it is requested again)
+            deadline = asyncio.get_running_loop().time() + self.flight_ttl
+            while await self.blocking(self.in_flight, kind, waiting) and asyncio.get_running_loop().time() < deadline:
+                await asyncio.sleep(self.poll_interval)
+            results.update(await self.blocking(fetch, waiting))
+        return {address.lower(): result for address, result in results.items()}
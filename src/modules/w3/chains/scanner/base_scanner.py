@@ -3,9 +3,11 @@ from .chain_scanner import *
 load_dotenv()
 
 BASE_SCAN_API_KEY = os.getenv("BASE_SCAN_API_KEY")
+# Overridable so benchmarks can point the scanner at a local stand-in
+BASE_SCAN_API_URL = os.getenv("BASE_SCAN_API_URL", "https://api.basescan.org/api")
 
 class BaseScanner(ChainScanner):
-    def __init__(self):
-        super().__init__()
-        self.url = "https://api.basescan.org/api"
+    def __init__(self, cache: ScannerCache = None, rate_limiter: RateLimiter = None, lane=TRADE):
+        super().__init__(cache if cache is not None else default_cache("base"), rate_limiter, lane)
+        self.url = BASE_SCAN_API_URL
         self.api_key = BASE_SCAN_API_KEY
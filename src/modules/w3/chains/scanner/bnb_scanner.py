@@ -5,7 +5,7 @@ load_dotenv()
 BNB_SCAN_API_KEY = os.getenv("BNB_SCAN_API_KEY")
 
 class BNBScanner(ChainScanner):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, cache: ScannerCache = None, rate_limiter: RateLimiter = None, lane=TRADE):
+        super().__init__(cache if cache is not None else default_cache("bnb"), rate_limiter, lane)
         self.url = "https://api.bscscan.com/api"
         self.api_key = BNB_SCAN_API_KEY
@@ -1,14 +1,102 @@
 import json
 from ....utils.retry_request import *
+from .scanner_cache import ScannerCache
+from ....utils.rate_limiter import RateLimiter, TRADE
 from dotenv import load_dotenv
 import os
 
+load_dotenv()
+
+# SQLite file the scanners cache their lookups in, shared by all processes ("" disables it)
+SCANNER_CACHE_PATH = os.getenv("SCANNER_CACHE_PATH", "data/scanner_cache.db")
+
+# Addresses BaseScan's getcontractcreation accepts in one call
+CREATION_BATCH_SIZE = 5
+
+def default_cache(chain):
+    return ScannerCache(SCANNER_CACHE_PATH, chain) if SCANNER_CACHE_PATH else None
+
 class ChainScanner:
-    def __init__(self):
+    def __init__(self, cache: ScannerCache = None, rate_limiter: RateLimiter = None, lane=TRADE):
+        """
+        :param cache: lookup cache (see ScannerCache)
+        :param rate_limiter: shared RateLimiter every request takes a token from
+        :param lane: RateLimiter lane of this scanner's requests ("trade" or "background")
+        """
         self.url = None
         self.api_key = None
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.lane = lane
+
+    def cached(self, kind, address, fetch, negative):
+        """
+        `fetch(address)` through the cache: served from it when present, stored after
+        a fetch otherwise, with `negative(result)` telling failures apart for the
+        shorter TTL. Exceptions are not cached.
+        """
+        if self.cache is None:
+            return fetch(address)
+        hit, value = self.cache.get(kind, address)
+        if hit:
+            return value
+        value = fetch(address)
+        self.cache.set(kind, address, value, negative=negative(value))
+        return value
 
     def get_contract_source_code_and_name(self, contract_address: str):
+        """(source code, contract name), cached; ("", name) is closed source, ("failed", None) unknown."""
+        code, name = self.cached(
+            "source", contract_address, self.fetch_contract_source_code_and_name,
+            lambda result: result[0] in ("", "failed")
+        )
+        return code, name
+
+    def get_contract_abi(self, contract_address: str):
+        """Contract ABI, cached; "closed source" or "failed" when there is none."""
+        return self.cached(
+            "abi", contract_address, self.fetch_contract_abi,
+            lambda result: result in ("closed source", "failed")
+        )
+
+    def get_contract_creation(self, contract_addresses: str):
+        """
+        Creation data of a contract, cached ("failed" when unknown). For a list of
+        addresses this is `get_contract_creations`.
+        """
+        if isinstance(contract_addresses, list):
+            return self.get_contract_creations(contract_addresses)
+        return self.get_contract_creations([contract_addresses])[contract_addresses]
+
+    def cached_creations(self, addresses):
+        """Split `addresses` into ({address: creation data} found in the cache, [missing])."""
+        creations, missing = {}, []
+        for address in dict.fromkeys(addresses):
+            hit, value = self.cache.get("creation", address) if self.cache is not None else (False, None)
+            if hit:
+                creations[address] = value
+            else:
+                missing.append(address)
+        return creations, missing
+
+    def get_contract_creations(self, addresses) -> dict:
+        """
+        Creation data of several contracts as {address: record or "failed"}, keyed as
+        passed in. Cached ones come from the cache, the rest from BaseScan,
+        CREATION_BATCH_SIZE addresses per request.
+        """
+        creations, missing = self.cached_creations(addresses)
+        for i in range(0, len(missing), CREATION_BATCH_SIZE):
+            chunk = missing[i:i + CREATION_BATCH_SIZE]
+            records = {record["contractAddress"].lower(): record for record in self.fetch_contract_creations(chunk)}
+            for address in chunk:
+                creation = records.get(address.lower(), "failed")
+                creations[address] = creation
+                if self.cache is not None:
+                    self.cache.set("creation", address, creation, negative=creation == "failed")
+        return creations
+
+    def fetch_contract_source_code_and_name(self, contract_address: str):
         """
         Retrieve the source code for a given contract from BaseScan.
         """
@@ -25,7 +113,9 @@ class ChainScanner:
             attempts=3,
             wait_seconds=2,
             params=params,
-            timeout=10
+            timeout=10,
+            rate_limiter=self.rate_limiter,
+            lane=self.lane
         )
         except Exception as e:
             raise Exception(f"Failed to get contract source code: {e}")
@@ -55,7 +145,7 @@ class ChainScanner:
                 f"Request failed or empty result. Status code: {response.status_code}"
             )
         
-    def get_contract_abi(self, contract_address: str):
+    def fetch_contract_abi(self, contract_address: str):
         """
         Retrieve the ABI for a given contract from BaseScan.
         """
@@ -72,7 +162,9 @@ class ChainScanner:
                 attempts=3,
                 wait_seconds=2,
                 params=params,
-                timeout=10
+                timeout=10,
+                rate_limiter=self.rate_limiter,
+                lane=self.lane
             )
         except Exception as e:
             raise Exception(f"Failed to get contract ABI: {e}")
@@ -91,10 +183,11 @@ class ChainScanner:
                 f"Request failed or empty result. Status code: {response.status_code}"
             )
         
-    def get_contract_creation(self, contract_addresses: str):
+    def fetch_contract_creations(self, contract_addresses: str):
         """
         Retrieve contract creation information for one or more contract addresses
         from BaseScan. `contract_addresses` can be a single string or a list of addresses.
+        Returns the list of creation records (empty when BaseScan has none).
         """
         # If a list is passed, join by comma. If a single address (string) is passed, just use it directly.
         if isinstance(contract_addresses, list):
@@ -116,7 +209,9 @@ class ChainScanner:
                 attempts=3,
                 wait_seconds=2,
                 params=params,
-                timeout=10
+                timeout=10,
+                rate_limiter=self.rate_limiter,
+                lane=self.lane
             )
         except Exception as e:
             raise Exception(f"Failed to get contract creation data: {e}")
@@ -125,11 +220,11 @@ class ChainScanner:
         if "result" in data and data["result"]:
             if data["status"] == '0':
                 # If status is '0', the result might contain an error message
-                return "failed"
+                return []
             
             # If everything is OK, return the 'result' part which contains 
             # the creation data for the contract(s)
-            return data["result"][0]
+            return data["result"]
         else:
             raise Exception(
                 f"Request failed or empty result. Status code: {response.status_code}"
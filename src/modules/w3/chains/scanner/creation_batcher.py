@@ -0,0 +1,69 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from .chain_scanner import ChainScanner, CREATION_BATCH_SIZE
+
+class CreationBatcher:
+    """
+    Groups the contract-creation lookups of concurrent callers, e.g. the token stage
+    threads of a Pipeline or an enricher walking through many events, into shared
+    BaseScan requests of up to `max_batch` addresses. A background thread sends a
+    batch once it is full or `max_wait` seconds after its first address came in.
+    Cached addresses are answered right away; an address already waiting for a batch
+    is not queued twice.
+    Same `get_contract_creations` interface as ChainScanner.
+    """
+    def __init__(self, scanner: ChainScanner, max_batch=CREATION_BATCH_SIZE, max_wait=0.05):
+        self.scanner = scanner
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.thread = threading.Thread(target=self.run, name="creation-batcher", daemon=True)
+        self.thread.start()
+
+    def get_contract_creations(self, addresses) -> dict:
+        creations, missing = self.scanner.cached_creations(addresses)
+        futures = {}
+        with self.lock:
+            for address in missing:
+                future = self.pending.get(address.lower())
+                if future is None:
+                    future = self.pending[address.lower()] = Future()
+                    self.queue.put(address)
+                futures[address] = future
+        for address, future in futures.items():
+            creations[address] = future.result()
+        return creations
+
+    def next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            try:
+                creations, error = self.scanner.get_contract_creations(batch), None
+            except Exception as e:
+                creations, error = {}, e
+            self.batches += 1
+            with self.lock:
+                for address in batch:
+                    future = self.pending.pop(address.lower())
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(creations[address])
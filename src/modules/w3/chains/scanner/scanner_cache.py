@@ -0,0 +1,85 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lookups (
+    chain TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    address TEXT NOT NULL,
+    value TEXT NOT NULL,
+    negative INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (chain, kind, address)
+)
+"""
+
+class ScannerCache:
+    """
+    Persistent cache of explorer lookups (ABI, source, creation) in a SQLite file
+    shared by every process on the host, keyed by chain, lookup kind and address.
+    Verified source and creation data never change, so positive results are kept
+    for good; negative ones ("closed source", "failed") may change once a contract
+    is verified or indexed and expire after `negative_ttl` seconds.
+    Hits and misses are counted per kind in this process (`stats()`).
+    """
+    def __init__(self, path, chain, negative_ttl=600):
+        """
+        :param path: SQLite file, created if missing
+        :param chain: chain name the entries are stored under, e.g. "base"
+        :param negative_ttl: seconds a negative result is served from the cache
+        """
+        self.path = path
+        self.chain = chain
+        self.negative_ttl = negative_ttl
+        self.hits = Counter()
+        self.misses = Counter()
+        self.lock = threading.Lock()
+        self.connection = None
+        self.pid = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def connect(self):
+        # One connection per process: a connection inherited through fork is not safe to use
+        if self.connection is None or self.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            # WAL lets the workers read while one of them writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(SCHEMA)
+            connection.commit()
+            self.connection = connection
+            self.pid = os.getpid()
+        return self.connection
+
+    def get(self, kind, address):
+        """(True, value) on a hit, (False, None) on a miss or an expired negative entry."""
+        with self.lock:
+            row = self.connect().execute(
+                "SELECT value, negative, stored_at FROM lookups WHERE chain = ? AND kind = ? AND address = ?",
+                (self.chain, kind, address.lower())
+            ).fetchone()
+            if row is None or (row[1] and time.time() - row[2] > self.negative_ttl):
+                self.misses[kind] += 1
+                return False, None
+            self.hits[kind] += 1
+            return True, json.loads(row[0])
+
+    def set(self, kind, address, value, negative=False):
+        with self.lock:
+            connection = self.connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?, ?, ?)",
+                (self.chain, kind, address.lower(), json.dumps(value), int(negative), time.time())
+            )
+            connection.commit()
+
+    def stats(self):
+        """{kind: {"hits", "misses"}} for this process."""
+        with self.lock:
+            kinds = set(self.hits) | set(self.misses)
+            return {kind: {"hits": self.hits[kind], "misses": self.misses[kind]} for kind in sorted(kinds)}
@@ -0,0 +1,177 @@
+"""
+Admission control for the workers: decide per event whether to handle it now (admit),
+put it back on the queue for later (defer) or drop it (shed), from cheap load signals
+instead of sampling the CPU.
+"""
+import time
+from collections import Counter
+
+ADMIT = "admit"
+DEFER = "defer"
+SHED = "shed"
+
+def counters_key(queue: str) -> str:
+    """Redis hash the controllers of all workers on `queue` add their decisions to."""
+    return f"Admission:{queue}"
+
+class AdmissionController:
+    """
+    Base class. Subclasses implement `decide(signals)` returning (decision, reason);
+    `check` wraps it and counts every "<decision>:<reason>" locally and, when a Redis
+    client is given, in the shared `Admission:<queue>` hash.
+    """
+    def __init__(self, r=None, queue="NewToken"):
+        self.r = r
+        self.key = counters_key(queue)
+        self.counters = Counter()
+
+    def decide(self, signals: dict):
+        raise NotImplementedError
+
+    def check(self, signals: dict):
+        decision, reason = self.decide(signals)
+        name = f"{decision}:{reason}"
+        self.counters[name] += 1
+        if self.r is not None:
+            self.r.hincrby(self.key, name, 1)
+        return decision, reason
+
+class AdmitAll(AdmissionController):
+    """Admits everything, e.g. for replays."""
+    def decide(self, signals):
+        return ADMIT, "ok"
+
+class ThresholdAdmissionController(AdmissionController):
+    """
+    Sheds what can't be traded profitably any more and defers while the worker's
+    dependencies are saturated. Checks run in order; a limit of None disables the check.
+
+    Signals (see WorkerSignals): queue_depth, event_age (s), in_flight (open positions),
+    pipeline_in_flight (events inside the worker's pipeline), rpc_latency and
+    scan_latency (recent median stage time, s), eth_budget (ETH).
+    """
+    def __init__(
+            self,
+            r=None,
+            queue="NewToken",
+            min_eth_budget=0.0001,
+            max_event_age=120,
+            max_queue_depth=500,
+            max_in_flight=1000,
+            max_pipeline_in_flight=None,
+            max_rpc_latency=2.0,
+            max_scan_latency=5.0
+        ):
+        """
+        :param min_eth_budget: shed below this wallet balance (a buy can't be paid for)
+        :param max_event_age: shed events older than this, the launch window is gone
+        :param max_queue_depth: shed while the backlog is deeper than this
+        :param max_in_flight: defer while this many positions wait to be sold
+        :param max_pipeline_in_flight: defer while the worker's pipeline holds this many
+            events; each one admitted beyond it only waits in a stage queue, ageing
+        :param max_rpc_latency: defer while RPC calls are slower than this
+        :param max_scan_latency: defer while BaseScan calls are slower than this
+        """
+        super().__init__(r, queue)
+        self.min_eth_budget = min_eth_budget
+        self.max_event_age = max_event_age
+        self.max_queue_depth = max_queue_depth
+        self.max_in_flight = max_in_flight
+        self.max_pipeline_in_flight = max_pipeline_in_flight
+        self.max_rpc_latency = max_rpc_latency
+        self.max_scan_latency = max_scan_latency
+
+    @staticmethod
+    def exceeds(value, limit):
+        return limit is not None and value is not None and value > limit
+
+    def decide(self, signals):
+        if self.min_eth_budget is not None and signals.get("eth_budget") is not None \
+                and signals["eth_budget"] < self.min_eth_budget:
+            return SHED, "eth_budget"
+        if self.exceeds(signals.get("event_age"), self.max_event_age):
+            return SHED, "event_age"
+        if self.exceeds(signals.get("queue_depth"), self.max_queue_depth):
+            return SHED, "queue_depth"
+        if self.max_in_flight is not None and signals.get("in_flight", 0) >= self.max_in_flight:
+            return DEFER, "in_flight"
+        if self.max_pipeline_in_flight is not None and signals.get("pipeline_in_flight", 0) >= self.max_pipeline_in_flight:
+            return DEFER, "pipeline_in_flight"
+        if self.exceeds(signals.get("rpc_latency"), self.max_rpc_latency):
+            return DEFER, "rpc_latency"
+        if self.exceeds(signals.get("scan_latency"), self.max_scan_latency):
+            return DEFER, "scan_latency"
+        return ADMIT, "ok"
+
+class WorkerSignals:
+    """
+    Gathers the admission signals for one worker from what it already has: the queue
+    length, the flow's stage timer and sell scheduler, and a cached chain head and
+    wallet balance (refreshed at most every `refresh` seconds, so a check costs one
+    LLEN and, with a scheduler, two ZCARDs). With a BalanceView the head and balance
+    come from the shared balance monitor instead, without any RPC.
+    Latencies older than `latency_window` are not reported: while the worker defers on
+    latency no new samples come in, so this lets a probe event through now and then.
+    """
+    def __init__(self, r, queue, w3, account, flow, block_time=2, refresh=10, latency_window=30, balance=None, timer=None,
+                 transport=None):
+        """
+        :param flow: event flow whose `timer` and `sell_scheduler` are read
+        :param timer: latency source used instead of `flow.timer`, e.g. a Pipeline (whose
+            `in_flight()` is then the pipeline_in_flight signal)
+        :param transport: event transport whose `depth()` is the queue depth (default: LLEN)
+        :param balance: optional BalanceView to read the head block and ETH budget from
+        :param block_time: seconds per block, to turn the head distance into an age
+        :param latency_window: seconds after the last handled event that its latencies count
+        """
+        self.r = r
+        self.queue = queue
+        self.w3 = w3
+        self.account = account
+        self.flow = flow
+        self.block_time = block_time
+        self.refresh = refresh
+        self.latency_window = latency_window
+        self.balance = balance
+        self.timer = timer if timer is not None else flow.timer
+        self.transport = transport
+        self.head = None
+        self.eth_budget = None
+        self.refreshed_at = 0
+
+    def update(self):
+        if self.balance is not None:
+            self.head = self.balance.block or None
+            self.eth_budget = self.balance.total
+            self.refreshed_at = self.balance.updated_at
+            return
+        now = time.time()
+        if now - self.refreshed_at < self.refresh:
+            return
+        self.head = self.w3.get_block_number()
+        self.eth_budget = self.w3.get_eth_balance(self.account.address)
+        self.refreshed_at = now
+
+    def event_age(self, event_data):
+        if self.head is None or "blockNumber" not in event_data:
+            return None
+        # Extrapolate the head since the last refresh
+        head = self.head + (time.time() - self.refreshed_at) / self.block_time
+        return max(0.0, (head - event_data["blockNumber"]) * self.block_time)
+
+    def collect(self, event_data):
+        self.update()
+        scheduler = getattr(self.flow, "sell_scheduler", None)
+        timer = self.timer
+        fresh = timer.started_at is not None and time.time() - timer.started_at < self.latency_window
+        return {
+            "queue_depth": self.transport.depth() if self.transport is not None else self.r.llen(self.queue),
+            "event_age": self.event_age(event_data),
+            "in_flight": scheduler.pending() if scheduler is not None else 0,
+            "pipeline_in_flight": timer.in_flight() if hasattr(timer, "in_flight") else 0,
+            # The liquidity stage is a single multicall; the token stage is dominated
+            # by two BaseScan requests
+            "rpc_latency": timer.recent("liquidity") if fresh else None,
+            "scan_latency": timer.recent("token") if fresh else None,
+            "eth_budget": self.eth_budget,
+        }
@@ -1,11 +1,18 @@
 from .event_flow import *
 from ..honeypot_event import *
 from ..honeypot_event import HoneypotEvent
+from .. import position_store
+from ..security.bytecode_filter import BytecodeFilter, BAD, GOOD
+from ...chains.scanner.async_scanner import AsyncChainScanner
 from ...exchange.uniswap_v2_base import UniswapV2Base
+from ....utils.ABI import MIN_ERC20_ABI
+from ....utils.metrics import StageTimer
 import random
 
 class HoneypotTimerFlowBaseUniswapV2(EventFlow):
-    def __init__(self, w3, scanner, exchange: UniswapV2Base, account):
+    def __init__(self, w3, scanner, exchange: UniswapV2Base, account, sell_scheduler=None, balance=None,
+                 positions=None, bytecode_filter: BytecodeFilter = None, creations=None,
+                 async_scanner: AsyncChainScanner = None, max_event_age=None):
         self.w3 = w3
         self.scanner = scanner
         self.exchange = exchange
@@ -22,88 +29,184 @@ class HoneypotTimerFlowBaseUniswapV2(EventFlow):
         self.buy_amount = Decimal(random.choice(self.BUY_AMOUNTS))
         self.wait_time_minutes = random.choice(self.WAIT_TIMES_MINUTES)
         self.wait_time_seconds = self.wait_time_minutes * 60
+        # Per-stage latency of handle_event
+        self.timer = StageTimer()
+        # With a SellScheduler the sell is queued instead of sleeping through the wait
+        self.sell_scheduler = sell_scheduler
+        # Optional BalanceView, told to refresh once our own transactions confirm
+        self.balance = balance
+        # Optional PositionStore recording each trade's lifecycle for crash recovery
+        self.positions = positions
+        # Optional BytecodeFilter rejecting known-bad clones before any BaseScan call
+        self.bytecode_filter = bytecode_filter
+        # Source of contract-creation records: the scanner, or a CreationBatcher that
+        # groups the lookups of concurrent events
+        self.creations = creations if creations is not None else scanner
+        # Optional started AsyncChainScanner: a token's source and creation records are
+        # then fetched concurrently, sharing requests with identical lookups in flight
+        self.async_scanner = async_scanner
+        # Seconds after its block an event may still be bought. Checked again when it
+        # reaches the transact stage, since it may have waited in the pipeline since
+        # admission; needs "event_time" in the event data (set by the worker)
+        self.max_event_age = max_event_age
 
     def handle_event(self, event_data):
+        """
+        Run every stage in sequence in this thread. `stages()` exposes the same steps
+        for a Pipeline that runs each one with its own concurrency.
+        """
+        self.timer.start()
+        event = event_data
+        for name, stage in self.stages():
+            event = stage(event)
+            self.timer.lap(name)
+            if event is None:
+                return
+
+    def stages(self):
+        """
+        The flow as ordered (name, stage) steps. Each stage takes the previous stage's
+        output and returns the input of the next one, or None to stop there.
+        Stages keep their per-event state on the event (and log through `event.logger`),
+        so several events can be in different stages at once.
+        """
+        return [
+            ("token", self.identify_token),
+            ("pair", self.create_pair),
+            ("liquidity", self.check_liquidity),
+            ("security", self.check_security),
+            ("llm", self.ask_llm),
+            ("transact", self.trade),
+        ]
+
+    def identify_token(self, event_data):
         try:
             # Decide which token is which
             token_0_address = event_data["token0"]
             token_1_address = event_data["token1"]
             if token_0_address == self.weth_address:
-                token = Token(token_1_address, self.w3, self.scanner)
+                token_address = token_1_address
             elif token_1_address == self.weth_address:
-                token = Token(token_0_address, self.w3, self.scanner)
+                token_address = token_0_address
             else:
                 # log general error
                 self.general_error_logger.error(f"WETH not found in pair: {event_data}")
-                return
+                return None
+            # Prefetch the token decimals and the pair address in one multicall
+            token_address = self.w3.to_checksum_address(token_address)
+            token_contract = self.w3.get_contract_instance(token_address, MIN_ERC20_ABI)
+            batch = self.w3.multicall()
+            batch.add(token_contract.functions.decimals())
+            batch.add(self.exchange.factory_contract.functions.getPair(token_address, self.weth_address))
+            token_decimals, pair_address = batch.execute()
+            code_hash, verdict = None, None
+            if self.bytecode_filter is not None:
+                code_hash, verdict = self.bytecode_filter.check(self.w3, token_address)
+                if verdict is not None and verdict["verdict"] == BAD:
+                    return None
+            # A clone of a token sold before reuses its verified source
+            source = (verdict["code"], verdict["contract_name"]) if verdict is not None else None
+            # Token and pair creation records in one BaseScan request
+            pair_exists = int(pair_address, 16) != 0
+            if self.async_scanner is not None:
+                source, creations = self.async_scanner.call(self.async_scanner.token_lookups(
+                    token_address, pair_address if pair_exists else None, source
+                ))
+            else:
+                creations = self.creations.get_contract_creations(
+                    [token_address, pair_address] if pair_exists else [token_address]
+                )
+            token = Token(
+                token_address, self.w3, self.scanner, decimals=token_decimals, source=source,
+                creation=creations[token_address]
+            )
         except Exception as e:
             self.general_error_logger.error(f"Error during token identification: {str(e)}")
-            return
+            return None
 
         # Get the logger for this token
-        self.get_token_logger(token)
+        logger = self.get_token_logger(token)
         try:
             # Create the event object
-            self.logger.info(f"Creating event object for token {token.address}")
-            event = HoneypotEvent(token, self.logger)
-            self.logger.info(f"Event object created successfully")
+            logger.info(f"Creating event object for token {token.address}")
+            event = HoneypotEvent(token, logger)
+            logger.info(f"Event object created successfully")
         except Exception as e:
-            self.logger.error(f"Error creating event object: {str(e)}")
-            return
-
+            logger.error(f"Error creating event object: {str(e)}")
+            return None
+        event.pair_address = pair_address
+        event.pair_creation = creations.get(pair_address)
+        event.event_time = event_data.get("event_time")
+        event.code_hash = code_hash
+        if verdict is not None:
+            logger.info(f"Bytecode matches token {verdict['address']}, sold before")
+        return event
+
+    def create_pair(self, event):
         try:
             # Create pair object
-            self.logger.info(f"Creating event object for token {token.address}")
-            pair = Pair(token, self.weth, self.w3, self.scanner, self.exchange)
+            event.logger.info(f"Creating event object for token {event.token.address}")
+            pair = Pair(
+                event.token, self.weth, self.w3, self.scanner, self.exchange,
+                pair_address=event.pair_address, creation=event.pair_creation
+            )
             if not pair.is_valid:
-                self.logger.warning(f"Pair object is invalid, skipping transaction")
-                return
-            self.logger.info(f"Pair object created successfully")
+                event.logger.warning(f"Pair object is invalid, skipping transaction")
+                return None
+            event.logger.info(f"Pair object created successfully")
             event.pair = pair
         except Exception as e:
-            self.logger.error(f"Error creating pair object: {str(e)}")
-            return
-        
+            event.logger.error(f"Error creating pair object: {str(e)}")
+            return None
+        return event
+
+    def check_liquidity(self, event):
         try:
             # check liquidity of the pair
-            self.logger.info(f"Checking liquidity of the pair")
+            event.logger.info(f"Checking liquidity of the pair")
             initial_liquidity = self.liquidity_check_usd(event)
             if initial_liquidity is None:
-                self.logger.warning(f"Liquidity check failed, skipping transaction")
-                self.cleanup_logs(token.address)
-                return
+                event.logger.warning(f"Liquidity check failed, skipping transaction")
+                self.cleanup_logs(event.token.address)
+                return None
             elif initial_liquidity < 1:
-                self.logger.warning(f"Liquidity is less than $1 {initial_liquidity}, skipping transaction")
-                self.cleanup_logs(token.address)
-                return
+                event.logger.warning(f"Liquidity is less than $1 {initial_liquidity}, skipping transaction")
+                self.cleanup_logs(event.token.address)
+                return None
             event.initial_liquidity = initial_liquidity
-            self.logger.info(f"Liquidity check passed, initial liquidity: {initial_liquidity}")
+            event.logger.info(f"Liquidity check passed, initial liquidity: {initial_liquidity}")
         except Exception as e:
-            self.logger.error(f"Error checking liquidity: {str(e)}")
-            return
+            event.logger.error(f"Error checking liquidity: {str(e)}")
+            return None
+        return event
 
+    def check_security(self, event):
         try:
             # perform security checks
             security_manager = SecurityManager(event)
             flagged = security_manager.check()
             if flagged:
-                self.logger.warning("Security checks flagged the event, skipping transaction")
-                self.cleanup_logs(token.address)
-                return
+                event.logger.warning("Security checks flagged the event, skipping transaction")
+                self.record_verdict(event, BAD, "security")
+                self.cleanup_logs(event.token.address)
+                return None
         except Exception as e:
-            self.logger.error(f"Error during security checks: {str(e)}")
-            return
-        
-        
+            event.logger.error(f"Error during security checks: {str(e)}")
+            return None
+        return event
+
+    def ask_llm(self, event):
         try:
             # Get the LLM decision
             llm_manager = LLMManager(event)
             llm_decision = llm_manager.prompt_llm()
-            self.logger.info(f"LLM decision: {llm_decision}")
+            event.logger.info(f"LLM decision: {llm_decision}")
         except Exception as e:
-            self.logger.error(f"Error during LLM processing: {str(e)}")
-            return
-        
+            event.logger.error(f"Error during LLM processing: {str(e)}")
+            return None
+        return event
+
+    def trade(self, event):
         # try:
         #     transaction_manager = TransactionManager(event)
         #     outcome = transaction_manager.transact()
@@ -112,14 +215,80 @@ class HoneypotTimerFlowBaseUniswapV2(EventFlow):
         #     self.logger.error(f"Error during transaction process: {str(e)}")
         #     return
 
+        if self.max_event_age is not None and event.event_time is not None:
+            age = time.time() - event.event_time
+            if age > self.max_event_age:
+                event.logger.warning(f"Event is {age:.0f}s old at the transact stage, skipping transaction")
+                self.cleanup_logs(event.token.address)
+                return None
+
         # Transact
         try:
             outcome = self.transact(event)
-            self.logger.info(f"Transaction outcome: {outcome}")
+            event.logger.info(f"Transaction outcome: {outcome}")
         except Exception as e:
-            self.logger.error(f"Error during transaction process: {str(e)}")
-            return
-        
+            event.logger.error(f"Error during transaction process: {str(e)}")
+            return None
+        if outcome == "Sell scheduled":
+            return event
+        self.finish(event, outcome)
+        return event
+
+    def handle_sell(self, job):
+        """
+        Sell phase of a position whose buy was scheduled by `transact`, possibly in
+        another process: rebuild the event from the job and sell. Raises when the sell
+        did not run to an outcome, so the job is retried.
+        """
+        data = job["event"]
+        token = Token.from_dict(data["token"], self.w3, code=job.get("code"))
+        logger = self.get_token_logger(token)
+        event = HoneypotEvent(token, logger).restore(data)
+        if data["pair"]["token_0"]["address"] == token.address:
+            event.pair = Pair.from_dict(data["pair"], token, self.weth, self.w3)
+        else:
+            event.pair = Pair.from_dict(data["pair"], self.weth, token, self.w3)
+
+        try:
+            outcome = self.sell(event, Decimal(job["total_buy_gas_cost_eth"]))
+            logger.info(f"Transaction outcome: {outcome}")
+        except Exception as e:
+            logger.error(f"Error during sell process: {str(e)}")
+            raise
+        finally:
+            if self.balance is not None:
+                self.balance.request_refresh()
+        self.finish(event, outcome)
+
+    def handle_due_sells(self, limit=10):
+        """
+        Run up to `limit` scheduled sells that are due. Jobs are claimed one at a time,
+        so each lease covers only its own sell; a sell that raised is rescheduled.
+        Returns the number of sells handled.
+        """
+        if self.sell_scheduler is None:
+            return 0
+        handled = 0
+        while handled < limit:
+            jobs = self.sell_scheduler.claim(1)
+            if not jobs:
+                break
+            member, job = jobs[0]
+            handled += 1
+            try:
+                self.handle_sell(job)
+            except Exception as e:
+                self.general_error_logger.error(f"Error during scheduled sell: {str(e)}")
+                # The position stays open when retries run out; recover_positions picks it up
+                if not self.sell_scheduler.retry(member):
+                    self.general_error_logger.error(f"Scheduled sell failed {self.sell_scheduler.max_retries} retries, dropped")
+                continue
+            self.sell_scheduler.complete(member)
+        return handled
+
+    def finish(self, event, outcome):
+        """Record the post-trade account value and the outcome, and save the event."""
+        token = event.token
         # Get an account observation after the transaction
         try:
             event.account_value_post_transaction = self.get_total_account_value_eth()
@@ -127,30 +296,33 @@ class HoneypotTimerFlowBaseUniswapV2(EventFlow):
             event.logger.info(f"Account value observation: {event.account_value_post_transaction} ETH")
             event.logger.info(f"Observation timestamp: {event.post_transaction_observation_timestamp}")
         except Exception as e:
-            self.logger.error(f"Error getting account value post-transaction: {str(e)}")
+            event.logger.error(f"Error getting account value post-transaction: {str(e)}")
 
         # Handle transaction outcome
         if outcome == "Buy failed":
-            self.logger.warning("Buy transaction failed.")
+            event.logger.warning("Buy transaction failed.")
             self.cleanup_logs(token.address)
             return
         elif outcome == "Transaction complete" and event.short_term_outcome == "Successful Sell":
             self.cleanup_logs(token.address)
         else:
-            self.logger.info(f"Transaction outcome: {outcome}")
+            event.logger.info(f"Transaction outcome: {outcome}")
 
         # Save the event object as a JSON file
         try:
             data_path = f"data/honeypot_timer_flow/{token.address}.json"
             with open(data_path, "w") as event_file:
                 json.dump(event.to_dict(), event_file, default=str, indent=4)
-            self.logger.info(f"Event data saved to {data_path}")
+            event.logger.info(f"Event data saved to {data_path}")
         except Exception as e:
-            self.logger.error(f"Error saving event data to JSON: {str(e)}")
+            event.logger.error(f"Error saving event data to JSON: {str(e)}")
 
     def liquidity_check_usd(self, event):
-        # Get the reserves of the pair
-        liquidity = self.exchange.get_liquidity(event.pair)
+        # Get the reserves of the pair and of the WETH/USDC reference pair in one multicall
+        pair_reserves, weth_usdc_reserves = self.exchange.get_reserves(
+            self.w3, [event.pair, self.weth_usdc_pair]
+        )
+        liquidity = self.exchange.get_liquidity(event.pair, reserves=pair_reserves)
 
         # Gather the reserves
         eth_reserves = None
@@ -163,10 +335,10 @@ class HoneypotTimerFlowBaseUniswapV2(EventFlow):
                 token_reserves = liquidity[key]
         
         # Get the price of the token in terms of WETH
-        token_price_weth = self.exchange.get_price(event.token, self.weth, event.pair)
+        token_price_weth = self.exchange.get_price(event.token, self.weth, event.pair, reserves=pair_reserves)
 
         # Get the price of eth in terms of USDC
-        eth_price_usdc = self.exchange.get_price(self.weth, self.usdc, self.weth_usdc_pair)
+        eth_price_usdc = self.exchange.get_price(self.weth, self.usdc, self.weth_usdc_pair, reserves=weth_usdc_reserves)
 
         if token_price_weth is None or eth_price_usdc is None:
             return None
@@ -199,26 +371,91 @@ class HoneypotTimerFlowBaseUniswapV2(EventFlow):
         self.formatter = None
 
     def get_token_logger(self, token):
-        self.logger = logging.getLogger(f'token_{token.address}')
-        if not self.logger.handlers:
-            self.logger.setLevel(logging.INFO)
+        logger = logging.getLogger(f'token_{token.address}')
+        if not logger.handlers:
+            logger.setLevel(logging.INFO)
             # Ensure the logs directory exists
             os.makedirs('logs/honeypot_timer_flow', exist_ok=True)
-            self.file_handler = logging.FileHandler(f'logs/honeypot_timer_flow/{token.address}.log')
-            self.formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-            self.file_handler.setFormatter(self.formatter)
-            self.logger.addHandler(self.file_handler)
+            file_handler = logging.FileHandler(f'logs/honeypot_timer_flow/{token.address}.log')
+            file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+            logger.addHandler(file_handler)
+        # Kept on the flow for callers of the sequential API
+        self.logger = logger
+        return logger
 
     def get_total_account_value_eth(self):
-        eth_balance = self.w3.get_eth_balance(self.account.address)
-        weth_balance = self.weth.get_balance(self.account.address)
+        # ETH and WETH balances in one multicall
+        batch = self.w3.multicall()
+        batch.add_eth_balance(self.account.address)
+        batch.add(self.weth.contract.functions.balanceOf(self.account.address))
+        eth_in_wei, weth_raw = batch.execute()
+        eth_balance = float(self.w3.w3.from_wei(eth_in_wei, 'ether'))
+        weth_balance = weth_raw / (10 ** self.weth.decimals)
         eth_value = eth_balance + weth_balance
         return eth_value
 
     def transact(self, event: HoneypotEvent):
-        # Initialize total gas costs
+        """
+        Buy, then either schedule the sell with the sell scheduler ("Sell scheduled") or
+        wait in-process and sell.
+        """
+        total_buy_gas_cost_eth = self.buy(event)
+        if self.balance is not None:
+            self.balance.request_refresh()
+        if len(event.successful_buy_hashes) == 0:
+            event.logger.error("Failed to buy at all slippage values.")
+            self.record_position(event, position_store.FAILED, fail_reason="Buy failed")
+            return "Buy failed"
+
+        event.wait_time_minutes = self.wait_time_minutes
+        event.wait_time_seconds = self.wait_time_seconds
+        job = self.sell_job(event, total_buy_gas_cost_eth)
+        self.record_position(event, position_store.BOUGHT, job=job)
+        self.approve_early(event)
+        if self.sell_scheduler is not None:
+            due = time.time() + self.wait_time_seconds
+            member = self.sell_scheduler.schedule(job, due)
+            self.record_position(event, position_store.SELL_SCHEDULED, job_member=member, due=due)
+            event.logger.info(f"Sell scheduled in {self.wait_time_minutes} minutes.")
+            return "Sell scheduled"
+
+        # Wait for some time
+        event.logger.info(f"Waiting for {self.wait_time_minutes} minutes...")
+        time.sleep(self.wait_time_seconds)
+        outcome = self.sell(event, total_buy_gas_cost_eth)
+        if self.balance is not None:
+            self.balance.request_refresh()
+        return outcome
+
+    def sell_job(self, event: HoneypotEvent, total_buy_gas_cost_eth):
+        """
+        What `handle_sell` needs to sell the position from any process or host. The
+        token's source goes along, for the good verdict recorded after the sell.
+        """
+        return {
+            "event": event.to_dict(),
+            "code": event.token.code,
+            "total_buy_gas_cost_eth": str(total_buy_gas_cost_eth),
+        }
+
+    def approve_early(self, event: HoneypotEvent):
+        """
+        Approve the router for the bought token now, while the position is held, so the
+        sell doesn't wait for an approve when the timer fires. Only with the wallet's
+        AllowanceCache, through which the sell finds the approve and books its gas.
+        """
+        if getattr(self.account, "allowances", None) is None:
+            return
+        try:
+            tx_hash = self.exchange.approve(self.w3, self.account, event.token)
+            event.logger.info(f"Early approval tx hash: {tx_hash}")
+        except Exception as e:
+            # The sell approves on its own if this didn't go through
+            event.logger.error(f"Error during early approval: {str(e)}")
+
+    def buy(self, event: HoneypotEvent):
+        """Buy phase: try each slippage until a buy succeeds. Returns the gas spent in ETH."""
         total_buy_gas_cost_eth = Decimal('0')
-        total_sell_gas_cost_eth = Decimal('0')
 
         # Get an account observation before the transaction
         event.account_value_pre_transaction = self.get_total_account_value_eth()
@@ -227,6 +464,9 @@ class HoneypotTimerFlowBaseUniswapV2(EventFlow):
         event.logger.info(f"Account value observation: {event.account_value_pre_transaction} ETH")
         event.logger.info(f"Observation timestamp: {event.pre_transaction_observation_timestamp}")
 
+        # Recorded before any transaction is sent, so a crash mid-buy is found on restart
+        self.record_position(event, position_store.BUYING, job=self.sell_job(event, 0))
+
         # Buy attempt
         event.logger.info("Initiating buy procedure.")
         for slippage in self.SLIPPAGE_VALUES:
@@ -261,14 +501,20 @@ class HoneypotTimerFlowBaseUniswapV2(EventFlow):
                     event.logger.error("Buy failed.")
             except Exception as e:
                 event.logger.error(f"Exception during buy attempt: {str(e)}")
+        return total_buy_gas_cost_eth
+
+    def sell(self, event: HoneypotEvent, total_buy_gas_cost_eth):
+        """
+        Sell phase: sell the whole balance and compute profit and outcome.
+        Raises when no sell attempt got as far as a receipt while the tokens are still
+        held (gas API down, RPC timeouts, ...): the position stays in SELLING, so the
+        sell is retried by the scheduler or found again by recover_positions.
+        """
+        total_sell_gas_cost_eth = Decimal('0')
+        # Whether any sell transaction was mined, successful or reverted
+        mined = False
 
-        if len(event.successful_buy_hashes) == 0:
-            event.logger.error("Failed to buy at all slippage values.")
-            return "Buy failed"
-
-        # Wait for some time
-        event.logger.info(f"Waiting for {self.wait_time_minutes} minutes...")
-        time.sleep(self.wait_time_seconds)
+        self.record_position(event, position_store.SELLING)
 
         # Sell attempt
         event.logger.info("Initiating sell procedure.")
@@ -286,6 +532,7 @@ class HoneypotTimerFlowBaseUniswapV2(EventFlow):
                     slippage_tolerance=slippage_decimal,
                     gas_speed="medium"  # or "low"/"high"
                 )
+                mined = True
                 # Populate event details
                 if swap_result["swap_status"] == 1:
                     total_sell_gas_cost_eth += Decimal(swap_result.get("total_gas_cost_eth", 0))
@@ -304,6 +551,11 @@ class HoneypotTimerFlowBaseUniswapV2(EventFlow):
             except Exception as e:
                 event.logger.error(f"Exception during sell attempt: {str(e)}")
 
+        if event.amount_out == 0 and not mined:
+            token_balance = event.token.get_balance(self.account.address)
+            if token_balance != 0:
+                raise RuntimeError(f"No sell attempt was mined, {token_balance} tokens still held")
+
         # Calculate Gas Costs in ETH
         total_gas_cost_eth = total_buy_gas_cost_eth + total_sell_gas_cost_eth
 
@@ -334,9 +586,9 @@ class HoneypotTimerFlowBaseUniswapV2(EventFlow):
             if token_balance == 0:
                 event.fail_reason = "No tokens received"
             else:
-                liquidity_report = self.liquidity_check_usd(self.pair, self.w3, self.scanner)
+                liquidity_report = self.liquidity_check_usd(event)
 
-                if liquidity_report < 1:
+                if liquidity_report is not None and liquidity_report < 1:
                     event.fail_reason = "No liquidity"
                 else:
                     event.fail_reason = "Unknown error"
@@ -348,8 +600,48 @@ class HoneypotTimerFlowBaseUniswapV2(EventFlow):
             event.can_sell = True
             event.logger.info(f"Short-term outcome: {event.short_term_outcome}")
 
+        if event.can_sell:
+            self.record_position(event, position_store.SOLD)
+            self.record_verdict(event, GOOD)
+        else:
+            self.record_position(event, position_store.FAILED, fail_reason=event.fail_reason)
+            # Only a sell that was mined and reverted says something about the code;
+            # liquidity pulled or no tokens received doesn't
+            if mined and event.fail_reason == "Unknown error":
+                self.record_verdict(event, BAD, "honeypot")
         return "Transaction complete"
 
+    def record_verdict(self, event: HoneypotEvent, verdict, reason=None):
+        """Add the token's bytecode to the BytecodeFilter index (no-op without one)."""
+        if self.bytecode_filter is None or event.code_hash is None:
+            return
+        try:
+            if verdict == BAD:
+                self.bytecode_filter.mark_bad(event.code_hash, reason, event.token.address)
+            elif event.token.code:
+                self.bytecode_filter.mark_good(event.code_hash, event.token)
+        except Exception as e:
+            event.logger.error(f"Error recording bytecode verdict: {str(e)}")
+
+    def record_position(self, event: HoneypotEvent, state, **fields):
+        """Save the position's new state (no-op without a PositionStore; errors are only logged)."""
+        if self.positions is None:
+            return
+        try:
+            self.positions.update(
+                event.token.address,
+                state,
+                pair=event.pair.pair_address,
+                successful_buy_hashes=event.successful_buy_hashes,
+                successful_sell_hashes=event.successful_sell_hashes,
+                amount_in=event.amount_in,
+                amount_out=event.amount_out,
+                profit=event.profit,
+                **fields
+            )
+        except Exception as e:
+            event.logger.error(f"Error recording position state {state}: {str(e)}")
+
     def cleanup_logs(self, token_address):
         logger = logging.getLogger(f'token_{token_address}')
 
@@ -0,0 +1,188 @@
+import queue
+import threading
+import time
+from collections import deque
+from ....utils.metrics import summarize
+
+class StageMetrics:
+    """Thread-safe counters and latency/throughput samples for one pipeline stage."""
+    def __init__(self, window=60, max_samples=1000):
+        """
+        :param window: seconds over which `throughput` is computed
+        """
+        self.window = window
+        self.lock = threading.Lock()
+        self.received = 0
+        self.passed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=max_samples)
+        self.completed_at = deque()
+        self.received_at = None
+
+    def record(self, outcome, elapsed):
+        now = time.time()
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.latencies.append(elapsed)
+            self.completed_at.append(now)
+            while self.completed_at and self.completed_at[0] < now - self.window:
+                self.completed_at.popleft()
+
+    def throughput(self):
+        """Events per minute completed over the last `window` seconds."""
+        now = time.time()
+        with self.lock:
+            done = sum(1 for t in self.completed_at if t >= now - self.window)
+        return done * 60 / self.window
+
+    def snapshot(self):
+        with self.lock:
+            latency = summarize(list(self.latencies))
+            counts = {
+                "received": self.received,
+                "passed": self.passed,
+                "rejected": self.rejected,
+                "errors": self.errors,
+            }
+        return {**counts, "latency": latency, "per_minute": self.throughput()}
+
+class Stage:
+    """
+    One step of a Pipeline: `fn(item)` returns the item for the next stage, or None
+    to drop it there. Runs on `concurrency` threads fed by a bounded queue of
+    (done callback, item) pairs. The queue holds `max_queue` items, by default one
+    per thread: a deeper buffer only adds waiting time to every event behind it.
+    """
+    def __init__(self, name, fn, concurrency=1, max_queue=None):
+        self.name = name
+        self.fn = fn
+        self.concurrency = concurrency
+        self.queue = queue.Queue(maxsize=max_queue if max_queue is not None else concurrency)
+        self.metrics = StageMetrics()
+        self.next = None
+        self.threads = []
+        # Items taken off the queue and not yet handed on
+        self.active = 0
+
+    def work(self):
+        while True:
+            entry = self.queue.get()
+            if entry is Pipeline.STOP:
+                self.queue.task_done()
+                return
+            done, item = entry
+            with self.metrics.lock:
+                self.metrics.received += 1
+                self.metrics.received_at = time.time()
+                self.active += 1
+            start = time.perf_counter()
+            try:
+                result = self.fn(item)
+                outcome = "rejected" if result is None else "passed"
+            except Exception as e:
+                print(f"[{self.name}] Error: {e}")
+                result, outcome = None, "errors"
+            self.metrics.record(outcome, time.perf_counter() - start)
+            if result is not None and self.next is not None:
+                # Blocks while the next stage is full, which pushes back up the pipeline
+                self.next.queue.put((done, result))
+            elif done is not None:
+                # The item left the pipeline (finished, rejected or failed)
+                try:
+                    done()
+                except Exception as e:
+                    print(f"[{self.name}] Error in done callback: {e}")
+            with self.metrics.lock:
+                self.active -= 1
+            self.queue.task_done()
+
+class Pipeline:
+    """
+    Runs a sequence of stages connected by bounded queues, each stage with its own
+    thread count, so cheap rejection stages keep draining bursts while slow stages
+    (LLM, trading) work through what is left at their own pace.
+
+        pipeline = Pipeline([
+            Stage("token", flow.identify_token, concurrency=8),
+            ...
+            Stage("transact", flow.trade, concurrency=1),
+        ]).start()
+        pipeline.submit(event_data)   # blocks while the first stage is full
+    """
+    STOP = object()
+
+    def __init__(self, stages: list):
+        self.stages = stages
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.next = next_stage
+
+    @classmethod
+    def from_flow(cls, flow, concurrency: dict = None, max_queue=None):
+        """
+        Build a pipeline from `flow.stages()`. `concurrency` maps stage names to thread
+        counts (default 1); stage queues hold `max_queue` items (default: one per thread).
+        """
+        concurrency = concurrency or {}
+        return cls([
+            Stage(name, fn, concurrency.get(name, 1), max_queue)
+            for name, fn in flow.stages()
+        ])
+
+    def start(self):
+        for stage in self.stages:
+            for i in range(stage.concurrency):
+                thread = threading.Thread(target=stage.work, name=f"{stage.name}-{i}", daemon=True)
+                thread.start()
+                stage.threads.append(thread)
+        return self
+
+    def submit(self, item, done=None, timeout=None):
+        """
+        Queue an item for the first stage. `done()` is called once the item leaves the
+        pipeline, e.g. to ack it on the transport. Raises queue.Full after `timeout` seconds.
+        """
+        self.stages[0].queue.put((done, item), timeout=timeout)
+
+    def in_flight(self):
+        """Items in the pipeline: queued in front of a stage or being handled by one."""
+        return sum(stage.queue.qsize() + stage.active for stage in self.stages)
+
+    def capacity(self):
+        """Items the pipeline holds when every thread is busy and every queue is full."""
+        return sum(stage.concurrency + stage.queue.maxsize for stage in self.stages)
+
+    def join(self):
+        """Wait until every submitted item has gone through (or dropped out of) the pipeline."""
+        for stage in self.stages:
+            stage.queue.join()
+
+    def stop(self):
+        """Drain the pipeline, then stop every stage's threads."""
+        self.join()
+        for stage in self.stages:
+            for _ in stage.threads:
+                stage.queue.put(self.STOP)
+            for thread in stage.threads:
+                thread.join()
+
+    def recent(self, stage_name, n=20):
+        """Median latency of the last `n` items of a stage (same interface as StageTimer)."""
+        for stage in self.stages:
+            if stage.name == stage_name:
+                with stage.metrics.lock:
+                    samples = list(stage.metrics.latencies)[-n:]
+                return summarize(samples)["p50"] if samples else None
+        return None
+
+    @property
+    def started_at(self):
+        """When the first stage last picked up an item (same interface as StageTimer)."""
+        return self.stages[0].metrics.received_at
+
+    def metrics(self):
+        """Per-stage counters, latency summary, throughput and queue depth."""
+        return {
+            stage.name: {**stage.metrics.snapshot(), "queued": stage.queue.qsize()}
+            for stage in self.stages
+        }
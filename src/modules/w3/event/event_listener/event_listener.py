@@ -1,21 +1,89 @@
-import json
 import asyncio
+import inspect
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from web3 import AsyncWeb3, WebSocketProvider
 from web3.exceptions import BlockNotFound
 from ...w3_connector import W3Connector
+from .log_decoder import *
+from ..event_queue import retracted_key, encode_event
+
+# Pushes each payload only if its dedup key was not set yet, in one atomic round trip.
+# Returns 1 per payload pushed, 0 for duplicates.
+# KEYS[1]: queue, KEYS[2..]: dedup keys; ARGV[1]: dedup ttl, ARGV[2..]: payloads
+PUBLISH_SCRIPT = """
+local pushed = {}
+for i = 2, #KEYS do
+    if redis.call('SET', KEYS[i], 1, 'NX', 'EX', ARGV[1]) then
+        redis.call('LPUSH', KEYS[1], ARGV[i])
+        pushed[i - 1] = 1
+    else
+        pushed[i - 1] = 0
+    end
+end
+return pushed
+"""
+
+# Same for a Redis Stream: XADD (capped at ~ARGV[2] entries) instead of LPUSH.
+# Returns the entry ID per payload, "" for duplicates.
+# KEYS[1]: stream, KEYS[2..]: dedup keys; ARGV[1]: dedup ttl, ARGV[2]: max length, ARGV[3..]: payloads
+STREAM_PUBLISH_SCRIPT = """
+local ids = {}
+for i = 2, #KEYS do
+    if redis.call('SET', KEYS[i], 1, 'NX', 'EX', ARGV[1]) then
+        ids[i - 1] = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[2], '*', 'event', ARGV[i + 1])
+    else
+        ids[i - 1] = ''
+    end
+end
+return ids
+"""
 
 class EventListener:
     """
     Base class that holds the core logic for fetching events, pushing them to Redis,
-    and continuously polling the blockchain for new events.
+    and either subscribing to new logs over a websocket or continuously polling the
+    blockchain for new events.
     """
-    def __init__(self, w3, redis_client, contract, event_name, source, poll_interval=2):
+    def __init__(self, w3, redis_client, contract, event_name, source, decoder, poll_interval=2,
+                 ws_url=None, ws_max_failures=3, ws_retry_interval=60,
+                 max_block_range=2000, backfill_concurrency=4, checkpoint_key=None,
+                 rpc_executor=None, queue="NewToken", dedup_ttl=86400,
+                 confirmations=0, reorg_window=64, recorder=None, transport="list", stream_maxlen=100000,
+                 chain_name=None):
         """
         :param web3: A Web3 instance configured for the desired network.
         :param redis_client: A redis.Redis or redis.asyncio.Redis instance.
         :param contract: A Web3 contract object with the event you want to filter.
         :param event_name: The name of the event to watch (e.g. "PairCreated" or "PoolCreated").
         :param source: The source of the event (e.g. "UniswapV2Factory").
+        :param decoder: A RawLogDecoder for the event (e.g. PairCreatedDecoder()).
         :param poll_interval: How often (in seconds) to poll for new blocks/events.
+        :param ws_url: Websocket endpoint for eth_subscribe (defaults to the chain's ws_url).
+                       When unset, `run` only polls.
+        :param ws_max_failures: Consecutive socket failures before falling back to polling.
+        :param ws_retry_interval: How long (in seconds) to poll before retrying the socket.
+        :param max_block_range: Largest block range requested in a single get_logs call.
+        :param backfill_concurrency: How many block chunks are fetched in parallel.
+        :param checkpoint_key: Redis key holding the last processed block
+                               (defaults to "Checkpoint:<chain_name>:<source>:<contract address>").
+        :param rpc_executor: Executor that runs the blocking web3 calls. Listeners in the same
+                             process can share one; by default each gets its own bounded pool.
+        :param queue: Redis list the events are pushed to (the fetcher uses one per chain).
+        :param dedup_ttl: How long (in seconds) a published (txHash, logIndex) is remembered,
+                          so re-polled or replayed ranges are never queued twice.
+        :param confirmations: How many blocks an event must be buried under before it is
+                              released (0 releases events at the chain head).
+        :param reorg_window: How many recent block hashes are kept to detect reorgs.
+        :param recorder: Optional EventRecorder that gets a copy of every payload pushed
+                         (duplicates the dedup suppressed are left out).
+        :param transport: "list" to LPUSH to `queue`, or "stream" to XADD to it for workers
+                          reading through a consumer group (see event_transport.py).
+        :param stream_maxlen: Approximate number of entries a "stream" queue is capped at.
+        :param chain_name: Config name of the chain (e.g. "base"), the one the queue is named
+                           after; defaults to the chain class's name. A checkpoint saved
+                           under the chain class's name is still read when there is none.
         """
         self.w3 = w3
         self.r = redis_client
@@ -23,40 +91,277 @@ class EventListener:
         self.event_name = event_name
         self.poll_interval = poll_interval
         self.source = source
+        self.decoder = decoder
         self.last_processed_block = None
+        self.ws_url = ws_url if ws_url is not None else w3.chain.ws_url
+        self.ws_max_failures = ws_max_failures
+        self.ws_retry_interval = ws_retry_interval
+        self.ws_failures = 0
+        self.max_block_range = max_block_range
+        self.backfill_concurrency = backfill_concurrency
+        self.checkpoint_key = checkpoint_key or f"Checkpoint:{chain_name or w3.chain.name}:{source}:{contract.address}"
+        # Where checkpoints were kept before they were named after the config's chain name
+        self.legacy_checkpoint_key = (
+            None if checkpoint_key else f"Checkpoint:{w3.chain.name}:{source}:{contract.address}"
+        )
+        self.rpc_executor = rpc_executor or ThreadPoolExecutor(
+            max_workers=backfill_concurrency + 1,
+            thread_name_prefix=f"{source}-rpc"
+        )
+        self.queue = queue
+        self.dedup_ttl = dedup_ttl
+        self.publish_script = None
+        self.confirmations = confirmations
+        self.reorg_window = reorg_window
+        # block number -> {"hash": block hash, "events": [(dedup key, payload), ...]}
+        self.recent_blocks = OrderedDict()
+        self.recorder = recorder
+        if transport not in ("list", "stream"):
+            raise ValueError(f"Unknown transport: {transport}")
+        self.transport = transport
+        self.stream_maxlen = stream_maxlen
+
+    async def rpc(self, fn, *args, **kwargs):
+        """
+        Run a blocking web3 call on the RPC executor so a slow request never stalls
+        the event loop (and with it every other listener in the process).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.rpc_executor, partial(fn, *args, **kwargs))
+
+    async def redis(self, result):
+        """
+        Await the result of a Redis command when the client is redis.asyncio.Redis;
+        plain redis.Redis results are returned as-is.
+        """
+        if inspect.isawaitable(result):
+            return await result
+        return result
 
-    def handle_event(self, event):
+    def format_event(self, event):
         """
-        Handle a single event object (returned by contract.events.<Event>.get_logs).
-        Convert to JSON, push to Redis, etc.
-        Subclasses or instances can override or extend this as needed.
+        Build the queue payload for a single event dict (as returned by `self.decoder.decode`).
+        Subclasses can override this to change what workers receive.
         """
-        data = {
-            "blockNumber": event.blockNumber,
-            "blockHash": event.blockHash.hex(),
-            "transactionHash": event.transactionHash.hex(),
-            "token0": event.args.get("token0"),
-            "token1": event.args.get("token1"),
-            "pair": event.args.get("pair", event.args.get("pool")),
+        return {
+            "blockNumber": event["blockNumber"],
+            "blockHash": event["blockHash"],
+            "transactionHash": event["transactionHash"],
+            "token0": event.get("token0"),
+            "token1": event.get("token1"),
+            "pair": event.get("pair"),
             "source": self.source
         }
-        print(f"Pushing event to Redis: {data['pair']}")
-        event_json = json.dumps(data)
-        self.r.lpush("my_events", event_json)
+
+    def dedup_key(self, event):
+        return f"Seen:{self.queue}:{event['transactionHash']}:{event['logIndex']}"
+
+    async def handle_events(self, events):
+        """
+        Publish a batch of events in one atomic Redis round trip. Each event is pushed
+        only the first time its (transactionHash, logIndex) is seen, so overlapping
+        re-polls never reach the workers twice.
+        """
+        if not events:
+            return 0
+        if self.publish_script is None:
+            script = STREAM_PUBLISH_SCRIPT if self.transport == "stream" else PUBLISH_SCRIPT
+            self.publish_script = self.r.register_script(script)
+        keys = [self.queue] + [self.dedup_key(event) for event in events]
+        payloads = [encode_event(self.format_event(event)) for event in events]
+        if self.transport == "stream":
+            ids = await self.redis(self.publish_script(keys=keys, args=[self.dedup_ttl, self.stream_maxlen] + payloads))
+            # Stream entries are retracted by ID, list entries by value
+            handles = [entry_id.decode() if isinstance(entry_id, bytes) else entry_id for entry_id in ids]
+            published = [bool(handle) for handle in handles]
+        else:
+            flags = await self.redis(self.publish_script(keys=keys, args=[self.dedup_ttl] + payloads))
+            published = [flag == 1 for flag in flags]
+            # A duplicate's payload is in the list too (pushed by an earlier poll), so it
+            # can be retracted by value like the rest
+            handles = payloads
+        pushed = sum(published)
+        print(f"Pushed {pushed}/{len(events)} events to Redis ({len(events) - pushed} duplicates)")
+        if self.recorder is not None and pushed:
+            # Only what reached the queue, so a replay carries the live load; the file
+            # writes run on the RPC executor, off the event loop
+            recorded = [self.format_event(event) for event, is_new in zip(events, published) if is_new]
+            await self.rpc(self.recorder.record, self.queue, recorded)
+
+        # Remember what went out per block so it can be retracted after a reorg
+        for key, handle, event in zip(keys[1:], handles, events):
+            self.remember_block(event["blockNumber"], event["blockHash"])
+            if handle:
+                self.recent_blocks[event["blockNumber"]]["events"].append((key, handle))
+        return pushed
+
+    def remember_block(self, block_number, block_hash):
+        """
+        Record a block hash in the ring buffer, dropping blocks older than `reorg_window`.
+        """
+        if block_number not in self.recent_blocks:
+            self.recent_blocks[block_number] = {"hash": block_hash, "events": []}
+            self.recent_blocks = OrderedDict(sorted(self.recent_blocks.items()))
+        while self.recent_blocks and next(iter(self.recent_blocks)) <= block_number - self.reorg_window:
+            self.recent_blocks.popitem(last=False)
+
+    def removed_entries(self, log, events):
+        """
+        (dedup key, handle) of the published events a removed log stands for. List
+        payloads can be rebuilt from the log; stream entry IDs only come from the ring
+        buffer, without one only the dedup key is dropped (handle None).
+        """
+        keys = {self.dedup_key(event) for event in events}
+        recorded = self.recent_blocks.get(log["blockNumber"], {"events": []})["events"]
+        entries = [(key, handle) for key, handle in recorded if key in keys]
+        if entries:
+            return entries
+        if self.transport == "stream":
+            return [(key, None) for key in keys]
+        return [(self.dedup_key(event), encode_event(self.format_event(event))) for event in events]
+
+    async def retract(self, entries, block_hashes):
+        """
+        Pull orphaned events back out of the queue, tag their blocks as retracted for
+        workers that already popped them, and forget their dedup keys so the same
+        transactions are published again if they land in the new canonical chain.
+        """
+        pipe = self.r.pipeline(transaction=True)
+        for key, handle in entries:
+            if handle is None:
+                pass
+            elif self.transport == "stream":
+                pipe.xdel(self.queue, handle)
+            else:
+                pipe.lrem(self.queue, 0, handle)
+            pipe.delete(key)
+        if block_hashes:
+            pipe.sadd(retracted_key(self.queue), *block_hashes)
+            pipe.expire(retracted_key(self.queue), self.dedup_ttl)
+        await self.redis(pipe.execute())
+
+    async def check_reorg(self, header):
+        """
+        Compare the hash recorded for the last processed block with the canonical one.
+        On a mismatch, walk back through the ring buffer to the fork point, retract every
+        event published from the orphaned blocks and rewind the cursor so the new branch
+        is processed again.
+        """
+        last = self.last_processed_block
+        recorded = self.recent_blocks.get(last)
+        if recorded is None:
+            return
+        if header["number"] == last + 1:
+            canonical_hash = to_hex(header["parentHash"])
+        else:
+            canonical_hash = to_hex((await self.rpc(self.w3.get_block, last))["hash"])
+        if canonical_hash == recorded["hash"]:
+            return
+
+        fork_block = next(iter(self.recent_blocks)) - 1
+        for number in reversed([n for n in self.recent_blocks if n < last]):
+            block = await self.rpc(self.w3.get_block, number)
+            if to_hex(block["hash"]) == self.recent_blocks[number]["hash"]:
+                fork_block = number
+                break
+
+        entries, block_hashes = [], []
+        for number in [n for n in self.recent_blocks if n > fork_block]:
+            orphaned = self.recent_blocks.pop(number)
+            block_hashes.append(orphaned["hash"])
+            entries.extend(orphaned["events"])
+        await self.retract(entries, block_hashes)
+        print(f"Reorg detected at block {last}: rewinding to {fork_block}, retracted {len(entries)} events")
+        await self.set_last_processed_block(fork_block)
+
+    async def handle_event(self, event):
+        """
+        Publish a single event (see `handle_events`).
+        """
+        return await self.handle_events([event])
 
     async def fetch_events(self, start_block, end_block):
         """
-        Fetch logs from the contract's specific event from start_block to end_block.
-        The `retry_with_backoff` decorator means it will automatically retry on errors.
+        Fetch logs from the contract's specific event from start_block to end_block
+        and decode them in one pass with the raw log decoder.
+        Errors are re-raised so the caller does not advance past blocks it never saw.
         """
         try:
-            event_abi = getattr(self.contract.events, self.event_name)
-            # The call to get_logs is synchronous in web3.py, but we can wrap it in a thread if needed.
-            events = event_abi().get_logs(from_block=start_block, to_block=end_block)
-            return events
+            # eth_getLogs is synchronous, so it runs on the RPC executor
+            logs = await self.rpc(
+                self.w3.get_raw_logs, self.contract.address, [self.decoder.topic], start_block, end_block
+            )
+            return self.decoder.decode(logs)
         except Exception as e:
-            print(f"Error fetching events: {e}")
-            return []
+            print(f"Error fetching events [{start_block}, {end_block}]: {e}")
+            raise
+
+    async def load_checkpoint(self):
+        """
+        Returns the last processed block stored in Redis, or None if there is none.
+        Falls back to the legacy key; the next save moves the checkpoint to `checkpoint_key`.
+        """
+        checkpoint = await self.redis(self.r.get(self.checkpoint_key))
+        if checkpoint is None and self.legacy_checkpoint_key not in (None, self.checkpoint_key):
+            checkpoint = await self.redis(self.r.get(self.legacy_checkpoint_key))
+        return int(checkpoint) if checkpoint is not None else None
+
+    async def set_last_processed_block(self, block_number):
+        """
+        Advance the in-memory cursor and persist it so a restart resumes from here.
+        """
+        self.last_processed_block = block_number
+        await self.redis(self.r.set(self.checkpoint_key, block_number))
+
+    def split_range(self, start_block, end_block):
+        """
+        Split [start_block, end_block] into inclusive chunks of at most `max_block_range` blocks.
+        """
+        return [
+            (chunk_start, min(chunk_start + self.max_block_range - 1, end_block))
+            for chunk_start in range(start_block, end_block + 1, self.max_block_range)
+        ]
+
+    async def process_range(self, start_block, end_block):
+        """
+        Fetch and handle every event in [start_block, end_block].
+        Chunks are fetched `backfill_concurrency` at a time; events are handled in block
+        order and the checkpoint is saved after each group so a failure resumes from there.
+        """
+        chunks = self.split_range(start_block, end_block)
+        if len(chunks) > 1:
+            print(f"Backfilling blocks {start_block}-{end_block} in {len(chunks)} chunks...")
+
+        for i in range(0, len(chunks), self.backfill_concurrency):
+            group = chunks[i:i + self.backfill_concurrency]
+            results = await asyncio.gather(
+                *(self.fetch_events(chunk_start, chunk_end) for chunk_start, chunk_end in group)
+            )
+            await self.handle_events([event for events in results for event in events])
+            await self.set_last_processed_block(group[-1][1])
+
+    async def poll_once(self):
+        """
+        Fetch and handle every event between the last processed block and the chain head
+        minus `confirmations`, after checking that the last processed block was not reorged.
+        On the first call the cursor resumes from the Redis checkpoint, so blocks that
+        passed while the listener was down are backfilled.
+        """
+        header = await self.rpc(self.w3.get_block, "latest")
+        if self.confirmations:
+            header = await self.rpc(self.w3.get_block, header["number"] - self.confirmations)
+        current_block = header["number"]
+        if self.last_processed_block is None:
+            checkpoint = await self.load_checkpoint()
+            # Without a checkpoint, start from the current block minus 1
+            self.last_processed_block = checkpoint if checkpoint is not None else current_block - 1
+
+        # Only fetch if there's something new
+        if current_block > self.last_processed_block:
+            await self.check_reorg(header)
+            # We fetch events from [last_processed_block + 1, current_block]
+            await self.process_range(self.last_processed_block + 1, current_block)
+            self.remember_block(current_block, to_hex(header["hash"]))
 
     async def log_loop(self):
         """
@@ -65,22 +370,7 @@ class EventListener:
         """
         while True:
             try:
-                current_block = self.w3.get_block_number()
-                if self.last_processed_block is None:
-                    # Start from the current block minus 1
-                    self.last_processed_block = current_block - 1
-
-                # Only fetch if there's something new
-                if current_block > self.last_processed_block:
-                    start_block = self.last_processed_block + 1
-                    # We fetch events from [start_block, current_block]
-                    events = await self.fetch_events(start_block, current_block)
-                    
-                    for event in events:
-                        self.handle_event(event)
-
-                    self.last_processed_block = current_block
-
+                await self.poll_once()
                 await asyncio.sleep(self.poll_interval)
             except BlockNotFound:
                 print("Block not found. Retrying...")
@@ -89,3 +379,80 @@ class EventListener:
                 print(f"Error in log_loop: {e}")
                 await asyncio.sleep(1)
 
+    def ws_connection(self):
+        """Websocket AsyncWeb3 for `subscribe_loop`, used as an async context manager."""
+        # Reconnection is handled by `run`, so the provider itself only tries once
+        return AsyncWeb3(WebSocketProvider(self.ws_url, max_connection_retries=1))
+
+    async def subscribe_loop(self):
+        """
+        Receive new event logs pushed over eth_subscribe("logs").
+        Blocks that passed while the socket was down are caught up with `get_logs` first.
+        With `confirmations` > 0 the socket only delivers new heads, and each head
+        triggers a `poll_once` for the newly confirmed blocks.
+        """
+        async with self.ws_connection() as ws_w3:
+            if self.confirmations:
+                await ws_w3.eth.subscribe("newHeads")
+            else:
+                await ws_w3.eth.subscribe("logs", {
+                    "address": self.contract.address,
+                    "topics": [self.decoder.topic]
+                })
+            self.ws_failures = 0
+            print(f"Subscribed to {self.event_name} over websocket")
+            await self.poll_once()
+
+            async for message in ws_w3.socket.process_subscriptions():
+                await self.handle_subscription(message)
+        raise ConnectionError("Websocket subscription stream closed")
+
+    async def handle_subscription(self, message):
+        """Handle one eth_subscribe message: a new head, or a log (possibly removed)."""
+        if self.confirmations:
+            await self.poll_once()
+            return
+        log = message["result"]
+        if log.get("removed"):
+            # The node reports logs dropped by a reorg: retract them and rewind
+            # so the replacement logs of that block are not skipped
+            events = self.decoder.decode([log])
+            await self.retract(self.removed_entries(log, events), [event["blockHash"] for event in events])
+            self.recent_blocks.pop(log["blockNumber"], None)
+            await self.set_last_processed_block(min(self.last_processed_block, log["blockNumber"] - 1))
+            return
+        # Skip blocks already covered by the catch-up
+        if log["blockNumber"] <= self.last_processed_block:
+            return
+        await self.handle_events(self.decoder.decode([log]))
+        # Other logs of the same block may still be in flight, so only the
+        # previous block is known to be complete
+        await self.set_last_processed_block(log["blockNumber"] - 1)
+
+    async def run(self):
+        """
+        Subscribe to new events over the websocket when one is configured, reconnecting
+        with backoff. After `ws_max_failures` consecutive failures, fall back to
+        `log_loop` for `ws_retry_interval` seconds before trying the socket again.
+        Without a websocket this is just `log_loop`.
+        """
+        if not self.ws_url:
+            await self.log_loop()
+            return
+
+        while True:
+            try:
+                await self.subscribe_loop()
+            except Exception as e:
+                self.ws_failures += 1
+                print(f"Websocket error ({self.ws_failures}/{self.ws_max_failures}): {e}")
+
+            if self.ws_failures >= self.ws_max_failures:
+                print(f"Websocket unavailable, polling for {self.ws_retry_interval}s...")
+                try:
+                    await asyncio.wait_for(self.log_loop(), timeout=self.ws_retry_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.ws_failures = 0
+            else:
+                await asyncio.sleep(min(2 ** self.ws_failures, 30))
@@ -0,0 +1,100 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from eth_utils import keccak, to_checksum_address
+
+@lru_cache(maxsize=65536)
+def checksum(address_hex: str) -> str:
+    """
+    Checksum a 40-char lowercase hex address. Cached because the same tokens
+    (WETH, USDC, ...) appear in most pairs.
+    """
+    return to_checksum_address("0x" + address_hex)
+
+def to_hex(value) -> str:
+    """
+    Lowercase hex without the 0x prefix, for both raw JSON-RPC values (str)
+    and web3-formatted values (HexBytes/bytes).
+    """
+    if isinstance(value, str):
+        return value[2:].lower() if value.startswith("0x") else value.lower()
+    return bytes(value).hex()
+
+def to_int(value) -> int:
+    return int(value, 16) if isinstance(value, str) else value
+
+class RawLogDecoder(ABC):
+    """
+    Decodes a batch of event logs by slicing the 32-byte words of `topics` and `data`
+    directly, instead of going through web3's generic ABI decoding.
+    Accepts raw eth_getLogs results (hex strings) as well as web3-formatted logs.
+    Subclasses set `signature` and implement `decode_args`.
+    """
+    signature = None
+
+    def __init__(self):
+        self.topic = "0x" + keccak(text=self.signature).hex()
+        self._topic = self.topic[2:]
+
+    def decode(self, logs) -> list:
+        """
+        Decode every log whose topic0 matches the event; other logs are skipped.
+        Returns a list of dicts with the log position and the decoded arguments.
+        """
+        decoded = []
+        for log in logs:
+            topics = [to_hex(topic) for topic in log["topics"]]
+            if not topics or topics[0] != self._topic:
+                continue
+            event = {
+                "blockNumber": to_int(log["blockNumber"]),
+                "blockHash": to_hex(log["blockHash"]),
+                "transactionHash": to_hex(log["transactionHash"]),
+                "logIndex": to_int(log["logIndex"]),
+            }
+            event.update(self.decode_args(topics, to_hex(log["data"])))
+            decoded.append(event)
+        return decoded
+
+    @abstractmethod
+    def decode_args(self, topics: list, data: str) -> dict:
+        """Event arguments from the lowercase hex `topics` and `data` of one log."""
+
+    @staticmethod
+    def word(data: str, index: int) -> str:
+        return data[index * 64:(index + 1) * 64]
+
+    @staticmethod
+    def address(word: str) -> str:
+        return checksum(word[24:])
+
+class PairCreatedDecoder(RawLogDecoder):
+    """
+    Uniswap V2 PairCreated(address indexed token0, address indexed token1, address pair, uint).
+    """
+    signature = "PairCreated(address,address,address,uint256)"
+
+    def decode_args(self, topics, data):
+        return {
+            "token0": self.address(topics[1]),
+            "token1": self.address(topics[2]),
+            "pair": self.address(self.word(data, 0)),
+        }
+
+class PoolCreatedDecoder(RawLogDecoder):
+    """
+    Uniswap V3 PoolCreated(address indexed token0, address indexed token1, uint24 indexed fee,
+    int24 tickSpacing, address pool).
+    """
+    signature = "PoolCreated(address,address,uint24,int24,address)"
+
+    def decode_args(self, topics, data):
+        tick_spacing = int(self.word(data, 0), 16)
+        if tick_spacing >= 2**255:
+            tick_spacing -= 2**256
+        return {
+            "token0": self.address(topics[1]),
+            "token1": self.address(topics[2]),
+            "fee": int(topics[3], 16),
+            "tickSpacing": tick_spacing,
+            "pair": self.address(self.word(data, 1)),
+        }
@@ -0,0 +1,75 @@
+"""
+Helpers shared by the event listeners (producers) and the workers (consumers)
+of the NewToken queue.
+"""
+import json
+import struct
+
+# Wire format of a queued event. Version 1 is a fixed struct of the raw fields followed
+# by the UTF-8 `source` (possibly empty):
+#   version (1) | blockNumber (8) | blockHash (32) | transactionHash (32) | token0, token1, pair (40 each)
+# Addresses keep their 40 checksummed hex characters: packing them into 20 bytes would
+# mean a keccak per address to restore the checksum in every worker.
+# Payloads that don't fit it (missing or extra keys) are queued as JSON, which is also
+# what older listeners published; its first byte is "{", so the two never collide.
+WIRE_VERSION = 1
+WIRE_STRUCT = struct.Struct(">BQ32s32s40s40s40s")
+WIRE_FIELDS = {"blockNumber", "blockHash", "transactionHash", "token0", "token1", "pair"}
+
+def encode_event(payload: dict) -> bytes:
+    """Serialize a listener payload for the queue (compact when possible, JSON otherwise)."""
+    extra = payload.keys() - WIRE_FIELDS
+    if extra - {"source"} or not WIRE_FIELDS <= payload.keys() or None in payload.values():
+        return json.dumps(payload).encode()
+    addresses = [payload["token0"], payload["token1"], payload["pair"]]
+    if not all(len(address) == 42 and address.startswith("0x") for address in addresses):
+        return json.dumps(payload).encode()
+    try:
+        return WIRE_STRUCT.pack(
+            WIRE_VERSION,
+            payload["blockNumber"],
+            bytes.fromhex(payload["blockHash"]),
+            bytes.fromhex(payload["transactionHash"]),
+            *(address[2:].encode("ascii") for address in addresses),
+        ) + payload.get("source", "").encode()
+    except (ValueError, TypeError, struct.error):
+        return json.dumps(payload).encode()
+
+def decode_event(data) -> dict:
+    """Inverse of `encode_event`; also reads plain JSON messages."""
+    if isinstance(data, str):
+        data = data.encode()
+    if data[:1] == b"{":
+        return json.loads(data)
+    if data[0] != WIRE_VERSION:
+        raise ValueError(f"Unknown NewToken wire format version {data[0]}")
+    _, block_number, block_hash, tx_hash, token0, token1, pair = WIRE_STRUCT.unpack_from(data)
+    event = {
+        "blockNumber": block_number,
+        "blockHash": block_hash.hex(),
+        "transactionHash": tx_hash.hex(),
+        "token0": "0x" + token0.decode(),
+        "token1": "0x" + token1.decode(),
+        "pair": "0x" + pair.decode(),
+    }
+    if len(data) > WIRE_STRUCT.size:
+        event["source"] = data[WIRE_STRUCT.size:].decode()
+    return event
+
+def retracted_key(queue: str) -> str:
+    """Redis set holding the block hashes the listener retracted after a reorg."""
+    return f"Retracted:{queue}"
+
+def is_retracted(r, event_data: dict, queue: str = "NewToken") -> bool:
+    """
+    True when the event's block was orphaned by a reorg after it was queued,
+    so the worker can skip it with a single SISMEMBER.
+    """
+    block_hash = event_data.get("blockHash")
+    if not block_hash:
+        return False
+    return bool(r.sismember(retracted_key(queue), block_hash))
+
+def new_token_queue(chain_name: str) -> str:
+    """Per-chain queue the listeners publish to, e.g. NewToken:base."""
+    return f"NewToken:{chain_name}"
@@ -0,0 +1,34 @@
+import json
+import threading
+import time
+
+class EventRecorder:
+    """
+    Appends every event the listeners publish to a JSON-lines file, so a live stream
+    can be replayed later (see benchmarks/replay_harness.py).
+    Each line is {"recordedAt": <unix time>, "queue": <queue>, "event": <payload>}.
+    Listeners sharing a recorder call `record` from their RPC threads, so writes are
+    serialized with a lock.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a")
+        self.lock = threading.Lock()
+
+    def record(self, queue, payloads):
+        recorded_at = time.time()
+        lines = "".join(
+            json.dumps({"recordedAt": recorded_at, "queue": queue, "event": payload}) + "\n" for payload in payloads
+        )
+        with self.lock:
+            self.file.write(lines)
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    @staticmethod
+    def load(path):
+        """Returns the recorded lines in order."""
+        with open(path, "r") as f:
+            return [json.loads(line) for line in f if line.strip()]
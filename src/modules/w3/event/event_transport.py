@@ -0,0 +1,218 @@
+"""
+How workers take events off the NewToken queue. Both transports hand out
+(handle, event_data) pairs; `ack(handle)` is called once the event is fully handled.
+Entries that can't be decoded (or, on a stream, keep being redelivered) are moved to
+the `<queue>:dead` dead-letter key instead of crashing the worker that reads them.
+
+    ListTransport   - the Redis list the listeners LPUSH to (BRPOP, at-most-once)
+    StreamTransport - a Redis Stream read through a consumer group: unacked events of a
+                      dead consumer are claimed by another one (at-least-once)
+"""
+import os
+import socket
+import threading
+import time
+import redis
+from .event_queue import decode_event
+
+# Resets the idle time of the entries still pending for this consumer (XCLAIM JUSTID),
+# so another consumer's XAUTOCLAIM doesn't take them while they are being handled.
+# Entries claimed by another consumer in the meantime are left alone.
+# Returns the IDs refreshed.
+# KEYS[1]: stream; ARGV[1]: group, ARGV[2]: consumer, ARGV[3..]: entry IDs
+REFRESH_SCRIPT = """
+local refreshed = {}
+for i = 3, #ARGV do
+    local pending = redis.call('XPENDING', KEYS[1], ARGV[1], ARGV[i], ARGV[i], 1)
+    if pending[1] and pending[1][2] == ARGV[2] then
+        redis.call('XCLAIM', KEYS[1], ARGV[1], ARGV[2], 0, ARGV[i], 'JUSTID')
+        table.insert(refreshed, ARGV[i])
+    end
+end
+return refreshed
+"""
+
+def dead_letter_key(queue: str) -> str:
+    """Where a transport moves the entries it can't hand out (same type as the queue)."""
+    return f"{queue}:dead"
+
+# Entries kept in a dead-letter key
+DEAD_LETTER_MAXLEN = 10000
+
+def make_transport(kind, r, queue, **kwargs):
+    """Transport by name ("list" or "stream"), e.g. from NEW_TOKEN_TRANSPORT."""
+    if kind == "stream":
+        return StreamTransport(r, queue, **kwargs)
+    if kind == "list":
+        return ListTransport(r, queue)
+    raise ValueError(f"Unknown NewToken transport: {kind}")
+
+class ListTransport:
+    """BRPOP from the list; an event popped by a worker that then dies is lost."""
+    def __init__(self, r, queue):
+        self.r = r
+        self.queue = queue
+        self.dead_key = dead_letter_key(queue)
+
+    def receive(self, timeout=1):
+        """Next (handle, event_data), or None after `timeout` seconds or for an undecodable entry."""
+        item = self.r.brpop(self.queue, timeout=timeout)
+        if item is None:
+            return None
+        try:
+            return item[1], decode_event(item[1])
+        except Exception:
+            pipe = self.r.pipeline(transaction=False)
+            pipe.lpush(self.dead_key, item[1])
+            pipe.ltrim(self.dead_key, 0, DEAD_LETTER_MAXLEN - 1)
+            pipe.execute()
+            return None
+
+    def ack(self, handle):
+        pass
+
+    def requeue(self, handle):
+        """Put an event back behind the newer ones."""
+        self.r.lpush(self.queue, handle)
+
+    def depth(self):
+        return self.r.llen(self.queue)
+
+    def trim(self):
+        return 0
+
+    def refresh(self):
+        return 0
+
+class StreamTransport:
+    """
+    Consumer-group reader of the stream the listeners XADD to (listener transport
+    "stream"). Entries stay pending until acked; entries left pending for `claim_idle`
+    seconds by a consumer that died are claimed with XAUTOCLAIM before new ones are read
+    (scanned every `claim_idle / 10` seconds, not on every read).
+    A consumer holding entries for longer, e.g. in a pipeline's queues, keeps them by
+    calling `refresh` more often than every `claim_idle` seconds. An entry claimed after
+    `max_deliveries` deliveries (its consumers keep dying on it) or that can't be decoded
+    is moved to the `<queue>:dead` stream and acked.
+    `trim` drops entries older than `max_age` (the listeners already cap the length).
+    """
+    def __init__(self, r, queue, group="workers", consumer=None, claim_idle=300, max_age=86400, max_deliveries=5):
+        """
+        :param r: synchronous Redis client (Redis >= 6.2 for XAUTOCLAIM)
+        :param queue: stream key, e.g. NewToken:base
+        :param group: consumer group shared by all workers of the queue
+        :param consumer: unique name of this consumer (default: host-pid)
+        :param claim_idle: seconds before another consumer's pending entry is claimed
+        :param max_age: seconds of history `trim` keeps in the stream
+        :param max_deliveries: deliveries of an entry before it is dead-lettered
+        """
+        self.r = r
+        self.queue = queue
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.claim_idle = claim_idle
+        self.max_age = max_age
+        self.max_deliveries = max_deliveries
+        self.dead_key = dead_letter_key(queue)
+        self.claim_cursor = "0-0"
+        self.claimed_at = 0
+        # Entries received and not yet acked or requeued
+        self.held = set()
+        self.held_lock = threading.Lock()
+        self.refresh_script = r.register_script(REFRESH_SCRIPT)
+        try:
+            # Start from the beginning so a backlog queued before the first worker is kept
+            r.xgroup_create(queue, group, id="0", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def claim(self):
+        """One entry abandoned by a dead consumer, or None."""
+        # Keep going while a scan is under way, otherwise only scan now and then
+        if self.claim_cursor in ("0-0", b"0-0") and time.time() - self.claimed_at < self.claim_idle / 10:
+            return None
+        self.claimed_at = time.time()
+        cursor, entries, *_ = self.r.xautoclaim(
+            self.queue, self.group, self.consumer, int(self.claim_idle * 1000),
+            start_id=self.claim_cursor, count=1
+        )
+        self.claim_cursor = cursor
+        for entry_id, fields in entries:
+            # Entries trimmed away while pending come back without fields
+            if not fields:
+                self.r.xack(self.queue, self.group, entry_id)
+                continue
+            pending = self.r.xpending_range(self.queue, self.group, entry_id, entry_id, 1)
+            if pending and pending[0]["times_delivered"] > self.max_deliveries:
+                self.dead_letter(entry_id, fields, "max_deliveries")
+                continue
+            return entry_id, fields
+        return None
+
+    def dead_letter(self, entry_id, fields, reason):
+        """Move an entry to the dead-letter stream and ack it."""
+        pipe = self.r.pipeline(transaction=True)
+        pipe.xadd(
+            self.dead_key, {**fields, b"id": entry_id, b"reason": reason},
+            maxlen=DEAD_LETTER_MAXLEN, approximate=True
+        )
+        pipe.xack(self.queue, self.group, entry_id)
+        pipe.execute()
+
+    def receive(self, timeout=1):
+        entry = self.claim()
+        if entry is None:
+            response = self.r.xreadgroup(
+                self.group, self.consumer, {self.queue: ">"}, count=1, block=int(timeout * 1000)
+            )
+            if not response:
+                return None
+            entry = response[0][1][0]
+        entry_id, fields = entry
+        try:
+            event_data = decode_event(fields[b"event"])
+        except Exception as e:
+            # e.g. a wire format version from a newer listener during a rolling upgrade
+            self.dead_letter(entry_id, fields, f"undecodable: {e}")
+            return None
+        with self.held_lock:
+            self.held.add(entry_id)
+        return entry_id, event_data
+
+    def ack(self, handle):
+        self.r.xack(self.queue, self.group, handle)
+        with self.held_lock:
+            self.held.discard(handle)
+
+    def refresh(self):
+        """
+        Reset the idle time of every entry this consumer holds. Returns the number
+        refreshed; held entries already claimed by another consumer are not counted.
+        """
+        with self.held_lock:
+            held = list(self.held)
+        if not held:
+            return 0
+        refreshed = self.refresh_script(keys=[self.queue], args=[self.group, self.consumer] + held)
+        return len(refreshed)
+
+    def requeue(self, handle):
+        """Re-add the entry at the end of the stream and ack the original."""
+        entries = self.r.xrange(self.queue, handle, handle)
+        if entries:
+            self.r.xadd(self.queue, entries[0][1])
+        self.ack(handle)
+
+    def depth(self):
+        """Entries not yet delivered to the group."""
+        for group in self.r.xinfo_groups(self.queue):
+            name = group["name"].decode() if isinstance(group["name"], bytes) else group["name"]
+            if name == self.group and group.get("lag") is not None:
+                return group["lag"]
+        return self.r.xlen(self.queue)
+
+    def trim(self):
+        """Drop entries older than `max_age` seconds (stream IDs start with the ms timestamp)."""
+        min_id = int((time.time() - self.max_age) * 1000)
+        return self.r.xtrim(self.queue, minid=min_id, approximate=True)
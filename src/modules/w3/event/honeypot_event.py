@@ -10,10 +10,12 @@ class HoneypotEvent(Event):
         self.pair = None
         
         # Security findings
+        self.code_hash = None  # runtime bytecode fingerprint (BytecodeFilter)
         self.bad_functions = []
         self.bad_lines = []
         
         # Transaction/flow details
+        self.event_time = None  # unix time of the event's block, estimated at admission
         self.successful_buy_hashes = []
         self.failed_buy_hashes = []
         self.successful_sell_hashes = []
@@ -53,10 +55,20 @@ class HoneypotEvent(Event):
         self.rug_pull_time = None
         self.max_yield_percent = None
 
+    def restore(self, data):
+        """
+        Load the flow state from `to_dict` output. Token and pair are rebuilt by the caller.
+        """
+        for key, value in data.items():
+            if key not in ("token", "pair"):
+                setattr(self, key, value)
+        return self
+
     def to_dict(self):
         return {
             'token': self.token.to_dict(),
             'pair': self.pair.to_dict(),
+            'code_hash': self.code_hash,
             'bad_functions': self.bad_functions,
             'bad_lines': self.bad_lines,
             'successful_buy_hashes': self.successful_buy_hashes,
@@ -0,0 +1,96 @@
+import json
+import time
+from ...utils.ABI import MIN_ERC20_ABI
+
+# Lifecycle of a position
+BUYING = "buying"                   # buy transactions being sent
+BOUGHT = "bought"                   # tokens held, sell not scheduled yet
+SELL_SCHEDULED = "sell_scheduled"   # sell job in the SellScheduler
+SELLING = "selling"                 # sell transactions being sent
+SOLD = "sold"
+FAILED = "failed"                   # buy failed or the tokens could not be sold
+CLOSED = "closed"                   # found without a token balance during recovery
+TERMINAL_STATES = (SOLD, FAILED, CLOSED)
+
+class PositionStore:
+    """
+    Durable record of every position the flow opens, one JSON document per token in
+    the `Positions:<name>` hash, plus the set of open ones. Each update merges the new
+    fields and stamps the state change, so after a crash `recover_positions` knows how
+    far each trade got.
+    """
+    def __init__(self, r, name="base"):
+        """
+        :param r: synchronous Redis client
+        :param name: store name, one per chain (Positions:<name>)
+        """
+        self.r = r
+        self.key = f"Positions:{name}"
+        self.open_key = f"{self.key}:open"
+
+    def get(self, token_address):
+        data = self.r.hget(self.key, token_address)
+        return json.loads(data) if data else None
+
+    def update(self, token_address, state, **fields):
+        """Move a position to `state`, merging `fields` into its record."""
+        position = self.get(token_address) or {"token": token_address, "history": []}
+        position.update(fields)
+        position["state"] = state
+        position["updatedAt"] = time.time()
+        position["history"].append([state, position["updatedAt"]])
+        pipe = self.r.pipeline(transaction=True)
+        pipe.hset(self.key, token_address, json.dumps(position, default=str))
+        if state in TERMINAL_STATES:
+            pipe.srem(self.open_key, token_address)
+        else:
+            pipe.sadd(self.open_key, token_address)
+        pipe.execute()
+        return position
+
+    def open_positions(self):
+        addresses = [address.decode() for address in self.r.smembers(self.open_key)]
+        positions = [self.get(address) for address in addresses]
+        return [position for position in positions if position is not None]
+
+def recover_positions(positions: PositionStore, scheduler, w3, account_address):
+    """
+    Reconcile the open positions with on-chain token balances (one multicall) after a
+    restart:
+      - no balance: a position still buying never got its tokens (failed), anything
+        further along was already sold or moved (closed)
+      - balance held: keep a sell that is still in the scheduler, otherwise schedule
+        the sell to run now
+      - balanceOf reverted: left as it is, to be reconciled on the next recovery
+    Returns {state or "rescheduled"/"kept"/"unknown": count}.
+    """
+    open_positions = [position for position in positions.open_positions() if position.get("job")]
+    summary = {}
+    if not open_positions:
+        return summary
+
+    batch = w3.multicall()
+    for position in open_positions:
+        token = w3.get_contract_instance(w3.to_checksum_address(position["token"]), MIN_ERC20_ABI)
+        batch.add(token.functions.balanceOf(account_address), allow_failure=True)
+    balances = batch.execute()
+
+    for position, balance in zip(open_positions, balances):
+        address = position["token"]
+        if balance is None:
+            outcome = "unknown"
+        elif balance == 0:
+            if position["state"] == BUYING:
+                positions.update(address, FAILED, fail_reason="No tokens received")
+                outcome = FAILED
+            else:
+                positions.update(address, CLOSED, fail_reason="No token balance at recovery")
+                outcome = CLOSED
+        elif position["state"] == SELL_SCHEDULED and scheduler.contains(position.get("job_member")):
+            outcome = "kept"
+        else:
+            member = scheduler.schedule(position["job"], time.time())
+            positions.update(address, SELL_SCHEDULED, job_member=member, recovered=True)
+            outcome = "rescheduled"
+        summary[outcome] = summary.get(outcome, 0) + 1
+    return summary
@@ -0,0 +1,83 @@
+import hashlib
+import json
+
+BAD = "bad"
+GOOD = "good"
+
+# PUSH4 <selector> as it appears in the function dispatcher
+TRANSFER_SELECTOR = bytes.fromhex("63a9059cbb")     # transfer(address,uint256)
+BALANCE_OF_SELECTOR = bytes.fromhex("6370a08231")   # balanceOf(address)
+
+class BytecodeFilter:
+    """
+    Pre-filter run on a new token before anything is asked from BaseScan: the runtime
+    bytecode (one eth_getCode) is fingerprinted and looked up in the `Bytecode:<name>`
+    index of verdicts from earlier tokens, so byte-for-byte redeployments of a contract
+    already judged are rejected, or get their verified source from the index, for
+    free. Unknown bytecode also goes through cheap heuristics (size, ERC-20 selectors).
+    Verdicts are added by the flow: bad when the security checks flag a token or it
+    can't be sold, good once a sell went through.
+    Rejections are counted per reason in `Bytecode:<name>:rejected`.
+    """
+    def __init__(self, r, name="base", min_size=1000, required_selectors=(TRANSFER_SELECTOR, BALANCE_OF_SELECTOR)):
+        """
+        :param r: synchronous Redis client
+        :param name: index name, one per chain (Bytecode:<name>)
+        :param min_size: reject runtime bytecode shorter than this many bytes
+        :param required_selectors: dispatcher entries an ERC-20 must have (None disables)
+        """
+        self.r = r
+        self.key = f"Bytecode:{name}"
+        self.rejected_key = f"{self.key}:rejected"
+        self.min_size = min_size
+        self.required_selectors = required_selectors or ()
+
+    @staticmethod
+    def fingerprint(code: bytes) -> str:
+        return hashlib.sha256(code).hexdigest()
+
+    def heuristics(self, code: bytes):
+        """Reason to reject the bytecode on its own, or None."""
+        if len(code) == 0:
+            return "no_code"
+        if len(code) < self.min_size:
+            return "bytecode_size"
+        if not all(selector in code for selector in self.required_selectors):
+            return "missing_erc20_selectors"
+        return None
+
+    def lookup(self, code_hash):
+        data = self.r.hget(self.key, code_hash)
+        return json.loads(data) if data else None
+
+    def check(self, w3, address):
+        """
+        Fingerprint the token's bytecode and judge it. Returns (code_hash, verdict) where
+        verdict is None for unknown bytecode that passed the heuristics, or an index
+        entry {"verdict": "bad"/"good", "reason", ...}; a good entry also carries the
+        verified source ("code", "contract_name").
+        """
+        code = bytes.fromhex(w3.get_contract_bytecode(address).removeprefix("0x"))
+        code_hash = self.fingerprint(code)
+        verdict = self.lookup(code_hash)
+        if verdict is None:
+            reason = self.heuristics(code)
+            if reason is not None:
+                verdict = {"verdict": BAD, "reason": reason}
+        if verdict is not None and verdict["verdict"] == BAD:
+            self.r.hincrby(self.rejected_key, verdict["reason"], 1)
+        return code_hash, verdict
+
+    def mark_bad(self, code_hash, reason, address=None):
+        self.r.hset(self.key, code_hash, json.dumps({"verdict": BAD, "reason": reason, "address": address}))
+
+    def mark_good(self, code_hash, token):
+        """Record a token that could be sold, with its source for the next clone."""
+        entry = {
+            "verdict": GOOD,
+            "reason": "sold",
+            "address": token.address,
+            "code": token.code,
+            "contract_name": token.contract_name,
+        }
+        self.r.hset(self.key, code_hash, json.dumps(entry))
@@ -0,0 +1,97 @@
+import json
+import time
+
+# Moves up to ARGV[2] jobs that are due (score <= now) from the schedule to the in-flight
+# set, leased until now + ARGV[3]. Jobs whose lease ran out (the worker holding them died)
+# are claimed first. Atomic, so two workers never claim the same job.
+# KEYS[1]: schedule, KEYS[2]: in-flight; ARGV[1]: now, ARGV[2]: limit, ARGV[3]: lease seconds
+CLAIM_SCRIPT = """
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local lease_until = now + tonumber(ARGV[3])
+local claimed = {}
+for _, key in ipairs({KEYS[2], KEYS[1]}) do
+    if #claimed >= limit then break end
+    local due = redis.call('ZRANGEBYSCORE', key, '-inf', now, 'LIMIT', 0, limit - #claimed)
+    for _, job in ipairs(due) do
+        redis.call('ZREM', key, job)
+        redis.call('ZADD', KEYS[2], lease_until, job)
+        table.insert(claimed, job)
+    end
+end
+return claimed
+"""
+
+class SellScheduler:
+    """
+    Durable delayed-job queue for the sell half of a trade, on a Redis sorted set scored
+    by due time. A worker schedules the sell right after the buy instead of sleeping, and
+    any worker sharing the schedule claims it once it is due.
+    Claimed jobs stay in an in-flight set until `complete` is called, so a sell whose
+    worker crashed is handed out again after `lease` seconds. A sell that raised is put
+    back with `retry`, up to `max_retries` times.
+    """
+    def __init__(self, r, name="base", lease=600, retry_delay=30, max_retries=5):
+        """
+        :param r: synchronous Redis client
+        :param name: schedule name, one per chain (SellSchedule:<name>)
+        :param lease: seconds a claimed sell has to complete before it is handed out again
+        :param retry_delay: seconds before a failed sell is due again
+        :param max_retries: retries before a failed sell is dropped from the schedule
+        """
+        self.r = r
+        self.key = f"SellSchedule:{name}"
+        self.inflight_key = f"{self.key}:inflight"
+        self.attempts_key = f"{self.key}:attempts"
+        self.lease = lease
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self.claim_script = r.register_script(CLAIM_SCRIPT)
+
+    def schedule(self, job: dict, due: float) -> str:
+        """Add a job to run at unix time `due`. Returns the stored member for `complete`."""
+        member = json.dumps(job, default=str, sort_keys=True)
+        self.r.zadd(self.key, {member: due})
+        return member
+
+    def claim(self, limit=1, now=None) -> list:
+        """
+        Claim up to `limit` due jobs. Returns (member, job) tuples. Every job's lease
+        starts now, so claim only as many as will be done within `lease` seconds.
+        """
+        now = time.time() if now is None else now
+        members = self.claim_script(keys=[self.key, self.inflight_key], args=[now, limit, self.lease])
+        return [(member, json.loads(member)) for member in members]
+
+    def complete(self, member):
+        """Drop a finished job from the in-flight set."""
+        pipe = self.r.pipeline(transaction=True)
+        pipe.zrem(self.inflight_key, member)
+        pipe.hdel(self.attempts_key, member)
+        pipe.execute()
+
+    def retry(self, member, now=None) -> bool:
+        """
+        Put a claimed job that failed back on the schedule, due in `retry_delay`
+        seconds. Returns False (and drops the job) once it has failed `max_retries` times.
+        """
+        now = time.time() if now is None else now
+        attempts = self.r.hincrby(self.attempts_key, member, 1)
+        if attempts > self.max_retries:
+            self.complete(member)
+            return False
+        pipe = self.r.pipeline(transaction=True)
+        pipe.zrem(self.inflight_key, member)
+        pipe.zadd(self.key, {member: now + self.retry_delay})
+        pipe.execute()
+        return True
+
+    def contains(self, member) -> bool:
+        """Whether a job is still scheduled or in flight."""
+        if member is None:
+            return False
+        return self.r.zscore(self.key, member) is not None or self.r.zscore(self.inflight_key, member) is not None
+
+    def pending(self) -> int:
+        """Number of scheduled plus in-flight sells."""
+        return self.r.zcard(self.key) + self.r.zcard(self.inflight_key)
@@ -20,6 +20,32 @@ class Exchange:
 
     def get_pair_address(self, token0, token1):
         raise NotImplementedError("This method must be implemented by a subclass.")
+
+    def send_transaction(self, w3, account, contract_call, tx_params: dict):
+        """
+        Build, sign and send `contract_call` from `account`, with the nonce taken from
+        the wallet's NonceManager when it has one (no RPC, safe across workers).
+        A nonce that did not make it into a sent transaction is released again; nonce
+        errors from the node resync the manager. Returns the transaction hash.
+        """
+        nonces = getattr(account, "nonces", None)
+        nonce = nonces.reserve() if nonces is not None else w3.get_transaction_count(account.address)
+        try:
+            tx = contract_call.build_transaction({"from": account.address, "nonce": nonce, **tx_params})
+            signed_tx = w3.sign_transaction(tx, private_key=account.key)
+            tx_hash = w3.send_raw_transaction(signed_tx.raw_transaction)
+        except Exception as e:
+            if nonces is not None:
+                message = str(e).lower()
+                if "nonce" in message or "replacement transaction" in message:
+                    nonces.resync()
+                    nonces.done(nonce)
+                else:
+                    nonces.release(nonce)
+            raise
+        if nonces is not None:
+            nonces.done(nonce)
+        return tx_hash
     
     def liquidity_check_usd(self, pair, w3, scanner):
         raise NotImplementedError("This method must be implemented by a subclass.")
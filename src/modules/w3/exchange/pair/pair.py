@@ -3,29 +3,57 @@ from ...w3_connector import W3Connector
 from ....utils.ABI import PAIR_ABI
 
 class Pair():
-    def __init__(self, token_0, token_1, w3: W3Connector, scanner: ChainScanner, exchange):
+    def __init__(self, token_0, token_1, w3: W3Connector, scanner: ChainScanner, exchange, pair_address=None, creation=None):
         self.exchange = exchange.name
-        self.pair_address = w3.to_checksum_address(exchange.get_pair_address(token_0, token_1))
+        # pair_address can be passed in when it was prefetched through a multicall
+        if pair_address is None:
+            pair_address = exchange.get_pair_address(token_0, token_1)
+        self.pair_address = w3.to_checksum_address(pair_address)
         if self.pair_address == '0x0000000000000000000000000000000000000000':
             self.is_valid = False
             return
         self.pair_abi = PAIR_ABI
         self.pair_contract = w3.get_contract_instance(self.pair_address, self.pair_abi)
-        if token_0.address == self.get_token0():
+        # token0 and token1 in a single round trip
+        batch = w3.multicall()
+        batch.add(self.pair_contract.functions.token0())
+        batch.add(self.pair_contract.functions.token1())
+        pair_token0, pair_token1 = batch.execute()
+        if token_0.address == pair_token0:
             self.token_0 = token_0
             self.token_1 = token_1
             self.is_valid = True
-        elif token_0.address == self.get_token1():
+        elif token_0.address == pair_token1:
             self.token_0 = token_1
             self.token_1 = token_0
             self.is_valid = True
         else:
             self.is_valid = False
-        contract_creation = scanner.get_contract_creation(self.pair_address)
+        # creation can be passed in when it was fetched in a batch with the token's
+        contract_creation = creation if creation is not None else scanner.get_contract_creation(self.pair_address)
         self.creation_hash = contract_creation["txHash"]
         self.creation_block = contract_creation["blockNumber"]
         self.creation_timestamp = contract_creation["timestamp"]
 
+    @classmethod
+    def from_dict(cls, data, token_0, token_1, w3: W3Connector):
+        """
+        Rebuild a pair from `to_dict` output and its two (already rebuilt) tokens,
+        without any BaseScan or RPC calls.
+        """
+        pair = cls.__new__(cls)
+        pair.exchange = data["exchange"]
+        pair.pair_address = w3.to_checksum_address(data["pair_address"])
+        pair.pair_abi = PAIR_ABI
+        pair.pair_contract = w3.get_contract_instance(pair.pair_address, pair.pair_abi)
+        pair.token_0 = token_0
+        pair.token_1 = token_1
+        pair.is_valid = True
+        pair.creation_hash = data["creation_hash"]
+        pair.creation_block = data["creation_block"]
+        pair.creation_timestamp = data["creation_timestamp"]
+        return pair
+
     def get_reserves(self):
         return self.pair_contract.functions.getReserves().call()
     
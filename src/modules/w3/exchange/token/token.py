@@ -1,12 +1,17 @@
+import os
 from ...chains.scanner.chain_scanner import ChainScanner
 from ...w3_connector import W3Connector
 from ....utils.function_names import get_function_names
 from ....utils.ABI import MIN_ERC20_ABI
 
 class Token:
-    def __init__(self, address, w3: W3Connector, scanner: ChainScanner):
+    def __init__(self, address, w3: W3Connector, scanner: ChainScanner, decimals=None, source=None, creation=None):
         self.address = w3.to_checksum_address(address)
-        self.code, self.contract_name = scanner.get_contract_source_code_and_name(address)
+        # (code, contract_name) can be passed in when already known, e.g. for a clone of
+        # a contract seen before (see BytecodeFilter)
+        if source is None:
+            source = scanner.get_contract_source_code_and_name(address)
+        self.code, self.contract_name = source
         # If self.code == "failed", then the contract does not exist
         if self.code == "failed":
             raise ValueError(f"Contract with address {address} does not exist or cannot be found.")
@@ -25,11 +30,13 @@ class Token:
         # get contract instance
         self.contract = w3.get_contract_instance(self.address, self.abi)
 
-        # get token decimals
-        self.decimals = w3.get_token_decimals(self.address)
+        # get token decimals (callers may pass them in when prefetched through a multicall)
+        if decimals is None:
+            decimals = w3.get_token_decimals(self.address)
+        self.decimals = decimals
 
-        # get creation details
-        contract_creation = scanner.get_contract_creation(self.address)
+        # get creation details (callers may pass them in when fetched in a batch)
+        contract_creation = creation if creation is not None else scanner.get_contract_creation(self.address)
         self.contract_creator = contract_creation["contractCreator"]
         self.creation_hash = contract_creation["txHash"]
         self.creation_block = contract_creation["blockNumber"]
@@ -38,6 +45,33 @@ class Token:
         # get token functions
         self.functions = get_function_names(self.code)
 
+    @classmethod
+    def from_dict(cls, data, w3: W3Connector, code=None):
+        """
+        Rebuild a token from `to_dict` output without any BaseScan or RPC calls,
+        e.g. when a scheduled sell picks up a position bought by another process.
+        `code` is the verified source when the caller carries it (a sell job may run on
+        another host); otherwise it is read from data/code, if this host saved it.
+        """
+        token = cls.__new__(cls)
+        token.address = w3.to_checksum_address(data["address"])
+        token.open_source = data["open_source"]
+        token.contract_name = data["contract_name"]
+        token.decimals = data["decimals"]
+        token.contract_creator = data["contract_creator"]
+        token.creation_hash = data["creation_hash"]
+        token.creation_block = data["creation_block"]
+        token.creation_timestamp = data["creation_timestamp"]
+        token.functions = data["functions"]
+        token.code = code if code is not None else ""
+        code_path = f"data/code/{data['address']}.txt"
+        if code is None and os.path.exists(code_path):
+            with open(code_path) as f:
+                token.code = f.read()
+        token.abi = MIN_ERC20_ABI
+        token.contract = w3.get_contract_instance(token.address, token.abi)
+        return token
+
     def get_balance(self, address):
         balance = self.contract.functions.balanceOf(address).call()
         return balance / (10 ** self.decimals)
@@ -1,4 +1,5 @@
 from .exchange import *
+from ..wallet.allowance_cache import MAX_ALLOWANCE
 
 class UniswapV2Base(Exchange):
     def __init__(self, w3: W3Connector, scanner: ChainScanner):
@@ -21,7 +22,21 @@ class UniswapV2Base(Exchange):
         token1_address = token1.address
         return self.factory_contract.functions.getPair(token0_address, token1_address).call()
     
-    def get_price(self, token_0, token_1, pair):
+    def get_reserves(self, w3: W3Connector, pairs: list):
+        """
+        Fetch the reserves of several pairs in one multicall.
+        Returns a list of [res0, res1, timestamp] in the same order as `pairs`.
+        """
+        batch = w3.multicall()
+        for pair in pairs:
+            batch.add(pair.pair_contract.functions.getReserves())
+        return batch.execute()
+
+    def get_price(self, token_0, token_1, pair, reserves=None):
+        """
+        Price of token_0 in terms of token_1. `reserves` can be passed in when they
+        were already fetched (e.g. through `get_reserves`) to skip the RPC call.
+        """
         pair_address = pair.pair_address
         if pair_address == '0x0000000000000000000000000000000000000000':
             return None
@@ -32,7 +47,8 @@ class UniswapV2Base(Exchange):
         pair_token0_address = pair.token_0.address.lower()
         pair_token1_address = pair.token_1.address.lower()
         
-        reserves = pair.get_reserves()  # e.g. [res0, res1, timestamp]
+        if reserves is None:
+            reserves = pair.get_reserves()  # e.g. [res0, res1, timestamp]
         
         if token0_address == pair_token0_address:
             token0_reserve = reserves[0]
@@ -52,8 +68,9 @@ class UniswapV2Base(Exchange):
         
         return adjusted_reserve1 / adjusted_reserve0
 
-    def get_liquidity(self, pair):
-        reserves = pair.get_reserves()
+    def get_liquidity(self, pair, reserves=None):
+        if reserves is None:
+            reserves = pair.get_reserves()
         token0 = pair.token_0
         token1 = pair.token_1
         dec0 = token0.decimals
@@ -64,6 +81,55 @@ class UniswapV2Base(Exchange):
             token1.address: reserves[1] / 10**dec1
         }
 
+    def get_allowance(self, account, token):
+        """
+        Router allowance of `account` for `token` as (amount, pending approve tx hash or
+        None), from the wallet's AllowanceCache when it has the entry.
+        """
+        allowances = getattr(account, "allowances", None)
+        if allowances is not None:
+            cached = allowances.get(token.address, self.router_address)
+            if cached is not None:
+                return cached
+        amount = token.contract.functions.allowance(account.address, self.router_address).call()
+        if allowances is not None:
+            allowances.set(token.address, self.router_address, amount)
+        return amount, None
+
+    def approve(self, w3, account, token, gas_settings=None, gas_limit=200_000, gas_speed="medium"):
+        """
+        Send an unlimited router approve for `token` without waiting for it to be mined
+        (see `settle_approval`). Returns the tx hash.
+        """
+        if gas_settings is None:
+            gas_settings = w3.fetch_gas_price(level=gas_speed)
+        approve_call = token.contract.functions.approve(self.router_address, MAX_ALLOWANCE)
+        tx_hash = w3.to_hex(self.send_transaction(w3, account, approve_call, {
+            "gas": gas_limit,
+            "maxFeePerGas": gas_settings["maxFeePerGas"],
+            "maxPriorityFeePerGas": gas_settings["maxPriorityFeePerGas"]
+        }))
+        allowances = getattr(account, "allowances", None)
+        if allowances is not None:
+            allowances.set(token.address, self.router_address, MAX_ALLOWANCE, tx_hash)
+        return tx_hash
+
+    def settle_approval(self, w3, account, token, tx_hash, event):
+        """Wait for an approve's receipt and record the result. Returns (gas cost in ETH, status)."""
+        receipt = w3.wait_for_transaction_receipt(tx_hash)
+        event.logger.info(f"Approval status: {'Success' if receipt.status == 1 else 'Failed'}")
+        # Calculate approval gas cost in ETH, using effectiveGasPrice
+        # (the actual gas price paid in the block)
+        gas_cost_eth = Decimal(receipt.gasUsed * receipt.effectiveGasPrice) / Decimal(10**18)
+        event.logger.info(f"Approval gas cost: {gas_cost_eth} ETH")
+        allowances = getattr(account, "allowances", None)
+        if allowances is not None:
+            if receipt.status == 1:
+                allowances.set(token.address, self.router_address, MAX_ALLOWANCE)
+            else:
+                allowances.invalidate(token.address, self.router_address)
+        return gas_cost_eth, receipt.status
+
     def swap_tokens(
             self,
             w3,
@@ -124,49 +190,29 @@ class UniswapV2Base(Exchange):
                 event.logger.error(error_msg)
                 raise ValueError(error_msg)
 
-            # 4. Check allowance
-            current_allowance_raw = from_token_contract.functions.allowance(account.address, self.router_address).call()
-
-            approval_receipt = None
-            approval_tx_hash = None
+            # 4. Check allowance (cached per wallet when it has an AllowanceCache)
+            current_allowance_raw, approval_tx_hash = self.get_allowance(account, from_token)
             approval_gas_cost_eth = Decimal('0')
+            approval_settled = approval_tx_hash is None
 
-            # 5. Approve (if needed)
+            # 5. Approve (if needed). With a NonceManager the swap goes out right behind the
+            # approve, on the next nonce, and the approve's receipt is checked after the
+            # swap's; otherwise wait for the approve first
             if current_allowance_raw < amount_in_raw:
                 try:
-                    approve_tx = from_token_contract.functions.approve(
-                        self.router_address,
-                        2**256 - 1  # max uint256
-                    ).build_transaction({
-                        "from": account.address,
-                        "nonce": w3.get_transaction_count(account.address),
-                        "gas": gas_limit_approve,
-                        "maxFeePerGas": maxFeePerGas,
-                        "maxPriorityFeePerGas": maxPriorityFeePerGas
-                    })
-
-                    signed_approve_tx = w3.sign_transaction(approve_tx, private_key=account.key)
-                    approval_tx_hash = w3.send_raw_transaction(signed_approve_tx.raw_transaction)
-                    approval_receipt = w3.wait_for_transaction_receipt(approval_tx_hash)
-
-                    # Log approval details
-                    event.logger.info(f"Approval tx hash: {w3.to_hex(approval_tx_hash)}")
-                    event.logger.info(f"Approval status: {'Success' if approval_receipt.status == 1 else 'Failed'}")
-
-                    if approval_receipt.status != 1:
-                        error_msg = "Approval transaction failed, aborting swap."
-                        event.logger.error(error_msg)
-                        raise Exception(error_msg)
-
-                    # Calculate approval gas cost in ETH, using effectiveGasPrice
-                    # (the actual gas price paid in the block)
-                    approval_gas_cost_wei = approval_receipt.gasUsed * approval_receipt.effectiveGasPrice
-                    approval_gas_cost_eth = Decimal(approval_gas_cost_wei) / Decimal(10**18)
-                    event.logger.info(f"Approval gas cost: {approval_gas_cost_eth} ETH")
-
+                    approval_tx_hash = self.approve(w3, account, from_token, gas_settings, gas_limit_approve)
+                    approval_settled = False
+                    event.logger.info(f"Approval tx hash: {approval_tx_hash}")
                 except Exception as e:
                     event.logger.error(f"Error during token approval: {str(e)}")
                     raise
+            if not approval_settled and getattr(account, "nonces", None) is None:
+                approval_gas_cost_eth, approval_status = self.settle_approval(w3, account, from_token, approval_tx_hash, event)
+                approval_settled = True
+                if approval_status != 1:
+                    error_msg = "Approval transaction failed, aborting swap."
+                    event.logger.error(error_msg)
+                    raise Exception(error_msg)
 
             # 6. Prepare swap: get quote & slippage
             try:
@@ -179,32 +225,25 @@ class UniswapV2Base(Exchange):
                 event.logger.error(f"Error fetching amounts out: {str(e)}")
                 raise
 
-            # 7. Build swap transaction
-            try:
-                swap_tx = self.router_contract.functions.swapExactTokensForTokens(
-                    amount_in_raw,
-                    min_amount_out_raw,
-                    path,
-                    account.address,
-                    int(time.time()) + 180  # 3-minute deadline
-                ).build_transaction({
-                    "from": account.address,
-                    "nonce": w3.get_transaction_count(account.address),
-                    "gas": gas_limit_swap,
-                    "maxFeePerGas": maxFeePerGas,
-                    "maxPriorityFeePerGas": maxPriorityFeePerGas
-                })
-            except Exception as e:
-                event.logger.error(f"Error building swap transaction: {str(e)}")
-                raise
+            # 7. Build swap call
+            swap_call = self.router_contract.functions.swapExactTokensForTokens(
+                amount_in_raw,
+                min_amount_out_raw,
+                path,
+                account.address,
+                int(time.time()) + 180  # 3-minute deadline
+            )
 
-            # 8. Sign & send swap transaction
+            # 8. Build, sign & send swap transaction
             swap_receipt = None
             swap_tx_hash = None
             swap_gas_cost_eth = Decimal('0')
             try:
-                signed_swap_tx = w3.sign_transaction(swap_tx, private_key=account.key)
-                swap_tx_hash = w3.send_raw_transaction(signed_swap_tx.raw_transaction)
+                swap_tx_hash = self.send_transaction(w3, account, swap_call, {
+                    "gas": gas_limit_swap,
+                    "maxFeePerGas": maxFeePerGas,
+                    "maxPriorityFeePerGas": maxPriorityFeePerGas
+                })
                 swap_receipt = w3.wait_for_transaction_receipt(swap_tx_hash)
 
                 # Log swap details
@@ -215,10 +254,27 @@ class UniswapV2Base(Exchange):
                 swap_gas_cost_wei = swap_receipt.gasUsed * swap_receipt.effectiveGasPrice
                 swap_gas_cost_eth = Decimal(swap_gas_cost_wei) / Decimal(10**18)
 
+                allowances = getattr(account, "allowances", None)
+                if allowances is not None:
+                    if swap_receipt.status == 1:
+                        allowances.spend(from_token.address, self.router_address, amount_in_raw)
+                    else:
+                        # Some tokens reset or block allowances; read it again next time
+                        allowances.invalidate(from_token.address, self.router_address)
+
             except Exception as e:
                 event.logger.error(f"Error during swap transaction: {str(e)}")
                 raise
 
+            if not approval_settled:
+                # The approve was sent ahead of the swap (on a lower nonce, so it is mined
+                # by now); book its gas. A failure here only loses the gas accounting,
+                # never the swap
+                try:
+                    approval_gas_cost_eth, _ = self.settle_approval(w3, account, from_token, approval_tx_hash, event)
+                except Exception as e:
+                    event.logger.error(f"Error settling approval {approval_tx_hash}: {str(e)}")
+
             # 9. Gather final info
             try:
                 final_to_balance_raw = to_token_contract.functions.balanceOf(account.address).call()
@@ -233,7 +289,7 @@ class UniswapV2Base(Exchange):
 
             # Return swap info
             result = {
-                "approval_tx_hash":      w3.to_hex(approval_tx_hash) if approval_tx_hash else None,
+                "approval_tx_hash":      approval_tx_hash,
                 "approval_gas_cost_eth": float(approval_gas_cost_eth),
                 "swap_tx_hash":          w3.to_hex(swap_tx_hash),
                 "swap_gas_cost_eth":     float(swap_gas_cost_eth),
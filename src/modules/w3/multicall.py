@@ -0,0 +1,85 @@
+from eth_utils.abi import collapse_if_tuple
+
+# Multicall3 is deployed at the same address on Base, BNB and most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+class MulticallError(Exception):
+    pass
+
+class Multicall:
+    """
+    Queues contract reads and sends them to the chain as a single Multicall3
+    `aggregate3` eth_call, so N reads cost one RPC round trip instead of N.
+
+    Usage:
+        batch = w3.multicall()
+        batch.add(token.contract.functions.decimals())
+        batch.add(pair.pair_contract.functions.getReserves())
+        decimals, reserves = batch.execute()
+    """
+    def __init__(self, w3, multicall_contract):
+        """
+        :param w3: The W3Connector used to decode the return data.
+        :param multicall_contract: A Web3 contract bound to the Multicall3 address.
+        """
+        self.w3 = w3
+        self.contract = multicall_contract
+        self.calls = []
+
+    def __len__(self):
+        return len(self.calls)
+
+    def add(self, contract_function, allow_failure: bool = False) -> int:
+        """
+        Queue a bound contract function (e.g. `contract.functions.decimals()`).
+        Returns the index of its result in the list returned by `execute`.
+        If `allow_failure` is True a revert yields None instead of failing the batch.
+        """
+        output_types = [collapse_if_tuple(output) for output in contract_function.abi["outputs"]]
+        self.calls.append({
+            "target": contract_function.address,
+            "call_data": contract_function._encode_transaction_data(),
+            "output_types": output_types,
+            "allow_failure": allow_failure,
+        })
+        return len(self.calls) - 1
+
+    def add_eth_balance(self, address: str) -> int:
+        """
+        Queue a native ETH balance read (in Wei) through Multicall3's getEthBalance.
+        """
+        return self.add(self.contract.functions.getEthBalance(self.w3.to_checksum_address(address)))
+
+    def execute(self, block_identifier="latest") -> list:
+        """
+        Send every queued call in one `aggregate3` request and return the decoded
+        results in the order they were added. Single-output functions return the bare
+        value and multi-output functions return a list, matching `.call()`.
+        The queue is cleared afterwards so the batch can be reused.
+        """
+        if not self.calls:
+            return []
+        calls, self.calls = self.calls, []
+        aggregate_calls = [
+            (call["target"], call["allow_failure"], call["call_data"])
+            for call in calls
+        ]
+        raw_results = self.contract.functions.aggregate3(aggregate_calls).call(
+            block_identifier=block_identifier
+        )
+
+        results = []
+        for call, (success, return_data) in zip(calls, raw_results):
+            if not success or (not return_data and call["output_types"]):
+                if call["allow_failure"]:
+                    results.append(None)
+                    continue
+                raise MulticallError(f"Call to {call['target']} failed inside multicall")
+            decoded = self.w3.w3.codec.decode(call["output_types"], return_data)
+            # eth_abi returns lowercase addresses, `.call()` returns checksummed ones
+            decoded = [
+                self.w3.to_checksum_address(value) if output_type == "address" else value
+                for output_type, value in zip(call["output_types"], decoded)
+            ]
+            results.append(decoded[0] if len(decoded) == 1 else list(decoded))
+        return results
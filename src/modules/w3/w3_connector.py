@@ -5,6 +5,9 @@ from dotenv import load_dotenv
 import os
 import requests
 from ..utils.retry_request import *
+from ..utils.http_session import get_session, HTTP_TIMEOUT
+from ..utils.ABI import MULTICALL3_ABI
+from .multicall import Multicall, MULTICALL3_ADDRESS
 
 load_dotenv()
 getcontext().prec = 28
@@ -12,8 +15,14 @@ getcontext().prec = 28
 class W3Connector():
     def __init__(self, chain: Chain):
         self.chain = chain
-        self.w3 = Web3(Web3.HTTPProvider(chain.url))
+        # RPC calls go over the host's pooled keep-alive session as well
+        self.w3 = Web3(Web3.HTTPProvider(
+            chain.url, request_kwargs={"timeout": HTTP_TIMEOUT}, session=get_session(chain.url)
+        ))
         self.INFURA_API_KEY = os.getenv("INFURA_API_KEY")
+        self.multicall_contract = self.get_contract_instance(
+            self.to_checksum_address(MULTICALL3_ADDRESS), MULTICALL3_ABI
+        )
 
     def is_connected(self):
         return self.w3.is_connected()
@@ -24,6 +33,10 @@ class W3Connector():
     def get_contract_instance(self, address: str, abi: list):
         return self.w3.eth.contract(address=address, abi=abi)
     
+    def multicall(self) -> Multicall:
+        """Returns an empty Multicall3 batch bound to this connection."""
+        return Multicall(self, self.multicall_contract)
+
     def get_token_decimals(self, address: str):
         if address.lower() == "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee":
             return 18  # "Native" ETH has 18 decimals
@@ -97,8 +110,26 @@ class W3Connector():
     def get_block_number(self):
         return self.w3.eth.get_block_number()
 
-    def get_transaction_count(self, address: str):
-        return self.w3.eth.get_transaction_count(address)
+    def get_block(self, block_identifier="latest"):
+        return self.w3.eth.get_block(block_identifier)
+
+    def get_raw_logs(self, address: str, topics: list, from_block: int, to_block: int) -> list:
+        """
+        eth_getLogs straight through the provider, skipping web3's result formatting.
+        Returns the logs as plain dicts of hex strings (see RawLogDecoder).
+        """
+        response = self.w3.provider.make_request("eth_getLogs", [{
+            "address": address,
+            "topics": topics,
+            "fromBlock": hex(from_block),
+            "toBlock": hex(to_block)
+        }])
+        if "error" in response:
+            raise ValueError(f"eth_getLogs failed: {response['error']}")
+        return response["result"]
+
+    def get_transaction_count(self, address: str, block_identifier="latest"):
+        return self.w3.eth.get_transaction_count(address, block_identifier)
 
     def sign_transaction(self, transaction: dict, private_key: str):
         signed_tx = self.w3.eth.account.sign_transaction(transaction, private_key)
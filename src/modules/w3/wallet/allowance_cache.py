@@ -0,0 +1,44 @@
+import json
+
+MAX_ALLOWANCE = 2**256 - 1
+
+class AllowanceCache:
+    """
+    ERC-20 allowances of one wallet as last read or set by us, shared by the workers in
+    the `Allowance:<owner>` hash (field `<token>:<spender>`). Each entry keeps the
+    amount and, for an approve sent without waiting for its receipt, its tx hash, so
+    the swap that relies on it can check it and book its gas.
+    """
+    def __init__(self, r, owner):
+        """
+        :param r: synchronous Redis client
+        :param owner: wallet address the allowances are granted by
+        """
+        self.r = r
+        self.key = f"Allowance:{owner}"
+
+    @staticmethod
+    def field(token_address, spender):
+        return f"{token_address}:{spender}"
+
+    def get(self, token_address, spender):
+        """(amount, pending approve tx hash or None), or None when not cached."""
+        data = self.r.hget(self.key, self.field(token_address, spender))
+        if data is None:
+            return None
+        entry = json.loads(data)
+        return int(entry["amount"]), entry.get("tx")
+
+    def set(self, token_address, spender, amount, tx=None):
+        entry = {"amount": str(amount), "tx": tx}
+        self.r.hset(self.key, self.field(token_address, spender), json.dumps(entry))
+
+    def spend(self, token_address, spender, amount):
+        """Book a transfer against a cached allowance (an unlimited one stays unlimited)."""
+        cached = self.get(token_address, spender)
+        if cached is not None and cached[0] != MAX_ALLOWANCE:
+            self.set(token_address, spender, max(0, cached[0] - amount), cached[1])
+
+    def invalidate(self, token_address, spender):
+        """Forget an allowance, e.g. after a swap or approve relying on it failed."""
+        self.r.hdel(self.key, self.field(token_address, spender))
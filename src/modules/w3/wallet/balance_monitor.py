@@ -0,0 +1,101 @@
+import multiprocessing
+import threading
+import time
+from ...utils.ABI import MIN_ERC20_ABI
+
+class BalanceView:
+    """
+    Read side of a BalanceMonitor, backed by shared memory so it can be handed to
+    worker processes: reads never touch the network.
+    """
+    def __init__(self):
+        self._eth = multiprocessing.Value("d", 0.0)
+        self._weth = multiprocessing.Value("d", 0.0)
+        self._block = multiprocessing.Value("q", 0)
+        self._updated_at = multiprocessing.Value("d", 0.0)
+        self._refresh_requested = multiprocessing.Event()
+
+    @property
+    def eth(self) -> float:
+        return self._eth.value
+
+    @property
+    def weth(self) -> float:
+        return self._weth.value
+
+    @property
+    def total(self) -> float:
+        """ETH + WETH, the budget the kill switch looks at."""
+        return self._eth.value + self._weth.value
+
+    @property
+    def block(self) -> int:
+        """Block the balances were read at (0 before the first refresh)."""
+        return self._block.value
+
+    @property
+    def updated_at(self) -> float:
+        return self._updated_at.value
+
+    def request_refresh(self):
+        """Ask the monitor to refresh now, e.g. after one of our transactions confirmed."""
+        self._refresh_requested.set()
+
+class BalanceMonitor:
+    """
+    Refreshes the wallet's ETH and WETH balances in a background thread, every
+    `interval` seconds or as soon as a refresh is requested through the view, with a
+    single multicall (ETH balance, WETH balance and block number).
+    Workers get `monitor.view` and read the balances from memory.
+    """
+    def __init__(self, w3, address, weth_address, interval=5):
+        """
+        :param w3: W3Connector used for the refreshes (stays in this process)
+        :param address: wallet address to watch
+        :param weth_address: WETH token on this chain
+        :param interval: seconds between timed refreshes
+        """
+        self.w3 = w3
+        self.address = w3.to_checksum_address(address)
+        self.weth_contract = w3.get_contract_instance(w3.to_checksum_address(weth_address), MIN_ERC20_ABI)
+        self.interval = interval
+        self.view = BalanceView()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        batch = self.w3.multicall()
+        batch.add_eth_balance(self.address)
+        batch.add(self.weth_contract.functions.balanceOf(self.address))
+        batch.add(self.w3.multicall_contract.functions.getBlockNumber())
+        eth_in_wei, weth_in_wei, block = batch.execute()
+        view = self.view
+        view._eth.value = eth_in_wei / 10**18
+        view._weth.value = weth_in_wei / 10**18
+        view._block.value = block
+        view._updated_at.value = time.time()
+
+    def run(self):
+        while True:
+            self.view._refresh_requested.wait(timeout=self.interval)
+            if self._stop.is_set():
+                return
+            # Clear before refreshing so a request made during the refresh is not lost
+            self.view._refresh_requested.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Balance refresh failed: {e}")
+
+    def start(self):
+        """Refresh once synchronously (so the view is valid) and start the background thread."""
+        self.refresh()
+        self._thread = threading.Thread(target=self.run, name="balance-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.view._refresh_requested.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
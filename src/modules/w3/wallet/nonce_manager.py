@@ -0,0 +1,136 @@
+import time
+
+# Hands out the next nonce: a released one first (filling the gap it left), otherwise the
+# counter, incremented, and records it as outstanding until it is sent or released.
+# Returns -1 when the counter was never synced.
+# KEYS[1]: next nonce, KEYS[2]: released nonces (sorted set scored by nonce),
+# KEYS[3]: outstanding reservations (sorted set scored by reservation time); ARGV[1]: now
+RESERVE_SCRIPT = """
+local nonce
+local released = redis.call('ZPOPMIN', KEYS[2])
+if released[1] then
+    nonce = tonumber(released[1])
+elseif redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+else
+    nonce = redis.call('INCR', KEYS[1]) - 1
+end
+redis.call('ZADD', KEYS[3], ARGV[1], nonce)
+return nonce
+"""
+
+# Gives back a nonce that was reserved but never sent. The last nonce handed out just
+# moves the counter back (together with released ones right below it); any other one
+# is kept for the next reservation. Nonces at or above the counter (reserved before a
+# resync) are ignored.
+# KEYS as above; ARGV[1]: nonce
+RELEASE_SCRIPT = """
+local nonce = tonumber(ARGV[1])
+redis.call('ZREM', KEYS[3], nonce)
+local next_nonce = tonumber(redis.call('GET', KEYS[1]))
+if next_nonce == nil or nonce >= next_nonce then return 0 end
+if nonce ~= next_nonce - 1 then
+    redis.call('ZADD', KEYS[2], nonce, nonce)
+    return 1
+end
+while redis.call('ZREM', KEYS[2], nonce - 1) == 1 do
+    nonce = nonce - 1
+end
+redis.call('SET', KEYS[1], nonce)
+return 1
+"""
+
+class NonceManager:
+    """
+    Nonce allocator for one wallet shared by every process sending from it, on a Redis
+    counter: reservations are atomic, so concurrent workers never build two
+    transactions with the same nonce, and no RPC is needed per transaction.
+    The counter is (re)synced from the `pending` transaction count when it is missing,
+    on `resync()` (e.g. after a "nonce too low" error) and by `check()` when it finds a
+    gap that is not closing.
+    A reserved nonce is outstanding until `done` or `release` is called for it.
+    """
+    def __init__(self, r, w3, address, reservation_ttl=60):
+        """
+        :param r: synchronous Redis client
+        :param w3: W3Connector used for the pending transaction count
+        :param address: wallet address (Nonce:<address>)
+        :param reservation_ttl: seconds after which a reservation neither sent nor
+            released no longer counts as outstanding (its process died)
+        """
+        self.r = r
+        self.w3 = w3
+        self.address = w3.to_checksum_address(address)
+        self.key = f"Nonce:{self.address}"
+        self.released_key = f"{self.key}:released"
+        self.reserved_key = f"{self.key}:reserved"
+        self.reservation_ttl = reservation_ttl
+        self.reserve_script = r.register_script(RESERVE_SCRIPT)
+        self.release_script = r.register_script(RELEASE_SCRIPT)
+        self.last_gap = None
+
+    def pending_count(self) -> int:
+        return self.w3.get_transaction_count(self.address, "pending")
+
+    def reserve(self) -> int:
+        """Reserve the next nonce. Pass it to `release` if the transaction is not sent."""
+        keys = [self.key, self.released_key, self.reserved_key]
+        nonce = self.reserve_script(keys=keys, args=[time.time()])
+        if nonce == -1:
+            # First use: only one process initialises the counter
+            self.r.set(self.key, self.pending_count(), nx=True)
+            nonce = self.reserve_script(keys=keys, args=[time.time()])
+        return int(nonce)
+
+    def done(self, nonce: int):
+        """
+        End a reservation without giving the nonce back: its transaction was sent, or
+        the counter was resynced past it.
+        """
+        self.r.zrem(self.reserved_key, nonce)
+
+    def release(self, nonce: int):
+        """Give back a reserved nonce whose transaction was never sent."""
+        self.release_script(keys=[self.key, self.released_key, self.reserved_key], args=[nonce])
+
+    def outstanding(self) -> int:
+        """Reservations made in the last `reservation_ttl` seconds and not yet done or released."""
+        pipe = self.r.pipeline(transaction=True)
+        pipe.zremrangebyscore(self.reserved_key, "-inf", time.time() - self.reservation_ttl)
+        pipe.zcard(self.reserved_key)
+        return pipe.execute()[1]
+
+    def resync(self) -> int:
+        """Reset the counter to the chain's pending transaction count."""
+        pending = self.pending_count()
+        pipe = self.r.pipeline(transaction=True)
+        pipe.set(self.key, pending)
+        pipe.delete(self.released_key)
+        pipe.execute()
+        self.last_gap = None
+        return pending
+
+    def check(self):
+        """
+        Gap detection, for a supervisor calling it every few seconds. Compares the
+        counter with the pending count:
+          - chain ahead (transactions sent from elsewhere): resync right away
+          - counter ahead, unchanged since the last check with no reservation
+            outstanding at either check: a nonce was reserved (or released) but its
+            transaction never reached the node, so every later transaction is stuck
+            behind it; resync. While a reservation is outstanding the gap may just be
+            a transaction being built, or a node behind on its pending count
+        Returns (pending, counter, resynced).
+        """
+        outstanding = self.outstanding()
+        pending = self.pending_count()
+        counter = self.r.get(self.key)
+        if counter is None:
+            return pending, None, False
+        counter = int(counter)
+        gap = (pending, counter) if pending < counter and outstanding == 0 else None
+        if pending > counter or (gap is not None and gap == self.last_gap):
+            self.resync()
+            return pending, counter, True
+        self.last_gap = gap
+        return pending, counter, False
@@ -15,6 +15,11 @@ class Wallet():
         else:
             raise ValueError('Either private_key or mnemonic must be provided')
         self.address = self.wallet.address
+        # Optional NonceManager shared with the other processes using this wallet;
+        # without one every transaction looks its nonce up on the node
+        self.nonces = None
+        # Optional AllowanceCache, saves the allowance() call before each swap
+        self.allowances = None
 
     def get_token_balance(self, token: Token):
         return token.get_balance(self.address)
@@ -0,0 +1,73 @@
+# tests/conftest.py
+
+import time
+from types import SimpleNamespace
+import fakeredis
+import pytest
+
+@pytest.fixture
+def r():
+    """Empty in-memory Redis per test; runs Lua scripts (fakeredis[lua])."""
+    return fakeredis.FakeRedis()
+
+class FakeW3:
+    """
+    W3Connector stand-in shared by the tests. Serves blocks up to `block_number`,
+    contract bytecode from `codes`, token balances (balanceOf through a multicall)
+    from `balances`, where None is a reverted call, ETH balances (add_eth_balance)
+    from `eth_balances`, and `transaction_count` as the wallet's pending transaction
+    count.
+    """
+    chain = SimpleNamespace(name="Test", ws_url=None)
+
+    def __init__(self, block_number=0, rpc_latency=0, codes=None, balances=None, transaction_count=0,
+                 eth_balances=None):
+        self.block_number = block_number
+        self.rpc_latency = rpc_latency
+        self.codes = codes or {}
+        self.balances = balances or {}
+        self.eth_balances = eth_balances or {}
+        self.transaction_count = transaction_count
+        self.multicall_contract = SimpleNamespace(
+            functions=SimpleNamespace(getBlockNumber=lambda: ("getBlockNumber", None))
+        )
+        # Blocks at or above reorg_from get a different hash, as if on another branch
+        self.reorg_from = None
+
+    def block_hash(self, number):
+        branch = "b" if self.reorg_from is not None and number >= self.reorg_from else "a"
+        return f"{branch}{number:063x}"
+
+    def get_block(self, block_identifier):
+        time.sleep(self.rpc_latency)
+        number = self.block_number if block_identifier == "latest" else block_identifier
+        return {
+            "number": number,
+            "hash": self.block_hash(number),
+            "parentHash": self.block_hash(number - 1),
+        }
+
+    def get_transaction_count(self, address, block_identifier="latest"):
+        return self.transaction_count
+
+    def get_contract_bytecode(self, address):
+        return self.codes[address].hex()
+
+    def to_checksum_address(self, address):
+        return address
+
+    def get_contract_instance(self, address, abi):
+        return SimpleNamespace(functions=SimpleNamespace(balanceOf=lambda owner: ("balanceOf", address)))
+
+    def multicall(self):
+        calls = []
+        results = {
+            "balanceOf": lambda address: self.balances[address],
+            "eth": lambda address: self.eth_balances[address],
+            "getBlockNumber": lambda _: self.block_number,
+        }
+        return SimpleNamespace(
+            add=lambda call, allow_failure=False: calls.append(call),
+            add_eth_balance=lambda address: calls.append(("eth", address)),
+            execute=lambda: [results[kind](address) for kind, address in calls],
+        )
@@ -0,0 +1,62 @@
+# tests/test_admission.py
+
+import time
+from types import SimpleNamespace
+from ...modules.w3.event.admission import ThresholdAdmissionController, ADMIT, DEFER, SHED
+from ...modules.w3.event.event_flow.honeypot_timer_flow_base_uniswap_v2 import HoneypotTimerFlowBaseUniswapV2
+
+SIGNALS = {
+    "queue_depth": 3,
+    "event_age": 4.0,
+    "in_flight": 10,
+    "pipeline_in_flight": 4,
+    "rpc_latency": 0.1,
+    "scan_latency": 0.5,
+    "eth_budget": 0.01,
+}
+
+def test_admits_under_limits():
+    controller = ThresholdAdmissionController()
+    assert controller.check(SIGNALS) == (ADMIT, "ok")
+    # Signals not collected yet (first event) don't block admission
+    assert controller.check(dict(SIGNALS, rpc_latency=None, event_age=None)) == (ADMIT, "ok")
+
+def test_sheds_and_defers():
+    controller = ThresholdAdmissionController(max_in_flight=10)
+    assert controller.check(dict(SIGNALS, eth_budget=0.00001)) == (SHED, "eth_budget")
+    assert controller.check(dict(SIGNALS, event_age=600)) == (SHED, "event_age")
+    assert controller.check(dict(SIGNALS, queue_depth=10_000)) == (SHED, "queue_depth")
+    assert controller.check(SIGNALS) == (DEFER, "in_flight")
+    assert controller.check(dict(SIGNALS, in_flight=0, scan_latency=30)) == (DEFER, "scan_latency")
+
+def test_defers_while_pipeline_is_full():
+    controller = ThresholdAdmissionController(max_pipeline_in_flight=4)
+    assert controller.check(SIGNALS) == (DEFER, "pipeline_in_flight")
+    assert controller.check(dict(SIGNALS, pipeline_in_flight=3)) == (ADMIT, "ok")
+
+def test_event_age_rechecked_at_transact():
+    traded = []
+    flow = SimpleNamespace(
+        max_event_age=120, cleanup_logs=lambda address: None,
+        transact=lambda event: traded.append(event) or "Sell scheduled"
+    )
+
+    def event(age):
+        return SimpleNamespace(
+            event_time=time.time() - age, token=SimpleNamespace(address="0xA"),
+            logger=SimpleNamespace(info=print, warning=print, error=print)
+        )
+
+    # Admitted in time, but waited in the pipeline past the limit
+    assert HoneypotTimerFlowBaseUniswapV2.trade(flow, event(300)) is None
+    fresh = event(10)
+    assert HoneypotTimerFlowBaseUniswapV2.trade(flow, fresh) is fresh
+    assert traded == [fresh]
+
+def test_counts_decisions(r):
+    controller = ThresholdAdmissionController(r, "NewToken:test")
+    controller.check(SIGNALS)
+    controller.check(SIGNALS)
+    controller.check(dict(SIGNALS, event_age=600))
+    assert controller.counters == {"admit:ok": 2, "shed:event_age": 1}
+    assert r.hgetall("Admission:NewToken:test") == {b"admit:ok": b"2", b"shed:event_age": b"1"}
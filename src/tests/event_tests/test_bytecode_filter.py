@@ -0,0 +1,34 @@
+# tests/test_bytecode_filter.py
+
+from types import SimpleNamespace
+from ...modules.w3.event.security.bytecode_filter import (
+    BytecodeFilter, BAD, GOOD, TRANSFER_SELECTOR, BALANCE_OF_SELECTOR
+)
+from ..conftest import FakeW3
+
+TOKEN_CODE = b"\x60\x80" + TRANSFER_SELECTOR + BALANCE_OF_SELECTOR + b"\x00" * 2000
+
+def test_heuristics(r):
+    bytecode_filter = BytecodeFilter(r)
+    w3 = FakeW3(codes={"0xToken": TOKEN_CODE, "0xTiny": b"\x60\x80", "0xProxy": b"\x36" * 2000, "0xEOA": b""})
+    assert bytecode_filter.check(w3, "0xToken")[1] is None
+    assert bytecode_filter.check(w3, "0xTiny")[1] == {"verdict": BAD, "reason": "bytecode_size"}
+    assert bytecode_filter.check(w3, "0xProxy")[1]["reason"] == "missing_erc20_selectors"
+    assert bytecode_filter.check(w3, "0xEOA")[1]["reason"] == "no_code"
+    assert int(r.hget(bytecode_filter.rejected_key, "bytecode_size")) == 1
+
+def test_clones_share_verdicts(r):
+    bytecode_filter = BytecodeFilter(r)
+    w3 = FakeW3(codes={"0xA": TOKEN_CODE, "0xB": TOKEN_CODE, "0xC": TOKEN_CODE + b"\x01"})
+    code_hash, verdict = bytecode_filter.check(w3, "0xA")
+    token = SimpleNamespace(address="0xA", code="contract A {}", contract_name="A")
+    bytecode_filter.mark_good(code_hash, token)
+
+    _, verdict = bytecode_filter.check(w3, "0xB")
+    assert verdict["verdict"] == GOOD
+    assert (verdict["code"], verdict["contract_name"]) == ("contract A {}", "A")
+    # Any other bytecode is unknown
+    assert bytecode_filter.check(w3, "0xC")[1] is None
+
+    bytecode_filter.mark_bad(code_hash, "honeypot", "0xB")
+    assert bytecode_filter.check(w3, "0xA")[1]["verdict"] == BAD
@@ -0,0 +1,250 @@
+# tests/test_event_listener.py
+
+import asyncio
+import time
+import fakeredis
+import pytest
+from types import SimpleNamespace
+from ...modules.w3.event.event_listener.event_listener import EventListener
+from ...modules.w3.event.event_listener.log_decoder import PairCreatedDecoder
+from ...modules.w3.event.event_queue import decode_event, retracted_key
+from ...modules.w3.event.event_recorder import EventRecorder
+from ..conftest import FakeW3
+
+class RecordingListener(EventListener):
+    def __init__(self, w3, r, **kwargs):
+        contract = SimpleNamespace(address="0xFactory")
+        super().__init__(w3, r, contract, "PairCreated", "Test", PairCreatedDecoder(), **kwargs)
+        self.fetched = []
+        self.handled = []
+        self.retracted = []
+
+    async def fetch_events(self, start_block, end_block):
+        self.fetched.append((start_block, end_block))
+        return [start_block, end_block]
+
+    async def handle_events(self, events):
+        self.handled.extend(events)
+
+    async def retract(self, entries, block_hashes):
+        self.retracted.extend(entries)
+
+def test_split_range(r):
+    listener = RecordingListener(FakeW3(0), r, max_block_range=10)
+    assert listener.split_range(1, 25) == [(1, 10), (11, 20), (21, 25)]
+    assert listener.split_range(5, 5) == [(5, 5)]
+
+def test_starts_at_head_without_checkpoint(r):
+    listener = RecordingListener(FakeW3(100), r)
+    asyncio.run(listener.poll_once())
+    assert listener.fetched == [(100, 100)]
+    assert r.get("Checkpoint:Test:Test:0xFactory") == b"100"
+
+def test_backfills_from_checkpoint_in_order(r):
+    r.set("Checkpoint:Test:Test:0xFactory", 50)
+    listener = RecordingListener(FakeW3(100), r, max_block_range=10, backfill_concurrency=2)
+    asyncio.run(listener.poll_once())
+    assert listener.fetched[0] == (51, 60)
+    assert listener.fetched[-1] == (91, 100)
+    assert len(listener.fetched) == 5
+    assert listener.handled == sorted(listener.handled)
+    assert listener.last_processed_block == 100
+    assert r.get("Checkpoint:Test:Test:0xFactory") == b"100"
+
+def test_slow_rpc_does_not_block_other_listeners():
+    listeners = [RecordingListener(FakeW3(100, rpc_latency=0.3), fakeredis.FakeRedis()) for _ in range(3)]
+
+    async def poll_all():
+        await asyncio.gather(*(listener.poll_once() for listener in listeners))
+
+    start = time.monotonic()
+    asyncio.run(poll_all())
+    assert time.monotonic() - start < 0.6
+    assert all(listener.last_processed_block == 100 for listener in listeners)
+
+def test_checkpoint_named_after_the_queue_chain(r):
+    # Saved under the chain class's name ("Test") before the key followed the config
+    r.set("Checkpoint:Test:Test:0xFactory", 90)
+    listener = RecordingListener(FakeW3(100), r, chain_name="base", queue="NewToken:base")
+    asyncio.run(listener.poll_once())
+    assert listener.fetched == [(91, 100)]
+    assert r.get("Checkpoint:base:Test:0xFactory") == b"100"
+    # From now on the new key wins
+    r.set("Checkpoint:base:Test:0xFactory", 95)
+    assert asyncio.run(listener.load_checkpoint()) == 95
+
+def test_confirmations_hold_back_head(r):
+    listener = RecordingListener(FakeW3(100), r, confirmations=3)
+    asyncio.run(listener.poll_once())
+    assert listener.last_processed_block == 97
+
+def test_reorg_retracts_orphaned_events_and_rewinds(r):
+    w3 = FakeW3(100)
+    listener = RecordingListener(w3, r)
+    asyncio.run(listener.poll_once())
+    w3.block_number = 105
+    asyncio.run(listener.poll_once())
+    # An event was published from block 103 on the original branch
+    listener.recent_blocks[103] = {"hash": w3.block_hash(103), "events": [("Seen:x", "payload")]}
+
+    w3.reorg_from = 103
+    w3.block_number = 106
+    asyncio.run(listener.poll_once())
+
+    assert listener.retracted == [("Seen:x", "payload")]
+    # Block 100 is the newest recorded block still canonical, so 101-106 are fetched again
+    assert listener.fetched[-1] == (101, 106)
+    assert listener.recent_blocks[106]["hash"] == w3.block_hash(106)
+    assert listener.last_processed_block == 106
+
+def publisher(r, queue="NewToken:test", transport="list", **kwargs):
+    """Listener that publishes for real, to `r`."""
+    contract = SimpleNamespace(address="0xFactory")
+    return EventListener(FakeW3(100), r, contract, "PairCreated", "Test", PairCreatedDecoder(),
+                         queue=queue, transport=transport, **kwargs)
+
+def created(tx, log_index, block=100):
+    return {
+        "blockNumber": block,
+        "blockHash": f"{block:064x}",
+        "transactionHash": tx * 64,
+        "logIndex": log_index,
+        "token0": "0x4200000000000000000000000000000000000006",
+        "token1": f"0x{log_index + 1:040x}",
+        "pair": f"0x{log_index + 2:040x}",
+    }
+
+def test_publish_suppresses_duplicates(r):
+    listener = publisher(r)
+    assert asyncio.run(listener.handle_events([created("a", 0), created("a", 1)])) == 2
+    # A re-polled range: (tx, logIndex) already seen is dropped, a new log goes through
+    assert asyncio.run(listener.handle_events([created("a", 1), created("b", 0)])) == 1
+    queued = [decode_event(payload) for payload in r.lrange("NewToken:test", 0, -1)]
+    assert sorted((event["transactionHash"][0], event["token1"][-1]) for event in queued) == [
+        ("a", "1"), ("a", "2"), ("b", "1")
+    ]
+    # Dedup is per queue: another chain's queue gets the same log
+    assert asyncio.run(publisher(r, queue="NewToken:other").handle_events([created("a", 0)])) == 1
+
+def test_stream_publish_suppresses_duplicates(r):
+    listener = publisher(r, transport="stream")
+    assert asyncio.run(listener.handle_events([created("a", 0), created("a", 0), created("a", 1)])) == 2
+    assert r.xlen("NewToken:test") == 2
+    # Stream entries are remembered by ID for a reorg retraction
+    handles = [handle for _, handle in listener.recent_blocks[100]["events"]]
+    assert [entry_id.decode() for entry_id, _ in r.xrange("NewToken:test")] == handles
+
+@pytest.mark.parametrize("transport", ["list", "stream"])
+def test_recorder_gets_only_pushed_events(r, tmp_path, transport):
+    recorder = EventRecorder(str(tmp_path / "events.jsonl"))
+    listener = publisher(r, transport=transport, recorder=recorder)
+    asyncio.run(listener.handle_events([created("a", 0), created("a", 1)]))
+    # An overlapping re-poll: only the new log is pushed, and recorded
+    asyncio.run(listener.handle_events([created("a", 1), created("b", 0)]))
+    recorder.close()
+    lines = EventRecorder.load(recorder.path)
+    assert [line["queue"] for line in lines] == ["NewToken:test"] * 3
+    assert [(line["event"]["transactionHash"][0], line["event"]["token1"][-1]) for line in lines] == [
+        ("a", "1"), ("a", "2"), ("b", "1")
+    ]
+
+class FakeWebsocket:
+    """AsyncWeb3 over a websocket that delivers `messages` and then closes."""
+    def __init__(self, messages, subscriptions):
+        self.eth = SimpleNamespace(subscribe=self.subscribe)
+        self.socket = SimpleNamespace(process_subscriptions=self.process_subscriptions)
+        self.messages = messages
+        self.subscriptions = subscriptions
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def subscribe(self, kind, params=None):
+        self.subscriptions.append(kind)
+
+    async def process_subscriptions(self):
+        for message in self.messages:
+            yield message
+
+class SocketListener(EventListener):
+    """
+    Publishes for real; the socket delivers `messages` (None: can't connect) and the
+    catch-up finds nothing.
+    """
+    def __init__(self, w3, r, messages=(), **kwargs):
+        contract = SimpleNamespace(address="0xFactory")
+        super().__init__(w3, r, contract, "PairCreated", "Test", PairCreatedDecoder(),
+                         ws_url="ws://node", queue="NewToken:test", **kwargs)
+        self.messages = messages
+        self.subscriptions = []
+        self.connections = 0
+        self.fetched = []
+
+    def ws_connection(self):
+        self.connections += 1
+        if self.messages is None:
+            raise ConnectionError("Connection refused")
+        return FakeWebsocket(self.messages, self.subscriptions)
+
+    async def fetch_events(self, start_block, end_block):
+        self.fetched.append((start_block, end_block))
+        return []
+
+def pair_log(tx, block, removed=False):
+    """PairCreated log as eth_subscribe delivers it (formatted by web3)."""
+    decoder = PairCreatedDecoder()
+    token1 = f"{ord(tx):040x}"
+    return {"result": {
+        "topics": [decoder.topic, "0x" + "0" * 24 + "4200000000000000000000000000000000000006", "0x" + "0" * 24 + token1],
+        "data": "0x" + "0" * 24 + "ab" * 20 + f"{1:064x}",
+        "blockNumber": block,
+        "blockHash": f"0x{block:064x}",
+        "transactionHash": "0x" + tx * 64,
+        "logIndex": 0,
+        "removed": removed,
+    }}
+
+def queued(r):
+    return sorted(decode_event(payload)["transactionHash"][0] for payload in r.lrange("NewToken:test", 0, -1))
+
+def test_subscription_skips_logs_covered_by_the_catch_up(r):
+    listener = SocketListener(FakeW3(100), r, [pair_log("a", 100), pair_log("b", 101)])
+    with pytest.raises(ConnectionError):
+        asyncio.run(listener.subscribe_loop())
+    assert listener.subscriptions == ["logs"]
+    # The catch-up ran up to the head before the socket's logs were handled
+    assert listener.fetched == [(100, 100)]
+    assert queued(r) == ["b"]
+    # Other logs of block 101 may still come, so only 100 is complete
+    assert r.get("Checkpoint:Test:Test:0xFactory") == b"100"
+
+def test_removed_log_is_retracted_and_rewinds(r):
+    messages = [
+        pair_log("a", 102), pair_log("b", 103),
+        # Block 102 was reorged out; its replacement carries another log
+        pair_log("a", 102, removed=True), pair_log("c", 102),
+    ]
+    listener = SocketListener(FakeW3(100), r, messages)
+    with pytest.raises(ConnectionError):
+        asyncio.run(listener.subscribe_loop())
+    assert queued(r) == ["b", "c"]
+    assert r.smembers(retracted_key("NewToken:test")) == {f"{102:064x}".encode()}
+    # The dedup key is gone too, so "a" goes out again if it lands in the new branch
+    assert not r.exists(f"Seen:NewToken:test:0x{'a' * 64}:0")
+    assert listener.last_processed_block == 101
+
+def test_falls_back_to_polling_after_ws_max_failures(r):
+    listener = SocketListener(FakeW3(100), r, None, ws_max_failures=1, ws_retry_interval=0.05)
+
+    async def run_briefly():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(listener.run(), timeout=0.3)
+
+    asyncio.run(run_briefly())
+    # Polled in between socket attempts
+    assert listener.connections >= 2
+    assert listener.fetched[0] == (100, 100)
+    assert listener.last_processed_block == 100
@@ -0,0 +1,37 @@
+# tests/test_event_queue.py
+
+import json
+import pytest
+from ...modules.w3.event.event_queue import encode_event, decode_event, WIRE_VERSION
+
+PAYLOAD = {
+    "blockNumber": 20_000_000,
+    "blockHash": "ab" * 32,
+    "transactionHash": "cd" * 32,
+    "token0": "0x4200000000000000000000000000000000000006",
+    "token1": "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913",
+    "pair": "0x88A43bbDF9D098eEC7bCEda4e2494615dfD9bB9C",
+}
+
+def test_wire_format_round_trip():
+    for payload in (PAYLOAD, dict(PAYLOAD, source="UniswapV2")):
+        message = encode_event(payload)
+        assert message[0] == WIRE_VERSION
+        assert len(message) < len(json.dumps(payload))
+        assert decode_event(message) == payload
+
+def test_json_messages_still_read():
+    # Published by listeners from before the wire format, as bytes or str
+    message = json.dumps(dict(PAYLOAD, source="UniswapV2"))
+    assert decode_event(message.encode()) == json.loads(message)
+    assert decode_event(message) == json.loads(message)
+
+def test_payloads_outside_the_format_fall_back_to_json():
+    for payload in (dict(PAYLOAD, fee=3000), dict(PAYLOAD, pair=None)):
+        message = encode_event(payload)
+        assert message.startswith(b"{")
+        assert decode_event(message) == payload
+
+def test_unknown_version_rejected():
+    with pytest.raises(ValueError):
+        decode_event(bytes([WIRE_VERSION + 1]) + encode_event(PAYLOAD)[1:])
@@ -0,0 +1,107 @@
+# tests/test_event_transport.py
+
+import time
+from ...modules.w3.event.event_queue import encode_event
+from ...modules.w3.event.event_transport import ListTransport, StreamTransport, dead_letter_key
+
+QUEUE = "NewToken:test"
+
+def publish(r, token1):
+    event = {"blockNumber": 1, "token0": "0x4200000000000000000000000000000000000006", "token1": token1}
+    return r.xadd(QUEUE, {"event": encode_event(event)})
+
+def test_receive_and_ack(r):
+    transport = StreamTransport(r, QUEUE, consumer="a")
+    publish(r, "0xA")
+    publish(r, "0xB")
+    assert transport.depth() == 2
+    handle, event = transport.receive(timeout=0.01)
+    assert event["token1"] == "0xA"
+    assert transport.depth() == 1
+    assert r.xpending(QUEUE, "workers")["pending"] == 1
+    transport.ack(handle)
+    assert r.xpending(QUEUE, "workers")["pending"] == 0
+
+def test_entries_of_a_dead_consumer_are_claimed(r):
+    dead = StreamTransport(r, QUEUE, consumer="dead", claim_idle=0.05)
+    alive = StreamTransport(r, QUEUE, consumer="alive", claim_idle=0.05)
+    handle = publish(r, "0xA")
+    dead.receive(timeout=0.01)
+    # Not idle for long enough yet, and nothing new to read
+    assert alive.receive(timeout=0.01) is None
+    time.sleep(0.06)
+    assert alive.receive(timeout=0.01) == (handle, {"blockNumber": 1, "token0": "0x4200000000000000000000000000000000000006", "token1": "0xA"})
+    alive.ack(handle)
+    assert r.xpending(QUEUE, "workers")["pending"] == 0
+
+def test_deleted_pending_entries_are_skipped(r):
+    dead = StreamTransport(r, QUEUE, consumer="dead", claim_idle=0.05)
+    alive = StreamTransport(r, QUEUE, consumer="alive", claim_idle=0.05)
+    handle = publish(r, "0xA")
+    dead.receive(timeout=0.01)
+    # Retracted after a reorg while the consumer holding it was down
+    r.xdel(QUEUE, handle)
+    time.sleep(0.06)
+    assert alive.receive(timeout=0.01) is None
+    assert r.xpending(QUEUE, "workers")["pending"] == 0
+
+def test_refresh_keeps_held_entries(r):
+    busy = StreamTransport(r, QUEUE, consumer="busy", claim_idle=0.1)
+    other = StreamTransport(r, QUEUE, consumer="other", claim_idle=0.1)
+    handle = publish(r, "0xA")
+    busy.receive(timeout=0.01)
+    for _ in range(4):
+        time.sleep(0.04)
+        assert busy.refresh() == 1
+        assert other.receive(timeout=0.01) is None
+    busy.ack(handle)
+    assert busy.refresh() == 0
+
+def test_refresh_leaves_entries_claimed_elsewhere(r):
+    slow = StreamTransport(r, QUEUE, consumer="slow", claim_idle=0.05)
+    other = StreamTransport(r, QUEUE, consumer="other", claim_idle=0.05)
+    handle = publish(r, "0xA")
+    slow.receive(timeout=0.01)
+    time.sleep(0.06)
+    assert other.receive(timeout=0.01)[0] == handle
+    assert slow.refresh() == 0
+    assert r.xpending_range(QUEUE, "workers", "-", "+", 1)[0]["consumer"] == b"other"
+
+def test_requeue_moves_the_entry_to_the_end(r):
+    transport = StreamTransport(r, QUEUE, consumer="a")
+    handle = publish(r, "0xA")
+    publish(r, "0xB")
+    transport.receive(timeout=0.01)
+    transport.requeue(handle)
+    assert [transport.receive(timeout=0.01)[1]["token1"] for _ in range(2)] == ["0xB", "0xA"]
+    assert transport.refresh() == 2
+
+def test_undecodable_entry_is_dead_lettered(r):
+    transport = StreamTransport(r, QUEUE, consumer="a")
+    # Wire format version 9, from a newer listener
+    bad = r.xadd(QUEUE, {"event": b"\x09" + b"\x00" * 40})
+    publish(r, "0xA")
+    assert transport.receive(timeout=0.01) is None
+    assert r.xpending(QUEUE, "workers")["pending"] == 0
+    [(_, fields)] = r.xrange(dead_letter_key(QUEUE))
+    assert fields[b"id"] == bad and fields[b"reason"].startswith(b"undecodable")
+    assert transport.receive(timeout=0.01)[1]["token1"] == "0xA"
+
+def test_redelivery_is_capped(r):
+    consumers = [StreamTransport(r, QUEUE, consumer=f"c{i}", claim_idle=0.05, max_deliveries=2) for i in range(3)]
+    handle = publish(r, "0xA")
+    # Every consumer it is delivered to dies while handling it
+    assert consumers[0].receive(timeout=0.01)[0] == handle
+    time.sleep(0.06)
+    assert consumers[1].receive(timeout=0.01)[0] == handle
+    time.sleep(0.06)
+    assert consumers[2].receive(timeout=0.01) is None
+    assert r.xpending(QUEUE, "workers")["pending"] == 0
+    [(_, fields)] = r.xrange(dead_letter_key(QUEUE))
+    assert fields[b"reason"] == b"max_deliveries"
+
+def test_list_undecodable_entry_is_dead_lettered(r):
+    transport = ListTransport(r, QUEUE)
+    r.lpush(QUEUE, b"\x09garbage")
+    assert transport.receive(timeout=0.01) is None
+    assert r.lrange(dead_letter_key(QUEUE), 0, -1) == [b"\x09garbage"]
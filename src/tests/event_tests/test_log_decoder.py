@@ -0,0 +1,85 @@
+# tests/test_log_decoder.py
+
+import pytest
+from eth_abi import encode
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from ...modules.utils.ABI import UNISWAP_V2_FACTORY_ABI, UNISWAP_V3_FACTORY_ABI
+from ...modules.w3.event.event_listener.log_decoder import RawLogDecoder, PairCreatedDecoder, PoolCreatedDecoder
+
+FACTORY = "0x8909Dc15e40173Ff4699343b6eB8132c65e18eC6"
+TOKEN0 = "0x4200000000000000000000000000000000000006"
+TOKEN1 = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
+PAIR = "0x88A43bbDF9D098eEC7bCEda4e2494615dfD9bB9C"
+
+def topic_address(address):
+    return HexBytes(encode(["address"], [address]))
+
+def make_log(topics, data, log_index=3):
+    return AttributeDict({
+        "address": FACTORY,
+        "topics": topics,
+        "data": HexBytes(data),
+        "blockNumber": 1234,
+        "blockHash": HexBytes("0x" + "ab" * 32),
+        "transactionHash": HexBytes("0x" + "cd" * 32),
+        "transactionIndex": 0,
+        "logIndex": log_index,
+        "removed": False,
+    })
+
+def as_raw_json(log):
+    """The same log as eth_getLogs returns it over JSON-RPC, before web3 formatting."""
+    return {
+        "topics": ["0x" + topic.hex() for topic in log["topics"]],
+        "data": "0x" + log["data"].hex(),
+        "blockNumber": hex(log["blockNumber"]),
+        "blockHash": "0x" + log["blockHash"].hex(),
+        "transactionHash": "0x" + log["transactionHash"].hex(),
+        "logIndex": hex(log["logIndex"]),
+    }
+
+def test_pair_created_matches_web3():
+    decoder = PairCreatedDecoder()
+    log = make_log(
+        [HexBytes(decoder.topic), topic_address(TOKEN0), topic_address(TOKEN1)],
+        encode(["address", "uint256"], [PAIR, 42]),
+    )
+    contract = Web3().eth.contract(address=FACTORY, abi=UNISWAP_V2_FACTORY_ABI)
+    expected = contract.events.PairCreated().process_log(log)
+
+    for event in (decoder.decode([log])[0], decoder.decode([as_raw_json(log)])[0]):
+        assert event["token0"] == expected.args.token0
+        assert event["token1"] == expected.args.token1
+        assert event["pair"] == expected.args.pair
+        assert event["blockNumber"] == 1234
+        assert event["logIndex"] == 3
+        assert event["blockHash"] == expected.blockHash.hex()
+        assert event["transactionHash"] == expected.transactionHash.hex()
+
+def test_pool_created_matches_web3():
+    decoder = PoolCreatedDecoder()
+    log = make_log(
+        [HexBytes(decoder.topic), topic_address(TOKEN0), topic_address(TOKEN1), HexBytes(encode(["uint24"], [3000]))],
+        encode(["int24", "address"], [-60, PAIR]),
+    )
+    contract = Web3().eth.contract(address=FACTORY, abi=UNISWAP_V3_FACTORY_ABI)
+    expected = contract.events.PoolCreated().process_log(log)
+
+    event = decoder.decode([as_raw_json(log)])[0]
+    assert event["pair"] == expected.args.pool
+    assert event["fee"] == expected.args.fee
+    assert event["tickSpacing"] == expected.args.tickSpacing
+
+def test_decode_skips_other_topics():
+    decoder = PairCreatedDecoder()
+    other = make_log([HexBytes("0x" + "00" * 32)], b"")
+    assert decoder.decode([other]) == []
+
+def test_decoder_without_decode_args_is_rejected():
+    class Incomplete(RawLogDecoder):
+        signature = "Sync(uint112,uint112)"
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,24 @@
+# tests/test_metrics.py
+
+import time
+from ...modules.utils.metrics import StageTimer, summarize
+
+def test_summarize():
+    assert summarize([]) == {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    summary = summarize([float(n) for n in range(1, 101)])
+    assert (summary["count"], summary["mean"], summary["p50"], summary["p95"], summary["max"]) == (100, 50.5, 50, 95, 100)
+
+def test_stage_timer_laps():
+    timer = StageTimer(max_samples=3)
+    for delay in (0.01, 0.02, 0.03, 0.04):
+        timer.start()
+        time.sleep(delay)
+        timer.lap("token")
+    timer.start()
+    timer.lap("token")
+    # A run that stopped early leaves the later stages out of `last`
+    assert list(timer.last) == ["token"]
+    assert timer.summary()["token"]["count"] == 3
+    assert 0.03 <= timer.recent("token") < 0.04
+    assert timer.recent("pair") is None
+    assert "pair" not in timer.summary()
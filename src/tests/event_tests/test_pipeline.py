@@ -0,0 +1,62 @@
+# tests/test_pipeline.py
+
+import queue
+import threading
+import time
+import pytest
+from ...modules.w3.event.event_flow.pipeline import Pipeline, Stage
+
+def test_cheap_stage_drains_while_slow_stage_works():
+    done = []
+
+    def cheap_filter(n):
+        # Rejects odd numbers immediately
+        return n if n % 2 == 0 else None
+
+    def slow_stage(n):
+        time.sleep(0.05)
+        done.append(n)
+        return n
+
+    pipeline = Pipeline([
+        Stage("filter", cheap_filter, concurrency=2),
+        Stage("slow", slow_stage, concurrency=2, max_queue=100),
+    ]).start()
+    start = time.time()
+    for n in range(40):
+        pipeline.submit(n)
+    # Submitting never waited on the slow stage
+    assert time.time() - start < 0.5
+    pipeline.stop()
+
+    assert sorted(done) == list(range(0, 40, 2))
+    metrics = pipeline.metrics()
+    assert metrics["filter"]["received"] == 40
+    assert metrics["filter"]["passed"] == 20
+    assert metrics["filter"]["rejected"] == 20
+    assert metrics["slow"]["passed"] == 20
+    assert metrics["slow"]["per_minute"] > 0
+    assert pipeline.recent("slow") >= 0.05
+
+def test_errors_are_counted_and_dropped():
+    def failing(n):
+        raise ValueError("boom")
+
+    pipeline = Pipeline([Stage("failing", failing)]).start()
+    pipeline.submit(1)
+    pipeline.stop()
+    assert pipeline.metrics()["failing"]["errors"] == 1
+
+def test_queues_hold_one_item_per_thread():
+    release = threading.Event()
+    pipeline = Pipeline([Stage("slow", lambda n: release.wait(), concurrency=1)]).start()
+    pipeline.submit(1)
+    pipeline.submit(2)
+    time.sleep(0.05)
+    # One item handled, one queued, the next one has to wait in Redis
+    assert pipeline.in_flight() == 2
+    with pytest.raises(queue.Full):
+        pipeline.submit(3, timeout=0.05)
+    release.set()
+    pipeline.stop()
+    assert pipeline.in_flight() == 0
@@ -0,0 +1,58 @@
+# tests/test_position_store.py
+
+import json
+from ...modules.w3.event.position_store import (
+    PositionStore, recover_positions, BUYING, BOUGHT, SELL_SCHEDULED, SOLD, FAILED, CLOSED
+)
+from ...modules.w3.event.sell_scheduler import SellScheduler
+from ..conftest import FakeW3
+
+def test_lifecycle(r):
+    positions = PositionStore(r)
+    positions.update("0xA", BUYING, job={"event": {}})
+    positions.update("0xA", BOUGHT, successful_buy_hashes=["0x1"])
+    assert [p["token"] for p in positions.open_positions()] == ["0xA"]
+
+    position = positions.update("0xA", SOLD, amount_out=0.0003)
+    assert [state for state, _ in position["history"]] == [BUYING, BOUGHT, SOLD]
+    assert position["successful_buy_hashes"] == ["0x1"]
+    assert positions.open_positions() == []
+
+def job(token):
+    return {"event": {"token": token}, "total_buy_gas_cost_eth": "0"}
+
+def test_recovery(r):
+    positions = PositionStore(r)
+    scheduler = SellScheduler(r)
+    kept = scheduler.schedule(job("0xKept"), due=0)
+    positions.update("0xNever", BUYING, job=job("0xNever"))
+    positions.update("0xGone", SELL_SCHEDULED, job=job("0xGone"), job_member="lost")
+    positions.update("0xKept", SELL_SCHEDULED, job=job("0xKept"), job_member=kept)
+    positions.update("0xLost", BOUGHT, job=job("0xLost"))
+    w3 = FakeW3(balances={"0xNever": 0, "0xGone": 0, "0xKept": 10, "0xLost": 10})
+
+    summary = recover_positions(positions, scheduler, w3, "0xWallet")
+    assert summary == {FAILED: 1, CLOSED: 1, "kept": 1, "rescheduled": 1}
+    assert positions.get("0xNever")["state"] == FAILED
+    assert positions.get("0xGone")["state"] == CLOSED
+    assert positions.get("0xLost")["state"] == SELL_SCHEDULED
+    [(member, rescheduled)] = [
+        (member, json.loads(member)) for member in r.zrange(scheduler.key, 0, -1) if member.decode() != kept
+    ]
+    assert rescheduled == job("0xLost")
+    assert positions.get("0xLost")["job_member"] == member.decode()
+    # Nothing left to recover on the next start
+    assert recover_positions(positions, scheduler, w3, "0xWallet") == {"kept": 2}
+
+def test_reverted_balance_leaves_position_open(r):
+    positions = PositionStore(r)
+    scheduler = SellScheduler(r)
+    positions.update("0xOdd", BOUGHT, job=job("0xOdd"))
+    # balanceOf reverted (e.g. a paused token, or a node hiccup)
+    w3 = FakeW3(balances={"0xOdd": None})
+    assert recover_positions(positions, scheduler, w3, "0xWallet") == {"unknown": 1}
+    assert positions.get("0xOdd")["state"] == BOUGHT
+    assert scheduler.pending() == 0
+
+    w3.balances["0xOdd"] = 10
+    assert recover_positions(positions, scheduler, w3, "0xWallet") == {"rescheduled": 1}
@@ -0,0 +1,132 @@
+# tests/test_sell_scheduler.py
+
+import logging
+from decimal import Decimal
+from types import SimpleNamespace
+from ...modules.w3.event import position_store
+from ...modules.w3.event.honeypot_event import HoneypotEvent
+from ...modules.w3.event.position_store import PositionStore
+from ...modules.w3.event.security.bytecode_filter import BytecodeFilter, BAD
+from ...modules.w3.event.sell_scheduler import SellScheduler
+from ...modules.w3.event.event_flow.honeypot_timer_flow_base_uniswap_v2 import HoneypotTimerFlowBaseUniswapV2
+
+def test_claim_and_lease(r):
+    scheduler = SellScheduler(r, lease=60)
+    first = scheduler.schedule({"token": "0xA"}, due=100)
+    scheduler.schedule({"token": "0xB"}, due=200)
+    assert scheduler.claim(now=150) == [(first.encode(), {"token": "0xA"})]
+    assert scheduler.claim(now=150) == []
+    # The worker holding 0xA died: its lease runs out at 210, before 0xB's is taken
+    assert [job for _, job in scheduler.claim(now=211)] == [{"token": "0xA"}]
+    assert scheduler.pending() == 2
+
+def test_retry_then_drop(r):
+    scheduler = SellScheduler(r, retry_delay=30, max_retries=2)
+    member = scheduler.schedule({"token": "0xA"}, due=100)
+    for now in (100, 130):
+        [(claimed, _)] = scheduler.claim(now=now)
+        assert scheduler.retry(claimed, now=now)
+        assert r.zscore(scheduler.key, member) == now + 30
+    [(claimed, _)] = scheduler.claim(now=160)
+    assert not scheduler.retry(claimed, now=160)
+    assert scheduler.pending() == 0
+    assert not r.exists(scheduler.attempts_key)
+
+def flow_stub(scheduler, handle_sell):
+    return SimpleNamespace(
+        sell_scheduler=scheduler, handle_sell=handle_sell, general_error_logger=logging.getLogger("test")
+    )
+
+def test_due_sells_are_claimed_one_at_a_time(r):
+    scheduler = SellScheduler(r, lease=60)
+    for token in ("0xA", "0xB", "0xC"):
+        scheduler.schedule({"token": token}, due=0)
+    inflight = []
+
+    def handle_sell(job):
+        inflight.append(r.zcard(scheduler.inflight_key))
+
+    flow = flow_stub(scheduler, handle_sell)
+    assert HoneypotTimerFlowBaseUniswapV2.handle_due_sells(flow, limit=2) == 2
+    # Only the job being sold is leased; the rest wait on the schedule
+    assert inflight == [1, 1]
+    assert scheduler.pending() == 1
+
+def test_failed_sell_is_rescheduled(r):
+    scheduler = SellScheduler(r)
+    member = scheduler.schedule({"token": "0xA"}, due=0)
+
+    def handle_sell(job):
+        raise ConnectionError("RPC timeout")
+
+    assert HoneypotTimerFlowBaseUniswapV2.handle_due_sells(flow_stub(scheduler, handle_sell)) == 1
+    assert scheduler.contains(member)
+    assert r.zcard(scheduler.inflight_key) == 0
+
+class SellFlow:
+    """The flow's sell path on a fake exchange, with a real PositionStore and BytecodeFilter."""
+    SLIPPAGE_VALUES = [3, 5]
+    sell = HoneypotTimerFlowBaseUniswapV2.sell
+    handle_due_sells = HoneypotTimerFlowBaseUniswapV2.handle_due_sells
+    record_position = HoneypotTimerFlowBaseUniswapV2.record_position
+    record_verdict = HoneypotTimerFlowBaseUniswapV2.record_verdict
+
+    def __init__(self, r, swap_tokens, balance=5.0):
+        self.w3 = None
+        self.exchange = SimpleNamespace(swap_tokens=swap_tokens)
+        self.account = SimpleNamespace(address="0xWallet")
+        self.weth = SimpleNamespace(address="0xWETH")
+        self.positions = PositionStore(r)
+        self.sell_scheduler = SellScheduler(r)
+        self.bytecode_filter = BytecodeFilter(r)
+        self.general_error_logger = logging.getLogger("test")
+        self.balance = balance
+
+    def event(self):
+        token = SimpleNamespace(address="0xToken", code="", get_balance=lambda address: self.balance)
+        event = HoneypotEvent(token, logging.getLogger("test"))
+        event.pair = SimpleNamespace(pair_address="0xPair")
+        event.amount_in = 0.0002
+        event.code_hash = "c0de"
+        return event
+
+    def handle_sell(self, job):
+        self.sell(self.event(), Decimal(job["total_buy_gas_cost_eth"]))
+
+    def liquidity_check_usd(self, event):
+        return 1000
+
+def test_sell_that_never_reached_a_receipt_is_retried(r):
+    def swap_tokens(**kwargs):
+        raise ConnectionError("Gas API unavailable")
+
+    flow = SellFlow(r, swap_tokens)
+    member = flow.sell_scheduler.schedule({"total_buy_gas_cost_eth": "0"}, due=0)
+    assert flow.handle_due_sells() == 1
+    # Still open and selling, with the job back on the schedule
+    assert flow.positions.get("0xToken")["state"] == position_store.SELLING
+    assert [p["token"] for p in flow.positions.open_positions()] == ["0xToken"]
+    assert flow.sell_scheduler.contains(member)
+    # An outage says nothing about the token's code
+    assert flow.bytecode_filter.lookup("c0de") is None
+
+def test_sell_without_tokens_is_not_a_honeypot_verdict(r):
+    def swap_tokens(**kwargs):
+        raise ValueError("Insufficient balance")
+
+    flow = SellFlow(r, swap_tokens, balance=0)
+    flow.sell_scheduler.schedule({"total_buy_gas_cost_eth": "0"}, due=0)
+    flow.handle_due_sells()
+    position = flow.positions.get("0xToken")
+    assert (position["state"], position["fail_reason"]) == (position_store.FAILED, "No tokens received")
+    assert flow.bytecode_filter.lookup("c0de") is None
+
+def test_reverted_sell_fails_the_position(r):
+    flow = SellFlow(r, lambda **kwargs: {"swap_status": 0, "swap_tx_hash": "0xsell"})
+    member = flow.sell_scheduler.schedule({"total_buy_gas_cost_eth": "0"}, due=0)
+    assert flow.handle_due_sells() == 1
+    position = flow.positions.get("0xToken")
+    assert (position["state"], position["fail_reason"]) == (position_store.FAILED, "Unknown error")
+    assert flow.positions.open_positions() == []
+    assert not flow.sell_scheduler.contains(member)
+    assert flow.bytecode_filter.lookup("c0de")["verdict"] == BAD
@@ -0,0 +1,67 @@
+# tests/test_async_scanner.py
+
+import asyncio
+import time
+from ...modules.w3.chains.scanner.chain_scanner import ChainScanner
+from ...modules.w3.chains.scanner.scanner_cache import ScannerCache
+from ...modules.w3.chains.scanner.async_scanner import AsyncChainScanner
+
+class SlowScanner(ChainScanner):
+    """Answers after `latency` seconds instead of BaseScan and records the requests."""
+    def __init__(self, cache=None, latency=0.1):
+        super().__init__(cache)
+        self.latency = latency
+        self.requests = []
+
+    def fetch_contract_source_code_and_name(self, contract_address):
+        self.requests.append(("source", contract_address))
+        time.sleep(self.latency)
+        return f"contract {contract_address}", "Token"
+
+    def fetch_contract_creations(self, contract_addresses):
+        self.requests.append(("creation", tuple(contract_addresses)))
+        time.sleep(self.latency)
+        return [{"contractAddress": address.lower(), "txHash": "0x1"} for address in contract_addresses]
+
+def test_identical_lookups_share_one_request():
+    scanner = SlowScanner()
+    client = AsyncChainScanner(scanner)
+
+    async def burst():
+        return await asyncio.gather(
+            *[client.get_contract_source_code_and_name("0xAbC") for _ in range(5)],
+            client.get_contract_source_code_and_name("0xabc")
+        )
+
+    results = asyncio.run(burst())
+    assert results == [("contract 0xAbC", "Token")] * 6
+    assert scanner.requests == [("source", "0xAbC")]
+    assert client.coalesced == 5
+    assert client.inflight == {}
+
+def test_source_and_creations_run_concurrently():
+    scanner = SlowScanner(latency=0.2)
+    client = AsyncChainScanner(scanner).start()
+    start = time.perf_counter()
+    source, creations = client.call(client.token_lookups("0x1", "0x2"))
+    assert time.perf_counter() - start < 0.35
+    assert source == ("contract 0x1", "Token")
+    assert set(creations) == {"0x1", "0x2"}
+    # Token and pair creation records in one request
+    assert sorted(scanner.requests) == [("creation", ("0x1", "0x2")), ("source", "0x1")]
+
+def test_lookup_in_flight_in_another_process(tmp_path, r):
+    cache = ScannerCache(str(tmp_path / "scanner_cache.db"), "base")
+    other = AsyncChainScanner(SlowScanner(cache), r=r, poll_interval=0.01)
+    scanner = SlowScanner(cache)
+    client = AsyncChainScanner(scanner, r=r, poll_interval=0.01)
+
+    async def both():
+        # The other process claims the lookup first; this one waits for its result
+        first = asyncio.ensure_future(other.get_contract_source_code_and_name("0x1"))
+        await asyncio.sleep(0.02)
+        return await asyncio.gather(first, client.get_contract_source_code_and_name("0x1"))
+
+    assert asyncio.run(both()) == [("contract 0x1", "Token")] * 2
+    assert scanner.requests == []
+    assert r.keys() == []
@@ -0,0 +1,48 @@
+# tests/test_creation_batch.py
+
+import threading
+from ...modules.w3.chains.scanner.chain_scanner import ChainScanner
+from ...modules.w3.chains.scanner.creation_batcher import CreationBatcher
+
+class CountingScanner(ChainScanner):
+    """Answers creation lookups like BaseScan (lowercase addresses, unknown ones left out)."""
+    def __init__(self, known):
+        super().__init__()
+        self.known = known
+        self.requests = []
+
+    def fetch_contract_creations(self, contract_addresses):
+        self.requests.append(list(contract_addresses))
+        return [
+            {"contractAddress": address.lower(), "txHash": f"tx-{address.lower()}"}
+            for address in contract_addresses if address.lower() in self.known
+        ]
+
+def test_creations_are_batched_and_mapped():
+    addresses = [f"0x{i:040X}" for i in range(7)]
+    scanner = CountingScanner({address.lower() for address in addresses[:6]})
+    creations = scanner.get_contract_creations(addresses + addresses[:1])
+    # Five addresses per request, duplicates asked once
+    assert [len(request) for request in scanner.requests] == [5, 2]
+    assert creations[addresses[1]]["txHash"] == f"tx-{addresses[1].lower()}"
+    assert creations[addresses[6]] == "failed"
+    assert scanner.get_contract_creation(addresses[2])["txHash"] == f"tx-{addresses[2].lower()}"
+
+def test_batcher_groups_concurrent_callers():
+    scanner = CountingScanner({f"0x{i:040x}" for i in range(4)})
+    batcher = CreationBatcher(scanner, max_wait=0.2)
+    results = {}
+
+    def lookup(i):
+        token, pair = f"0x{i:040x}", f"0x{i + 2:040x}"
+        results[i] = batcher.get_contract_creations([token, pair])
+
+    threads = [threading.Thread(target=lookup, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Two events, four addresses, one request
+    assert len(scanner.requests) == 1
+    assert sorted(scanner.requests[0]) == [f"0x{i:040x}" for i in range(4)]
+    assert results[1][f"0x{3:040x}"]["txHash"] == f"tx-0x{3:040x}"
@@ -0,0 +1,68 @@
+# tests/test_http_session.py
+
+import json
+import threading
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ...modules.utils import http_session
+from ...modules.utils.retry_request import (
+    retryable_request_fixed, retryable_request_fixed_basescan, retryable_request_exponential
+)
+
+class KeepAliveAPI(BaseHTTPRequestHandler):
+    """HTTP/1.1 endpoint answering like BaseScan; counts the TCP connections it accepts."""
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self):
+        KeepAliveAPI.connections += 1
+        super().setup()
+
+    def do_GET(self):
+        body = json.dumps({"status": "1", "message": "OK", "result": "ok"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def url():
+    # Threaded, so shutting down doesn't wait for the kept-alive connection to close
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    KeepAliveAPI.connections = 0
+    yield f"http://127.0.0.1:{server.server_port}/api"
+    server.shutdown()
+    server.server_close()
+
+def test_one_session_per_host():
+    session = http_session.get_session("https://api.basescan.org/api?module=contract")
+    assert http_session.get_session("https://api.basescan.org/v2/api") is session
+    assert http_session.get_session("https://gas.api.infura.io/v3") is not session
+    assert http_session.get_session("http://api.basescan.org/api") is not session
+
+def test_new_process_gets_new_sessions(monkeypatch):
+    session = http_session.get_session("https://api.basescan.org/api")
+    # As seen from a forked child
+    monkeypatch.setattr(http_session.os, "getpid", lambda: -1)
+    assert http_session.get_session("https://api.basescan.org/api") is not session
+
+def test_default_timeout_only_when_none_given(monkeypatch):
+    timeouts = []
+    monkeypatch.setattr(requests.Session, "request", lambda self, method, url, **kwargs: timeouts.append(kwargs["timeout"]))
+    http_session.request("GET", "https://api.basescan.org/api")
+    http_session.request("GET", "https://api.basescan.org/api", timeout=30)
+    assert timeouts == [http_session.HTTP_TIMEOUT, 30]
+
+def test_retryable_requests_share_one_connection(url):
+    for _ in range(3):
+        assert retryable_request_fixed("GET", url).json()["result"] == "ok"
+        assert retryable_request_exponential("GET", url).status_code == 200
+        assert retryable_request_fixed_basescan("GET", url, params={"module": "contract"}).ok
+    assert KeepAliveAPI.connections == 1
@@ -0,0 +1,44 @@
+# tests/test_rate_limiter.py
+
+import time
+import pytest
+from ...modules.utils.rate_limiter import RateLimiter, TRADE, BACKGROUND
+
+def tokens(limiter):
+    return float(limiter.r.hget(limiter.key, "tokens"))
+
+def test_requests_are_spaced_by_the_rate(r):
+    limiter = RateLimiter(r, "test", rate=20, burst=1)
+    start = time.perf_counter()
+    for _ in range(4):
+        limiter.acquire()
+    # The first token is in the bucket, the next three refill at 50ms each
+    assert time.perf_counter() - start >= 0.14
+    assert limiter.totals() == {TRADE: {"acquired": 4, "wait_seconds": pytest.approx(sum(limiter.waits[TRADE]))}}
+    assert limiter.stats()[TRADE]["count"] == 4
+
+def test_background_leaves_the_reserve_to_the_trade_lane(r):
+    limiter = RateLimiter(r, "test", rate=1, burst=2, reserve=1)
+    limiter.acquire(BACKGROUND)
+    with pytest.raises(TimeoutError):
+        limiter.acquire(BACKGROUND, timeout=0.1)
+    assert limiter.acquire(TRADE, timeout=0.1) < 0.1
+
+def test_background_yields_to_a_waiting_trade_caller(r):
+    # Fast enough that a refill is under a millisecond
+    limiter = RateLimiter(r, "test", rate=5000, burst=5)
+    r.zadd(limiter.waiting_key, {"trade-caller": time.time() + 60})
+    with pytest.raises(TimeoutError):
+        limiter.acquire(BACKGROUND, timeout=0.05)
+    assert tokens(limiter) == 5
+    assert limiter.acquire(TRADE, timeout=0.05) < 0.05
+    r.zrem(limiter.waiting_key, "trade-caller")
+    assert limiter.acquire(BACKGROUND, timeout=0.05) < 0.05
+
+def test_drain_makes_every_caller_wait_for_a_refill(r):
+    limiter = RateLimiter(r, "test", rate=2, burst=4)
+    limiter.drain()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(TRADE, timeout=0.1)
+    assert tokens(limiter) < 1
+    assert limiter.acquire(TRADE, timeout=1) > 0.1
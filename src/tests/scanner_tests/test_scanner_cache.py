@@ -0,0 +1,38 @@
+# tests/test_scanner_cache.py
+
+from ...modules.w3.chains.scanner.chain_scanner import ChainScanner
+from ...modules.w3.chains.scanner.scanner_cache import ScannerCache
+
+class CountingScanner(ChainScanner):
+    """Answers from `results` instead of BaseScan and counts the requests."""
+    def __init__(self, cache, results):
+        super().__init__(cache)
+        self.results = results
+        self.requests = 0
+
+    def fetch_contract_abi(self, contract_address):
+        self.requests += 1
+        return self.results[contract_address]
+
+def test_cache_is_shared_and_persistent(tmp_path):
+    path = str(tmp_path / "scanner_cache.db")
+    scanner = CountingScanner(ScannerCache(path, "base"), {"0xAbC": [{"name": "transfer"}]})
+    assert scanner.get_contract_abi("0xAbC") == [{"name": "transfer"}]
+    # Addresses are matched case-insensitively
+    assert scanner.get_contract_abi("0xabc") == [{"name": "transfer"}]
+    assert scanner.requests == 1
+    assert scanner.cache.stats() == {"abi": {"hits": 1, "misses": 1}}
+
+    # Another process (connection) on the same file, but not another chain
+    other = CountingScanner(ScannerCache(path, "base"), {})
+    assert other.get_contract_abi("0xABC") == [{"name": "transfer"}]
+    bnb = CountingScanner(ScannerCache(path, "bnb"), {"0xAbC": "failed"})
+    assert bnb.get_contract_abi("0xAbC") == "failed"
+    assert bnb.requests == 1
+
+def test_negative_results_expire(tmp_path):
+    cache = ScannerCache(str(tmp_path / "scanner_cache.db"), "base", negative_ttl=0)
+    scanner = CountingScanner(cache, {"0x1": "closed source"})
+    scanner.get_contract_abi("0x1")
+    scanner.get_contract_abi("0x1")
+    assert scanner.requests == 2
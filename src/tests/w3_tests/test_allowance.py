@@ -0,0 +1,112 @@
+# tests/test_allowance.py
+
+import logging
+from decimal import Decimal
+from types import SimpleNamespace
+from ...modules.w3.exchange.uniswap_v2_base import UniswapV2Base
+from ...modules.w3.wallet.allowance_cache import AllowanceCache, MAX_ALLOWANCE
+from ...modules.w3.wallet.nonce_manager import NonceManager
+from ..conftest import FakeW3
+
+WALLET = "0x0000000000000000000000000000000000000001"
+ROUTER = "0x4752ba5dbc23f44d87826276bf6fd6b1c372ad24"
+
+class FakeCall:
+    def __init__(self, name, result=None):
+        self.name = name
+        self.result = result
+
+    def call(self):
+        return self.result
+
+    def build_transaction(self, params):
+        return {"name": self.name, **params}
+
+class ChainW3(FakeW3):
+    """Sends transactions by name and nonce, and mines each one when its receipt is asked for."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent = []
+        self.waited = []
+        self.timeouts = set()
+
+    def get_contract_instance(self, address, abi):
+        return SimpleNamespace(functions=SimpleNamespace(
+            getAmountsOut=lambda amount, path: FakeCall("getAmountsOut", [amount, amount]),
+            swapExactTokensForTokens=lambda *args: FakeCall("swap"),
+        ))
+
+    def fetch_gas_price(self, level="medium"):
+        return {"maxFeePerGas": 2 * 10**9, "maxPriorityFeePerGas": 10**9}
+
+    def sign_transaction(self, tx, private_key):
+        return SimpleNamespace(raw_transaction=tx)
+
+    def send_raw_transaction(self, tx):
+        self.sent.append(tx)
+        return f"0x{tx['name']}{tx['nonce']}"
+
+    def wait_for_transaction_receipt(self, tx_hash):
+        self.waited.append(tx_hash)
+        if tx_hash in self.timeouts:
+            raise TimeoutError(f"Transaction {tx_hash} is not in the chain after 120 seconds")
+        return SimpleNamespace(status=1, gasUsed=50_000, effectiveGasPrice=10**9)
+
+    def to_hex(self, value):
+        return value
+
+def make_token(address, balance):
+    return SimpleNamespace(address=address, decimals=18, contract=SimpleNamespace(functions=SimpleNamespace(
+        balanceOf=lambda owner: FakeCall("balanceOf", balance),
+        allowance=lambda owner, spender: FakeCall("allowance", 0),
+        approve=lambda spender, amount: FakeCall("approve"),
+    )))
+
+def setup(r):
+    w3 = ChainW3(transaction_count=3)
+    exchange = UniswapV2Base(w3, SimpleNamespace(get_contract_abi=lambda address: []))
+    account = SimpleNamespace(
+        address=WALLET, key=None, nonces=NonceManager(r, w3, WALLET), allowances=AllowanceCache(r, WALLET)
+    )
+    event = SimpleNamespace(logger=logging.getLogger("test"))
+    return w3, exchange, account, event
+
+def test_allowance_cache(r):
+    allowances = AllowanceCache(r, WALLET)
+    assert allowances.get("0xToken", ROUTER) is None
+    allowances.set("0xToken", ROUTER, 100, "0xapprove")
+    allowances.spend("0xToken", ROUTER, 30)
+    assert allowances.get("0xToken", ROUTER) == (70, "0xapprove")
+    allowances.set("0xToken", ROUTER, MAX_ALLOWANCE)
+    allowances.spend("0xToken", ROUTER, 30)
+    assert allowances.get("0xToken", ROUTER) == (MAX_ALLOWANCE, None)
+    allowances.invalidate("0xToken", ROUTER)
+    assert allowances.get("0xToken", ROUTER) is None
+
+def test_early_approve_is_used_by_the_sell(r):
+    w3, exchange, account, event = setup(r)
+    token, weth = make_token("0xToken", 10**18), make_token("0xWETH", 0)
+    approve_tx = exchange.approve(w3, account, token)
+    assert account.allowances.get("0xToken", exchange.router_address) == (MAX_ALLOWANCE, approve_tx)
+
+    result = exchange.swap_tokens(w3, account, token, weth, event, amount_in_tokens=Decimal("0.5"))
+    # No second approve; the swap went out on the next nonce
+    assert [(tx["name"], tx["nonce"]) for tx in w3.sent] == [("approve", 3), ("swap", 4)]
+    # The swap's receipt comes first, the approve's only books its gas
+    assert w3.waited == ["0xswap4", approve_tx]
+    assert result["swap_status"] == 1
+    assert result["approval_gas_cost_eth"] == 0.00005
+    assert account.allowances.get("0xToken", exchange.router_address) == (MAX_ALLOWANCE, None)
+    assert account.nonces.outstanding() == 0
+
+def test_approval_receipt_failure_does_not_lose_the_swap(r):
+    w3, exchange, account, event = setup(r)
+    token, weth = make_token("0xToken", 10**18), make_token("0xWETH", 0)
+    w3.timeouts.add("0xapprove3")
+
+    result = exchange.swap_tokens(w3, account, token, weth, event, amount_in_tokens=Decimal("0.5"))
+    assert result["swap_tx_hash"] == "0xswap4"
+    assert result["swap_status"] == 1
+    assert result["approval_gas_cost_eth"] == 0
+    # Still pending in the cache, so the next swap books the approve's gas
+    assert account.allowances.get("0xToken", exchange.router_address) == (MAX_ALLOWANCE, "0xapprove3")
@@ -0,0 +1,73 @@
+# tests/test_balance_monitor.py
+
+import multiprocessing
+import time
+from ...modules.w3.wallet.balance_monitor import BalanceMonitor
+from ..conftest import FakeW3
+
+WALLET = "0x0000000000000000000000000000000000000001"
+WETH = "0x4200000000000000000000000000000000000006"
+
+def make_monitor(interval=60):
+    w3 = FakeW3(block_number=100, eth_balances={WALLET: 2 * 10**18}, balances={WETH: 5 * 10**17})
+    return w3, BalanceMonitor(w3, WALLET, WETH, interval=interval)
+
+def wait_for_block(view, block, timeout=2):
+    deadline = time.time() + timeout
+    while view.block != block and time.time() < deadline:
+        time.sleep(0.01)
+    return view.block == block
+
+def read_view(view, go, results):
+    go.wait(10)
+    results.put((view.eth, view.weth, view.total, view.block))
+
+def test_refresh():
+    w3, monitor = make_monitor()
+    assert monitor.view.block == 0
+    monitor.refresh()
+    view = monitor.view
+    assert (view.eth, view.weth, view.total, view.block) == (2.0, 0.5, 2.5, 100)
+    assert time.time() - view.updated_at < 1
+
+def test_request_refresh_runs_before_the_interval():
+    w3, monitor = make_monitor(interval=60)
+    monitor.start()
+    try:
+        assert monitor.view.block == 100
+        # One of our transactions confirmed
+        w3.block_number = 101
+        w3.eth_balances[WALLET] = 10**18
+        monitor.view.request_refresh()
+        assert wait_for_block(monitor.view, 101)
+        assert monitor.view.eth == 1.0
+    finally:
+        monitor.stop()
+
+def test_failed_refresh_keeps_the_last_values():
+    w3, monitor = make_monitor(interval=0.01)
+    monitor.start()
+    try:
+        del w3.eth_balances[WALLET]
+        w3.block_number = 101
+        time.sleep(0.05)
+        assert (monitor.view.eth, monitor.view.block) == (2.0, 100)
+        w3.eth_balances[WALLET] = 0
+        assert wait_for_block(monitor.view, 101)
+        assert monitor.view.total == 0.5
+    finally:
+        monitor.stop()
+
+def test_view_is_shared_with_worker_processes():
+    w3, monitor = make_monitor()
+    monitor.refresh()
+    go, results = multiprocessing.Event(), multiprocessing.Queue()
+    worker = multiprocessing.Process(target=read_view, args=(monitor.view, go, results))
+    worker.start()
+    # Refreshed in this process after the worker started; the worker reads the new values
+    w3.block_number = 101
+    w3.eth_balances[WALLET] = 0
+    monitor.refresh()
+    go.set()
+    assert results.get(timeout=10) == (0.0, 0.5, 0.5, 101)
+    worker.join()
@@ -0,0 +1,96 @@
+# tests/test_multicall.py
+
+import json
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from eth_abi import encode, decode
+from web3 import Web3
+from ...modules.w3.chains.base import BaseChain
+from ...modules.w3.w3_connector import W3Connector
+from ...modules.w3.multicall import MulticallError
+from ...modules.utils.ABI import MIN_ERC20_ABI, PAIR_ABI
+
+TOKEN = "0x1111111111111111111111111111111111111111"
+PAIR = "0x2222222222222222222222222222222222222222"
+WALLET = "0x3333333333333333333333333333333333333333"
+
+def selector(signature):
+    return Web3.keccak(text=signature)[:4]
+
+# (target, selector) -> encoded return data; anything else reverts
+RESPONSES = {
+    (TOKEN, selector("decimals()")): encode(["uint8"], [18]),
+    (TOKEN, selector("balanceOf(address)")): encode(["uint256"], [5 * 10**17]),
+    (PAIR, selector("token0()")): encode(["address"], [TOKEN]),
+    (PAIR, selector("getReserves()")): encode(["uint112", "uint112", "uint32"], [1000, 2000, 7]),
+}
+
+class JSONRPCStandIn(BaseHTTPRequestHandler):
+    """Minimal JSON-RPC node that answers Multicall3 aggregate3 eth_calls from RESPONSES."""
+    eth_calls = 0
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if request["method"] == "eth_chainId":
+            result = hex(8453)
+        elif request["method"] == "eth_call":
+            JSONRPCStandIn.eth_calls += 1
+            data = bytes.fromhex(request["params"][0]["data"][2:])
+            assert data[:4] == selector("aggregate3((address,bool,bytes)[])")
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = []
+            for target, _, call_data in calls:
+                return_data = RESPONSES.get((target.lower(), call_data[:4]))
+                results.append((return_data is not None, return_data or b""))
+            result = "0x" + encode(["(bool,bytes)[]"], [results]).hex()
+        else:
+            result = None
+        body = json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def w3():
+    server = HTTPServer(("127.0.0.1", 0), JSONRPCStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    JSONRPCStandIn.eth_calls = 0
+    yield W3Connector(BaseChain(url=f"http://127.0.0.1:{server.server_port}"))
+    server.shutdown()
+
+def test_multicall_batches_reads_in_one_eth_call(w3):
+    token = w3.get_contract_instance(w3.to_checksum_address(TOKEN), MIN_ERC20_ABI)
+    pair = w3.get_contract_instance(w3.to_checksum_address(PAIR), PAIR_ABI)
+
+    batch = w3.multicall()
+    batch.add(token.functions.decimals())
+    batch.add(token.functions.balanceOf(w3.to_checksum_address(WALLET)))
+    batch.add(pair.functions.token0())
+    batch.add(pair.functions.getReserves())
+    decimals, balance, token0, reserves = batch.execute()
+
+    assert JSONRPCStandIn.eth_calls == 1
+    assert decimals == 18
+    assert balance == 5 * 10**17
+    assert token0 == w3.to_checksum_address(TOKEN)
+    assert reserves == [1000, 2000, 7]
+    assert len(batch) == 0
+
+def test_multicall_failures(w3):
+    pair = w3.get_contract_instance(w3.to_checksum_address(PAIR), PAIR_ABI)
+
+    batch = w3.multicall()
+    batch.add(pair.functions.token0())
+    batch.add(pair.functions.token1(), allow_failure=True)
+    assert batch.execute() == [w3.to_checksum_address(TOKEN), None]
+
+    batch.add(pair.functions.token1())
+    with pytest.raises(MulticallError):
+        batch.execute()
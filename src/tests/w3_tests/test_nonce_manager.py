@@ -0,0 +1,77 @@
+# tests/test_nonce_manager.py
+
+import threading
+from ...modules.w3.wallet.nonce_manager import NonceManager
+from ..conftest import FakeW3
+
+WALLET = "0x0000000000000000000000000000000000000001"
+
+def test_concurrent_reservations_are_unique(r):
+    w3 = FakeW3(transaction_count=7)
+    managers = [NonceManager(r, w3, WALLET) for _ in range(8)]
+    reserved = []
+    lock = threading.Lock()
+
+    def reserve(manager):
+        for _ in range(25):
+            nonce = manager.reserve()
+            with lock:
+                reserved.append(nonce)
+
+    threads = [threading.Thread(target=reserve, args=(manager,)) for manager in managers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(reserved) == list(range(7, 7 + 200))
+
+def test_release(r):
+    nonces = NonceManager(r, FakeW3(transaction_count=5), WALLET)
+    assert [nonces.reserve() for _ in range(3)] == [5, 6, 7]
+    # Not the last one: the counter stays, the nonce is handed out next
+    nonces.release(5)
+    assert int(r.get(nonces.key)) == 8
+    assert nonces.reserve() == 5
+    # The last one rewinds the counter, together with released ones right below it
+    nonces.release(6)
+    nonces.release(7)
+    assert int(r.get(nonces.key)) == 6
+    assert nonces.reserve() == 6
+
+def test_check_resyncs_a_gap_that_persists(r):
+    w3 = FakeW3(transaction_count=3)
+    nonces = NonceManager(r, w3, WALLET)
+    for _ in range(3):
+        nonces.done(nonces.reserve())
+    # Nonce 4 was reserved and done, but its transaction never reached the node
+    w3.transaction_count = 4
+    assert nonces.check() == (4, 6, False)
+    assert nonces.check() == (4, 6, True)
+    assert nonces.reserve() == 4
+
+def test_check_waits_for_outstanding_reservations(r):
+    w3 = FakeW3(transaction_count=3)
+    nonces = NonceManager(r, w3, WALLET)
+    nonce = nonces.reserve()
+    # A transaction being built, or a node lagging on its pending count
+    for _ in range(3):
+        assert nonces.check() == (3, 4, False)
+    nonces.done(nonce)
+    assert nonces.check() == (3, 4, False)
+    assert nonces.check() == (3, 4, True)
+
+def test_check_ignores_reservations_of_dead_processes(r):
+    nonces = NonceManager(r, FakeW3(transaction_count=3), WALLET, reservation_ttl=-1)
+    nonces.reserve()
+    assert nonces.check() == (3, 4, False)
+    assert nonces.check() == (3, 4, True)
+    assert nonces.outstanding() == 0
+
+def test_check_resyncs_when_the_chain_is_ahead(r):
+    w3 = FakeW3(transaction_count=3)
+    nonces = NonceManager(r, w3, WALLET)
+    nonces.done(nonces.reserve())
+    # Sent from another wallet instance
+    w3.transaction_count = 6
+    assert nonces.check() == (6, 4, True)
+    assert nonces.reserve() == 6
@@ -0,0 +1,33 @@
+# tests/test_token.py
+
+import os
+from ...modules.w3.exchange.token.token import Token
+from ..conftest import FakeW3
+
+TOKEN = {
+    "address": "0x1111111111111111111111111111111111111111",
+    "open_source": True,
+    "contract_name": "Token",
+    "decimals": 18,
+    "contract_creator": "0x2222222222222222222222222222222222222222",
+    "creation_hash": "0x1",
+    "creation_block": 100,
+    "creation_timestamp": 1700000000,
+    "functions": ["transfer"],
+}
+
+def test_from_dict_uses_the_carried_source(tmp_path, monkeypatch):
+    # A host that never built the token has no data/code
+    monkeypatch.chdir(tmp_path)
+    token = Token.from_dict(TOKEN, FakeW3(), code="contract Token {}")
+    assert token.code == "contract Token {}"
+    assert token.to_dict() == TOKEN
+    assert Token.from_dict(TOKEN, FakeW3()).code == ""
+
+def test_from_dict_falls_back_to_the_saved_source(tmp_path, monkeypatch):
+    # Jobs scheduled before the source was carried along
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data/code")
+    with open(f"data/code/{TOKEN['address']}.txt", "w") as f:
+        f.write("contract Saved {}")
+    assert Token.from_dict(TOKEN, FakeW3()).code == "contract Saved {}"